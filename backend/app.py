@@ -1,19 +1,101 @@
-from flask import Flask, request, jsonify, send_file
+from flask import Flask, Response, request, jsonify, send_file, redirect, g
 from flask_cors import CORS
-from flask_jwt_extended import JWTManager, create_access_token, jwt_required, get_jwt_identity
+from flask_jwt_extended import JWTManager, create_access_token, jwt_required, get_jwt, get_jwt_identity
 from werkzeug.security import generate_password_hash, check_password_hash
-from werkzeug.utils import secure_filename
+from werkzeug.exceptions import HTTPException, RequestEntityTooLarge, UnsupportedMediaType
+from werkzeug.formparser import parse_form_data
+from PIL import Image, ImageOps
 import sqlite3
 import os
 from datetime import datetime, timedelta
+from functools import wraps
+from collections import OrderedDict
 import csv
+import gzip
+import hashlib
 import io
 import json
+import mimetypes
+import base64
+import re
+import queue
+import threading
+import time
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor
 
 app = Flask(__name__)
 app.config['JWT_SECRET_KEY'] = 'your-jwt-secret-key-here'  # Change this in production
 app.config['JWT_ACCESS_TOKEN_EXPIRES'] = timedelta(hours=24)
 app.config['UPLOAD_FOLDER'] = 'uploads'
+# Where uploads are kept: 'local' (UPLOAD_FOLDER, sharded into
+# UPLOAD_SHARD_DEPTH levels of subdirectories) or 's3' (any S3-compatible store)
+app.config['UPLOAD_STORAGE'] = os.environ.get('SKILLSWAP_UPLOAD_STORAGE', 'local')
+app.config['UPLOAD_SHARD_DEPTH'] = int(os.environ.get('SKILLSWAP_UPLOAD_SHARD_DEPTH', 2))
+app.config['S3_BUCKET'] = os.environ.get('SKILLSWAP_S3_BUCKET', '')
+app.config['S3_PREFIX'] = os.environ.get('SKILLSWAP_S3_PREFIX', 'uploads/')
+app.config['S3_ENDPOINT_URL'] = os.environ.get('SKILLSWAP_S3_ENDPOINT_URL', '')
+app.config['S3_REGION'] = os.environ.get('SKILLSWAP_S3_REGION', '')
+# Serve S3 uploads by redirecting to a presigned URL valid for
+# S3_PRESIGNED_EXPIRY seconds instead of streaming them through the app
+app.config['S3_PRESIGNED_REDIRECT'] = os.environ.get('SKILLSWAP_S3_PRESIGNED_REDIRECT', '') in ('1', 'true')
+app.config['S3_PRESIGNED_EXPIRY'] = int(os.environ.get('SKILLSWAP_S3_PRESIGNED_EXPIRY', 3600))
+app.config['PHOTO_THUMBNAIL_SIZES'] = (64, 128, 256)
+app.config['PHOTO_MAX_DIMENSION'] = 1024
+app.config['PHOTO_MAX_PIXELS'] = 50000000
+app.config['PHOTO_QUALITY'] = 80
+app.config['PHOTO_WORKERS'] = int(os.environ.get('SKILLSWAP_PHOTO_WORKERS', 2))
+# Size caps: MAX_CONTENT_LENGTH applies to every request body, PHOTO_MAX_BYTES
+# to the photo itself (enforced while the upload streams in), and
+# UPLOAD_FORM_OVERHEAD allows for the multipart framing around it
+app.config['MAX_CONTENT_LENGTH'] = int(os.environ.get('SKILLSWAP_MAX_CONTENT_LENGTH', 16 * 1024 * 1024))
+app.config['PHOTO_MAX_BYTES'] = int(os.environ.get('SKILLSWAP_PHOTO_MAX_BYTES', 5 * 1024 * 1024))
+app.config['UPLOAD_FORM_OVERHEAD'] = 64 * 1024
+app.config['UPLOAD_METRICS_WINDOW'] = 3600
+# Hand upload bytes to the front-end server: '' (serve from Python),
+# 'x-sendfile' (Apache/lighttpd) or 'x-accel-redirect' (nginx, which must map
+# UPLOADS_ACCEL_PREFIX to an internal location aliasing the upload folder)
+app.config['UPLOADS_SENDFILE'] = os.environ.get('SKILLSWAP_UPLOADS_SENDFILE', '')
+app.config['UPLOADS_ACCEL_PREFIX'] = os.environ.get('SKILLSWAP_UPLOADS_ACCEL_PREFIX', '/protected-uploads/')
+app.config['USE_X_SENDFILE'] = app.config['UPLOADS_SENDFILE'] == 'x-sendfile'
+app.config['MAX_PER_PAGE'] = int(os.environ.get('SKILLSWAP_MAX_PER_PAGE', 50))
+app.config['CHAT_PAGE_SIZE'] = 50
+app.config['CHAT_MAX_PAGE_SIZE'] = 200
+app.config['CHAT_PREVIEW_LENGTH'] = 200
+app.config['EVENT_STREAM_HEARTBEAT'] = 15
+app.config['LONG_POLL_MAX_WAIT'] = 30
+app.config['LONG_POLL_CHECK_INTERVAL'] = float(os.environ.get('SKILLSWAP_LONG_POLL_CHECK_INTERVAL', 2))
+app.config['EXPORT_CHUNK_SIZE'] = 500
+app.config['EXPORT_FOLDER'] = os.environ.get('SKILLSWAP_EXPORT_FOLDER', 'exports')
+app.config['EXPORT_WORKERS'] = int(os.environ.get('SKILLSWAP_EXPORT_WORKERS', 2))
+app.config['EXPORT_RETENTION'] = int(os.environ.get('SKILLSWAP_EXPORT_RETENTION', 7 * 24 * 3600))
+app.config['BULK_MAX_IDS'] = 1000
+# Skill matching: how much each signal contributes to a match score (the
+# weights sum to 1), and the prior that pulls thinly-rated users towards an
+# average rating until they have a few reviews
+app.config['MATCH_WEIGHTS'] = {'skills': 0.4, 'rating': 0.25, 'availability': 0.2, 'location': 0.15}
+app.config['MATCH_RATING_PRIOR'] = 3.0
+app.config['MATCH_RATING_PRIOR_WEIGHT'] = 2
+app.config['FANOUT_CHUNK_SIZE'] = int(os.environ.get('SKILLSWAP_FANOUT_CHUNK_SIZE', 500))
+app.config['COUNT_CACHE_TTL'] = float(os.environ.get('SKILLSWAP_COUNT_CACHE_TTL', 30))
+app.config['ADMIN_STATS_CACHE_TTL'] = float(os.environ.get('SKILLSWAP_ADMIN_STATS_CACHE_TTL', 60))
+app.config['USER_STATUS_CACHE_TTL'] = float(os.environ.get('SKILLSWAP_USER_STATUS_CACHE_TTL', 30))
+app.config['DATABASE'] = os.environ.get('SKILLSWAP_DATABASE', 'skill_swap.db')
+app.config['DB_POOL_SIZE'] = int(os.environ.get('SKILLSWAP_DB_POOL_SIZE', 10))
+app.config['DB_POOL_TIMEOUT'] = float(os.environ.get('SKILLSWAP_DB_POOL_TIMEOUT', 5))
+# Pragmas applied to every connection. WAL lets readers proceed while a
+# writer holds the lock; busy_timeout makes writers queue instead of failing
+# immediately with "database is locked".
+app.config['DB_PRAGMAS'] = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+    'cache_size': -16000,
+    'mmap_size': 134217728,
+    'temp_store': 'MEMORY',
+    'wal_autocheckpoint': 1000
+}
+app.config['DB_CHECKPOINT_INTERVAL'] = float(os.environ.get('SKILLSWAP_DB_CHECKPOINT_INTERVAL', 300))
 
 # Enable CORS for all routes
 CORS(app)
@@ -21,8 +103,9 @@ CORS(app)
 # Initialize JWT
 jwt = JWTManager(app)
 
-# Ensure upload directory exists
+# Ensure upload and export directories exist
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
+os.makedirs(app.config['EXPORT_FOLDER'], exist_ok=True)
 
 # Helper function to convert SQLite timestamp string to datetime object
 def parse_datetime(timestamp_str):
@@ -64,9 +147,485 @@ def convert_rows_datetimes(rows):
         return []
     return [convert_row_datetimes(row) for row in rows]
 
+# Helper function to turn a stored profile photo filename into a URL
+def photo_url(photo):
+    if photo and not photo.startswith('http') and not photo.startswith('/'):
+        return f'/api/uploads/{photo}'
+    return photo
+
+# Helper function to name the square thumbnail of a stored photo
+def thumbnail_name(photo, size):
+    return f'{os.path.splitext(photo)[0]}_{size}.webp'
+
+# Helper function to list the URL of each rendered size of a profile photo
+def photo_urls(photo):
+    url = photo_url(photo)
+    if not url:
+        return None
+    urls = {'original': url}
+    if url.startswith('/api/uploads/'):
+        for size in app.config['PHOTO_THUMBNAIL_SIZES']:
+            urls[str(size)] = f'{url}?size={size}'
+    return urls
+
+# Schema migrations
+def add_missing_columns(cursor, table, columns):
+    """Add each ``(name, definition)`` column that ``table`` doesn't have yet"""
+    existing = {row[1] for row in cursor.execute(f'PRAGMA table_info({table})')}
+    for name, definition in columns:
+        if name not in existing:
+            cursor.execute(f'ALTER TABLE {table} ADD COLUMN {name} {definition}')
+
+def migrate_legacy_columns(cursor):
+    add_missing_columns(cursor, 'users', [
+        ('bio', 'TEXT'),
+        ('is_under_supervision', 'INTEGER DEFAULT 0'),
+        ('availability_days', 'TEXT'),
+        ('availability_start_time', 'TEXT'),
+        ('availability_end_time', 'TEXT')
+    ])
+    add_missing_columns(cursor, 'skills', [
+        ('is_rejected', 'INTEGER DEFAULT 0'),
+        ('rejection_reason', 'TEXT'),
+        ('rejected_at', 'TIMESTAMP')
+    ])
+
+def create_skill_search_index(cursor):
+    """Full-text index over approved-or-not skills plus the owner's name.
+
+    skills_fts (unicode61) answers word-prefix queries ranked with BM25;
+    skills_trigram answers arbitrary substring queries. Both are keyed by
+    skills.id and kept in sync by triggers. If this SQLite build lacks FTS5
+    the tables are skipped and search keeps using LIKE.
+    """
+    try:
+        cursor.execute('''
+            CREATE VIRTUAL TABLE IF NOT EXISTS skills_fts
+            USING fts5(skill_name, description, user_name, tokenize = 'unicode61 remove_diacritics 2')
+        ''')
+    except sqlite3.OperationalError:
+        return
+    
+    indexes = [('skills_fts', ['skill_name', 'description', 'user_name'])]
+    try:
+        cursor.execute('''
+            CREATE VIRTUAL TABLE IF NOT EXISTS skills_trigram
+            USING fts5(skill_name, user_name, tokenize = 'trigram')
+        ''')
+        indexes.append(('skills_trigram', ['skill_name', 'user_name']))
+    except sqlite3.OperationalError:
+        # trigram tokenizer needs SQLite 3.34+
+        pass
+    
+    for table, columns in indexes:
+        column_list = ', '.join(columns)
+        values = ', '.join(
+            '(SELECT name FROM users WHERE id = new.user_id)' if column == 'user_name' else f'new.{column}'
+            for column in columns
+        )
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS {table}_after_insert AFTER INSERT ON skills BEGIN
+                INSERT INTO {table} (rowid, {column_list}) VALUES (new.id, {values});
+            END
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS {table}_after_delete AFTER DELETE ON skills BEGIN
+                DELETE FROM {table} WHERE rowid = old.id;
+            END
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS {table}_after_update
+            AFTER UPDATE OF skill_name, description, user_id ON skills BEGIN
+                DELETE FROM {table} WHERE rowid = old.id;
+                INSERT INTO {table} (rowid, {column_list}) VALUES (new.id, {values});
+            END
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS {table}_after_user_rename AFTER UPDATE OF name ON users BEGIN
+                UPDATE {table} SET user_name = new.name
+                WHERE rowid IN (SELECT id FROM skills WHERE user_id = new.id);
+            END
+        ''')
+        select_list = ', '.join('u.name' if column == 'user_name' else f's.{column}' for column in columns)
+        cursor.execute(f'DELETE FROM {table}')
+        cursor.execute(f'''
+            INSERT INTO {table} (rowid, {column_list})
+            SELECT s.id, {select_list} FROM skills s LEFT JOIN users u ON s.user_id = u.id
+        ''')
+
+def create_chat_inbox(cursor):
+    """Per-user conversation summary so the inbox is a single range read"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS chat_inbox (
+            user_id INTEGER NOT NULL,
+            conversation_id INTEGER NOT NULL,
+            other_user_id INTEGER NOT NULL,
+            last_message_id INTEGER,
+            last_message TEXT,
+            last_message_at TIMESTAMP,
+            unread_count INTEGER DEFAULT 0,
+            PRIMARY KEY (user_id, conversation_id),
+            FOREIGN KEY (conversation_id) REFERENCES chat_conversations (id)
+        )
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_chat_inbox_user_recent ON chat_inbox (user_id, last_message_at, last_message_id)')
+    
+    # Backfill from existing conversations that have messages
+    cursor.execute('''
+        INSERT OR IGNORE INTO chat_inbox
+            (user_id, conversation_id, other_user_id, last_message_id, last_message, last_message_at, unread_count)
+        SELECT p.user_id, p.conversation_id, p.other_user_id, m.id, substr(m.message, 1, ?), m.created_at,
+               (SELECT COUNT(*) FROM chat_messages
+                WHERE conversation_id = p.conversation_id AND sender_id != p.user_id AND is_read = 0)
+        FROM (
+            SELECT id AS conversation_id, user1_id AS user_id, user2_id AS other_user_id FROM chat_conversations
+            UNION ALL
+            SELECT id, user2_id, user1_id FROM chat_conversations
+        ) p
+        JOIN chat_messages m ON m.id = (SELECT MAX(id) FROM chat_messages WHERE conversation_id = p.conversation_id)
+    ''', (app.config['CHAT_PREVIEW_LENGTH'],))
+
+# Counters kept in user_stats. Skill counts cover approved skills by type plus
+# skills still waiting for review.
+USER_STATS_COLUMNS = ('rating_sum', 'rating_count', 'completed_swaps', 'offered_skills', 'wanted_skills', 'pending_skills')
+
+# Recomputes every user's counters from the source tables
+USER_STATS_QUERY = '''
+    SELECT u.id,
+           COALESCE(r.rating_sum, 0), COALESCE(r.rating_count, 0),
+           COALESCE(sw.completed_swaps, 0),
+           COALESCE(sk.offered_skills, 0), COALESCE(sk.wanted_skills, 0), COALESCE(sk.pending_skills, 0)
+    FROM users u
+    LEFT JOIN (
+        SELECT rated_id, SUM(rating) AS rating_sum, COUNT(*) AS rating_count
+        FROM ratings GROUP BY rated_id
+    ) r ON r.rated_id = u.id
+    LEFT JOIN (
+        SELECT user_id, COUNT(*) AS completed_swaps FROM (
+            SELECT requester_id AS user_id FROM swap_requests WHERE status = 'accepted'
+            UNION ALL
+            SELECT provider_id FROM swap_requests WHERE status = 'accepted'
+        ) GROUP BY user_id
+    ) sw ON sw.user_id = u.id
+    LEFT JOIN (
+        SELECT user_id,
+               SUM(is_approved = 1 AND is_rejected = 0 AND skill_type = 'offered') AS offered_skills,
+               SUM(is_approved = 1 AND is_rejected = 0 AND skill_type = 'wanted') AS wanted_skills,
+               SUM(is_approved = 0 AND is_rejected = 0) AS pending_skills
+        FROM skills GROUP BY user_id
+    ) sk ON sk.user_id = u.id
+'''
+
+def rebuild_user_stats(cursor):
+    """Recompute user_stats from scratch. Returns how many users had drifted."""
+    fresh = [tuple(row) for row in cursor.execute(USER_STATS_QUERY).fetchall()]
+    current = {row[0]: tuple(row) for row in cursor.execute(
+        f"SELECT user_id, {', '.join(USER_STATS_COLUMNS)} FROM user_stats"
+    ).fetchall()}
+    zeros = (0,) * len(USER_STATS_COLUMNS)
+    drifted = sum(1 for row in fresh if current.pop(row[0], (row[0],) + zeros) != row) + len(current)
+    
+    cursor.execute('DELETE FROM user_stats')
+    cursor.executemany(f'''
+        INSERT INTO user_stats (user_id, {', '.join(USER_STATS_COLUMNS)})
+        VALUES (?, {', '.join('?' * len(USER_STATS_COLUMNS))})
+    ''', fresh)
+    return drifted
+
+def create_user_stats(cursor):
+    """Materialised per-user reputation and activity counters"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS user_stats (
+            user_id INTEGER PRIMARY KEY,
+            rating_sum INTEGER DEFAULT 0,
+            rating_count INTEGER DEFAULT 0,
+            completed_swaps INTEGER DEFAULT 0,
+            offered_skills INTEGER DEFAULT 0,
+            wanted_skills INTEGER DEFAULT 0,
+            pending_skills INTEGER DEFAULT 0,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )
+    ''')
+    rebuild_user_stats(cursor)
+
+# Words that describe a level rather than the skill itself. They are dropped
+# when matching, so "Python basics" and "Advanced Python" both mean "python".
+SKILL_LEVEL_WORDS = {
+    'basic', 'basics', 'beginner', 'beginners', 'intermediate', 'advanced', 'expert',
+    'intro', 'introduction', 'fundamentals', 'level', 'lessons', 'for', 'to'
+}
+
+def normalize_skill_name(name):
+    """Matching key for a skill name: case-, accent- and punctuation-insensitive,
+    without level qualifiers. Returns '' for names with no words."""
+    text = unicodedata.normalize('NFKD', name or '')
+    text = ''.join(char for char in text if not unicodedata.combining(char)).lower()
+    words = re.findall(r'[^\W_]+[+#]*', text)
+    core = [word for word in words if word not in SKILL_LEVEL_WORDS]
+    return ' '.join(core or words)
+
+def rebuild_skill_index(cursor):
+    """Recompute skill_index from the approved skills. Returns the number of entries."""
+    entries = []
+    for skill_id, user_id, skill_name, skill_type in cursor.execute(
+        'SELECT id, user_id, skill_name, skill_type FROM skills WHERE is_approved = 1 AND is_rejected = 0'
+    ).fetchall():
+        term = normalize_skill_name(skill_name)
+        if term:
+            entries.append((skill_id, term, user_id, skill_type))
+    
+    cursor.execute('DELETE FROM skill_index')
+    cursor.executemany('''
+        INSERT INTO skill_index (skill_id, term, user_id, skill_type) VALUES (?, ?, ?, ?)
+    ''', entries)
+    return len(entries)
+
+def create_skill_index(cursor):
+    """Inverted index from normalised skill name to the users offering or wanting it.
+
+    One row per approved skill, kept in step by the approve, reject, delete and
+    resubmit paths in the same transaction, so matching never re-reads or
+    re-normalises the skills table.
+    """
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS skill_index (
+            skill_id INTEGER PRIMARY KEY,
+            term TEXT NOT NULL,
+            user_id INTEGER NOT NULL,
+            skill_type TEXT NOT NULL,
+            FOREIGN KEY (skill_id) REFERENCES skills (id),
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )
+    ''')
+    # term -> users with that skill, and user -> their terms
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_skill_index_term ON skill_index (term, skill_type, user_id)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_skill_index_user ON skill_index (user_id, skill_type, term)')
+    rebuild_skill_index(cursor)
+
+def rebuild_match_profiles(cursor):
+    """Recompute match_profiles from the users table. Returns the number of profiles."""
+    users = cursor.execute('''
+        SELECT id, location, availability, availability_days, availability_start_time, availability_end_time
+        FROM users
+    ''').fetchall()
+    columns = [column[0] for column in cursor.description]
+    profiles = [(user[0],) + match_profile(dict(zip(columns, user))) for user in users]
+    
+    cursor.execute('DELETE FROM match_profiles')
+    cursor.executemany('''
+        INSERT INTO match_profiles (user_id, day_mask, day_count, window_start, window_end, location_key)
+        VALUES (?, ?, ?, ?, ?, ?)
+    ''', profiles)
+    return len(profiles)
+
+def create_match_profiles(cursor):
+    """Each user's availability and location in the form the match ranking
+    compares them: a bitmask of days, the daily window in minutes and the
+    location's words. Parsed once when the profile is saved, so /api/matches
+    can score and order candidates in SQL.
+    """
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS match_profiles (
+            user_id INTEGER PRIMARY KEY,
+            day_mask INTEGER NOT NULL DEFAULT 0,
+            day_count INTEGER NOT NULL DEFAULT 0,
+            window_start INTEGER,
+            window_end INTEGER,
+            location_key TEXT NOT NULL DEFAULT '',
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )
+    ''')
+    rebuild_match_profiles(cursor)
+
+# Tables whose writes change a polled count: (scope, table, column that
+# changes the count). Each write bumps the owner's row in change_versions.
+CHANGE_VERSION_SOURCES = [
+    ('notifications', 'notifications', 'is_read'),
+    ('chat', 'chat_inbox', 'unread_count')
+]
+
+def create_change_versions(cursor):
+    """Per-user change counters behind the unread-count ETags.
+
+    Triggers bump the counter in the same transaction as the write, so every
+    worker process sees the same version no matter which one handled the write.
+    """
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS change_versions (
+            scope TEXT NOT NULL,
+            user_id INTEGER NOT NULL,
+            version INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (scope, user_id)
+        ) WITHOUT ROWID
+    ''')
+    for scope, table, column in CHANGE_VERSION_SOURCES:
+        for event, row, condition in [
+            ('INSERT', 'new', ''),
+            (f'UPDATE OF {column}', 'new', f'WHEN new.{column} IS NOT old.{column}'),
+            ('DELETE', 'old', '')
+        ]:
+            cursor.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS {table}_version_{event.split()[0].lower()}
+                AFTER {event} ON {table} {condition} BEGIN
+                    INSERT INTO change_versions (scope, user_id, version) VALUES ('{scope}', {row}.user_id, 1)
+                    ON CONFLICT (scope, user_id) DO UPDATE SET version = version + 1;
+                END
+            ''')
+
+# Ordered list of (version, description, steps). A step is either a SQL
+# statement or a callable taking a cursor. Each migration runs in its own
+# transaction and is recorded in schema_version, so it is applied exactly once.
+# Only ever append to this list.
+MIGRATIONS = [
+    (1, 'Add columns introduced after the initial schema', [
+        migrate_legacy_columns
+    ]),
+    (2, 'Secondary indexes for the hot read paths', [
+        # Profile/skill listings filter by owner and type
+        'CREATE INDEX IF NOT EXISTS idx_skills_user_type ON skills (user_id, skill_type)',
+        # Skill search: approved offered skills, newest first
+        'CREATE INDEX IF NOT EXISTS idx_skills_type_approved ON skills (skill_type, is_approved, is_rejected, created_at)',
+        # Sent/received swap lists are ordered by created_at per user
+        'CREATE INDEX IF NOT EXISTS idx_swap_requests_requester ON swap_requests (requester_id, created_at)',
+        'CREATE INDEX IF NOT EXISTS idx_swap_requests_provider ON swap_requests (provider_id, created_at)',
+        'CREATE INDEX IF NOT EXISTS idx_swap_requests_status ON swap_requests (status)',
+        # Covering index for the per-user AVG(rating)/COUNT(*) aggregate
+        'CREATE INDEX IF NOT EXISTS idx_ratings_rated ON ratings (rated_id, rating)',
+        'CREATE INDEX IF NOT EXISTS idx_ratings_swap_rater ON ratings (swap_request_id, rater_id)',
+        'CREATE INDEX IF NOT EXISTS idx_notifications_user_read ON notifications (user_id, is_read)',
+        'CREATE INDEX IF NOT EXISTS idx_chat_messages_conversation ON chat_messages (conversation_id, created_at)',
+        # UNIQUE(user1_id, user2_id) already covers lookups by user1_id
+        'CREATE INDEX IF NOT EXISTS idx_chat_conversations_user2 ON chat_conversations (user2_id)',
+        # Public user directory ordering
+        'CREATE INDEX IF NOT EXISTS idx_users_listing ON users (is_under_supervision, created_at)',
+        'CREATE INDEX IF NOT EXISTS idx_messages_active ON messages (is_active, created_at)'
+    ]),
+    (3, 'Full-text skill search index', [
+        create_skill_search_index
+    ]),
+    (4, 'Index chat history by message id', [
+        'CREATE INDEX IF NOT EXISTS idx_chat_messages_conversation_id ON chat_messages (conversation_id, id)'
+    ]),
+    (5, 'Denormalised chat inbox summary', [
+        create_chat_inbox
+    ]),
+    (6, 'Columns read by the admin reports', [
+        lambda cursor: add_missing_columns(cursor, 'users', [('last_login', 'TIMESTAMP')]),
+        lambda cursor: add_missing_columns(cursor, 'swap_requests', [('completed_at', 'TIMESTAMP')])
+    ]),
+    (7, 'Background export jobs', [
+        '''
+        CREATE TABLE IF NOT EXISTS export_jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            report TEXT NOT NULL,
+            requested_by INTEGER NOT NULL,
+            status TEXT DEFAULT 'queued',
+            compress INTEGER DEFAULT 0,
+            total_rows INTEGER,
+            rows_written INTEGER DEFAULT 0,
+            file_name TEXT,
+            file_size INTEGER,
+            error TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            started_at TIMESTAMP,
+            finished_at TIMESTAMP,
+            FOREIGN KEY (requested_by) REFERENCES users (id)
+        )
+        ''',
+        'CREATE INDEX IF NOT EXISTS idx_export_jobs_status ON export_jobs (status, id)'
+    ]),
+    (8, 'Materialised per-user stats', [
+        create_user_stats
+    ]),
+    (9, 'Indexes for the admin list filters and search', [
+        'CREATE INDEX IF NOT EXISTS idx_users_admin_created ON users (is_admin, created_at)',
+        # Case-insensitive prefix search (LIKE 'term%') on name and email
+        'CREATE INDEX IF NOT EXISTS idx_users_name_nocase ON users (name COLLATE NOCASE)',
+        'CREATE INDEX IF NOT EXISTS idx_users_email_nocase ON users (email COLLATE NOCASE)',
+        # Moderation queue: pending / approved / rejected, newest first
+        'CREATE INDEX IF NOT EXISTS idx_skills_review ON skills (is_approved, is_rejected, created_at)',
+        'CREATE INDEX IF NOT EXISTS idx_skills_created ON skills (created_at)'
+    ]),
+    (10, 'Notification fan-out jobs', [
+        '''
+        CREATE TABLE IF NOT EXISTS notification_fanouts (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            title TEXT NOT NULL,
+            message TEXT NOT NULL,
+            type TEXT DEFAULT 'info',
+            recipients TEXT,
+            created_by INTEGER,
+            status TEXT DEFAULT 'queued',
+            total INTEGER,
+            delivered INTEGER DEFAULT 0,
+            last_user_id INTEGER DEFAULT 0,
+            error TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            started_at TIMESTAMP,
+            finished_at TIMESTAMP,
+            FOREIGN KEY (created_by) REFERENCES users (id)
+        )
+        ''',
+        'CREATE INDEX IF NOT EXISTS idx_notification_fanouts_status ON notification_fanouts (status, id)'
+    ]),
+    (11, 'Index profile photos for shared-file reference checks', [
+        'CREATE INDEX IF NOT EXISTS idx_users_profile_photo ON users (profile_photo)'
+    ]),
+    (12, 'Skill match index', [
+        create_skill_index
+    ]),
+    (13, 'Shared change versions for the unread-count ETags', [
+        create_change_versions
+    ]),
+    (14, 'Parsed availability and location for match ranking', [
+        create_match_profiles
+    ])
+]
+
+def get_schema_version(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            description TEXT,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    return conn.execute('SELECT COALESCE(MAX(version), 0) FROM schema_version').fetchone()[0]
+
+def run_migrations(conn, migrations=MIGRATIONS):
+    """Apply every migration newer than the recorded schema version"""
+    current = get_schema_version(conn)
+    applied = []
+    for version, description, steps in sorted(migrations, key=lambda m: m[0]):
+        if version <= current:
+            continue
+        cursor = conn.cursor()
+        cursor.execute('BEGIN')
+        try:
+            for step in steps:
+                if callable(step):
+                    step(cursor)
+                else:
+                    cursor.execute(step)
+            cursor.execute('INSERT INTO schema_version (version, description) VALUES (?, ?)',
+                           (version, description))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        applied.append(version)
+    return applied
+
+# Helper function to apply the configured PRAGMA profile to a connection
+def apply_pragmas(conn, pragmas):
+    for name, value in pragmas.items():
+        conn.execute(f'PRAGMA {name} = {value}')
+
 # Database setup
 def init_db():
-    conn = sqlite3.connect('skill_swap.db')
+    conn = sqlite3.connect(app.config['DATABASE'])
+    apply_pragmas(conn, app.config['DB_PRAGMAS'])
     cursor = conn.cursor()
     
     # Users table
@@ -91,20 +650,6 @@ def init_db():
         )
     ''')
     
-    # Add new columns if they don't exist (for existing databases)
-    try:
-        cursor.execute('ALTER TABLE users ADD COLUMN availability_days TEXT')
-    except sqlite3.OperationalError:
-        pass
-    try:
-        cursor.execute('ALTER TABLE users ADD COLUMN availability_start_time TEXT')
-    except sqlite3.OperationalError:
-        pass
-    try:
-        cursor.execute('ALTER TABLE users ADD COLUMN availability_end_time TEXT')
-    except sqlite3.OperationalError:
-        pass
-    
     # Skills table
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS skills (
@@ -210,6 +755,12 @@ def init_db():
         )
     ''')
     
+    conn.commit()
+    
+    # Bring older databases up to date and create indexes
+    run_migrations(conn)
+    conn.execute('PRAGMA optimize')
+    
     # Create default admin user
     cursor.execute("SELECT * FROM users WHERE email = 'admin@skillswap.com'")
     if not cursor.fetchone():
@@ -222,10 +773,591 @@ def init_db():
     conn.commit()
     conn.close()
 
+# Connection pool
+class ConnectionPool:
+    """Bounded pool of warm SQLite connections shared across request threads.
+
+    Connections are created lazily up to ``size``. When every connection is
+    checked out, ``acquire()`` blocks for up to ``timeout`` seconds before
+    giving up. Idle connections are handed out LIFO so the warmest one
+    (hot page cache, prepared statements) is reused first.
+
+    Every new connection gets ``pragmas`` applied. If ``checkpoint_interval``
+    is set, a passive WAL checkpoint is run on release at most once per
+    interval so the WAL file doesn't grow unbounded between auto-checkpoints.
+    """
+
+    def __init__(self, database, size=10, timeout=5.0, pragmas=None, checkpoint_interval=None):
+        self.database = database
+        self.size = size
+        self.timeout = timeout
+        self.pragmas = pragmas or {}
+        self.checkpoint_interval = checkpoint_interval
+        self._last_checkpoint = time.monotonic()
+        self._idle = queue.LifoQueue(maxsize=size)
+        self._lock = threading.Lock()
+        self._created = 0
+        self._in_use = 0
+        self._stats = {
+            'acquired': 0,
+            'hits': 0,
+            'misses': 0,
+            'waits': 0,
+            'wait_time_ms': 0.0,
+            'timeouts': 0,
+            'checkpoints': 0
+        }
+
+    def _connect(self):
+        conn = sqlite3.connect(self.database, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        apply_pragmas(conn, self.pragmas)
+        return conn
+
+    def _checkpoint_due(self):
+        if not self.checkpoint_interval:
+            return False
+        with self._lock:
+            now = time.monotonic()
+            if now - self._last_checkpoint < self.checkpoint_interval:
+                return False
+            self._last_checkpoint = now
+            return True
+
+    def checkpoint(self, conn, mode='PASSIVE'):
+        busy, log_pages, checkpointed = conn.execute(f'PRAGMA wal_checkpoint({mode})').fetchone()
+        with self._lock:
+            self._stats['checkpoints'] += 1
+        return {'busy': busy, 'log_pages': log_pages, 'checkpointed_pages': checkpointed}
+
+    def acquire(self):
+        # Fast path: reuse an idle connection
+        try:
+            conn = self._idle.get_nowait()
+            with self._lock:
+                self._stats['hits'] += 1
+                self._stats['acquired'] += 1
+                self._in_use += 1
+            return conn
+        except queue.Empty:
+            pass
+        
+        # Open a new connection if the pool has not reached its size yet
+        with self._lock:
+            can_create = self._created < self.size
+            if can_create:
+                self._created += 1
+        if can_create:
+            try:
+                conn = self._connect()
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+            with self._lock:
+                self._stats['misses'] += 1
+                self._stats['acquired'] += 1
+                self._in_use += 1
+            return conn
+        
+        # Pool exhausted: wait for a connection to be released
+        started = time.monotonic()
+        try:
+            conn = self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            with self._lock:
+                self._stats['timeouts'] += 1
+            raise RuntimeError('Database is busy, please try again')
+        with self._lock:
+            self._stats['waits'] += 1
+            self._stats['wait_time_ms'] += (time.monotonic() - started) * 1000
+            self._stats['acquired'] += 1
+            self._in_use += 1
+        return conn
+
+    def release(self, conn):
+        # Never hand out a connection with a half-finished transaction
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+            if self._checkpoint_due():
+                self.checkpoint(conn)
+        except sqlite3.Error:
+            conn.close()
+            with self._lock:
+                self._created -= 1
+                self._in_use -= 1
+            return
+        
+        with self._lock:
+            self._in_use -= 1
+        self._idle.put(conn)
+
+    def metrics(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['size'] = self.size
+            stats['open'] = self._created
+            stats['in_use'] = self._in_use
+        stats['idle'] = self._idle.qsize()
+        stats['wait_time_ms'] = round(stats['wait_time_ms'], 2)
+        stats['hit_ratio'] = round(stats['hits'] / stats['acquired'], 4) if stats['acquired'] else None
+        return stats
+
+db_pool = ConnectionPool(
+    app.config['DATABASE'],
+    size=app.config['DB_POOL_SIZE'],
+    timeout=app.config['DB_POOL_TIMEOUT'],
+    pragmas=app.config['DB_PRAGMAS'],
+    checkpoint_interval=app.config['DB_CHECKPOINT_INTERVAL']
+)
+
 def get_db():
-    conn = sqlite3.connect('skill_swap.db')
-    conn.row_factory = sqlite3.Row
-    return conn
+    """Return the pooled connection bound to the current app context"""
+    if 'db' not in g:
+        g.db = db_pool.acquire()
+    return g.db
+
+@app.teardown_appcontext
+def release_db(exception=None):
+    conn = g.pop('db', None)
+    if conn is not None:
+        db_pool.release(conn)
+
+# Refuse oversized bodies from the Content-Length header alone, before any
+# handler starts reading them
+@app.before_request
+def reject_oversized_body():
+    max_length = app.config['MAX_CONTENT_LENGTH']
+    if max_length and request.content_length and request.content_length > max_length:
+        return jsonify({'error': 'Request body is too large'}), 413
+
+# In-process caches
+class TTLCache:
+    """Small thread-safe LRU cache whose entries expire after ``ttl`` seconds"""
+
+    def __init__(self, ttl, maxsize=1024):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def get_or_set(self, key, compute):
+        missing = object()
+        value = self.get(key, missing)
+        if value is missing:
+            value = compute()
+            self.set(key, value)
+        return value
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def metrics(self):
+        with self._lock:
+            size = len(self._data)
+        lookups = self.hits + self.misses
+        return {
+            'size': size,
+            'maxsize': self.maxsize,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': round(self.hits / lookups, 4) if lookups else None
+        }
+
+# Pagination totals for cursor-mode listings, served slightly stale
+count_cache = TTLCache(ttl=app.config['COUNT_CACHE_TTL'])
+
+class TableVersions:
+    """Per-table write counters used to invalidate cached aggregates.
+
+    A cached value is stored under a key that includes the versions of the
+    tables it was computed from, so bumping a table after a committed write
+    makes every dependent entry unreachable at once. Counters are
+    per-process; with several workers the cache TTL bounds staleness.
+    """
+
+    def __init__(self):
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    def get(self, tables):
+        with self._lock:
+            return tuple(self._versions.get(table, 0) for table in tables)
+
+    def bump(self, *tables):
+        with self._lock:
+            for table in tables:
+                self._versions[table] = self._versions.get(table, 0) + 1
+
+table_versions = TableVersions()
+
+# Admin dashboard panels, keyed on the versions of the tables they read
+admin_stats_cache = TTLCache(ttl=app.config['ADMIN_STATS_CACHE_TTL'], maxsize=64)
+
+# Real-time events
+class EventBroker:
+    """In-process pub/sub used to push events to connected clients.
+
+    Subscribers are keyed by user id and each gets its own bounded queue. If
+    a slow client lets its queue fill up, further events for it are dropped
+    and counted; the client resynchronises by refetching on reconnect.
+    Anything with the same ``subscribe``/``unsubscribe``/``publish`` methods
+    can be installed as ``app.extensions['event_broker']`` instead, e.g. a
+    recording stand-in in tests or a broker shared between workers.
+    """
+
+    def __init__(self, max_queue=100):
+        self.max_queue = max_queue
+        self._subscribers = {}
+        self._lock = threading.Lock()
+        self._next_id = 0
+        self.dropped = 0
+
+    def subscribe(self, user_id):
+        subscriber = queue.Queue(maxsize=self.max_queue)
+        with self._lock:
+            self._subscribers.setdefault(user_id, set()).add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, user_id, subscriber):
+        with self._lock:
+            subscribers = self._subscribers.get(user_id)
+            if subscribers:
+                subscribers.discard(subscriber)
+                if not subscribers:
+                    del self._subscribers[user_id]
+
+    def publish(self, user_id, event, data):
+        with self._lock:
+            self._next_id += 1
+            event_id = self._next_id
+            subscribers = list(self._subscribers.get(user_id, ()))
+        for subscriber in subscribers:
+            try:
+                subscriber.put_nowait((event_id, event, data))
+            except queue.Full:
+                with self._lock:
+                    self.dropped += 1
+        return event_id
+
+    def metrics(self):
+        with self._lock:
+            return {
+                'users': len(self._subscribers),
+                'subscribers': sum(len(subscribers) for subscribers in self._subscribers.values()),
+                'published': self._next_id,
+                'dropped': self.dropped
+            }
+
+app.extensions['event_broker'] = EventBroker()
+
+# Helper function to push an event to one or more users. Call it only after
+# the write it describes has been committed.
+def publish_event(user_ids, event, data):
+    if not isinstance(user_ids, (list, tuple, set)):
+        user_ids = [user_ids]
+    broker = app.extensions['event_broker']
+    for user_id in set(int(user_id) for user_id in user_ids):
+        broker.publish(user_id, event, data)
+
+class ChangeVersions:
+    """Wake-up signal for long-polling requests parked in this process.
+
+    The versions that make up the ETags live in the change_versions table.
+    These in-memory counters only let a parked request return as soon as a
+    write in the same process commits; writes handled by other workers are
+    picked up by re-reading the table every LONG_POLL_CHECK_INTERVAL seconds.
+    """
+
+    def __init__(self):
+        self._versions = {}
+        self._changed = threading.Condition()
+
+    def get(self, scope, user_id):
+        with self._changed:
+            return self._versions.get((scope, user_id), 0)
+
+    def bump(self, scope, user_ids):
+        with self._changed:
+            for user_id in user_ids:
+                key = (scope, int(user_id))
+                self._versions[key] = self._versions.get(key, 0) + 1
+            self._changed.notify_all()
+
+    def wait(self, scope, user_id, version, timeout):
+        """Block until the counter moves past ``version`` or ``timeout`` elapses"""
+        deadline = time.monotonic() + timeout
+        with self._changed:
+            while self._versions.get((scope, user_id), 0) == version:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._changed.wait(remaining)
+            return self._versions.get((scope, user_id), 0)
+
+change_versions = ChangeVersions()
+
+# Helper function to wake this process's long-polls after a chat or
+# notification write. Call it only after the write has been committed.
+def bump_versions(scope, user_ids):
+    if not isinstance(user_ids, (list, tuple, set)):
+        user_ids = [user_ids]
+    change_versions.bump(scope, user_ids)
+
+# Helper function to read a user's stored change version. Uses a short-lived
+# pooled connection so a parked long-poll does not hold one while it waits.
+def read_change_version(scope, user_id):
+    conn = db_pool.acquire()
+    try:
+        row = conn.execute('SELECT version FROM change_versions WHERE scope = ? AND user_id = ?',
+                           (scope, user_id)).fetchone()
+    finally:
+        db_pool.release(conn)
+    return row['version'] if row else 0
+
+# Helper function for the polled unread-count endpoints. Returns 304 when the
+# client's If-None-Match is still current; with ?wait=<seconds> it parks the
+# request until the count may have changed before answering.
+def conditional_count_response(scope, user_id, compute_count):
+    user_id = int(user_id)
+    local_version = change_versions.get(scope, user_id)
+    etag = f'{scope}-{user_id}-{read_change_version(scope, user_id)}'
+    
+    wait = min(request.args.get('wait', 0, type=float), app.config['LONG_POLL_MAX_WAIT'])
+    deadline = time.monotonic() + wait
+    while etag in request.if_none_match:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        local_version = change_versions.wait(
+            scope, user_id, local_version, min(remaining, app.config['LONG_POLL_CHECK_INTERVAL']))
+        etag = f'{scope}-{user_id}-{read_change_version(scope, user_id)}'
+    
+    if etag in request.if_none_match:
+        response = app.response_class(status=304)
+    else:
+        response = jsonify({'unread_count': compute_count()})
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+# Background jobs
+class BackgroundRunner:
+    """Runs persisted jobs on a lazily started thread pool.
+
+    Subclasses set ``table`` (a jobs table with ``id`` and ``status``
+    columns), implement ``run(job_id)`` and may extend ``reset_columns``,
+    the columns cleared when an interrupted job is re-queued.
+    """
+
+    table = None
+    reset_columns = {'started_at': None}
+
+    def __init__(self, workers=2, name='worker'):
+        self.workers = workers
+        self.name = name
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers,
+                                                    thread_name_prefix=self.name)
+            return self._executor
+
+    def submit(self, job_id):
+        self._get_executor().submit(self.run, job_id)
+
+    def run(self, job_id):
+        raise NotImplementedError
+
+    def recover(self):
+        """Re-queue jobs left unfinished by a previous process"""
+        assignments = ', '.join(f'{column} = ?' for column in self.reset_columns)
+        conn = db_pool.acquire()
+        try:
+            conn.execute(f"""
+                UPDATE {self.table} SET status = 'queued', {assignments}
+                WHERE status = 'running'
+            """, list(self.reset_columns.values()))
+            conn.commit()
+            job_ids = [row['id'] for row in conn.execute(
+                f"SELECT id FROM {self.table} WHERE status = 'queued' ORDER BY id"
+            ).fetchall()]
+        finally:
+            db_pool.release(conn)
+        for job_id in job_ids:
+            self.submit(job_id)
+        return job_ids
+
+# Helper function to insert a notification row. Returns the payload to
+# publish once the surrounding transaction commits.
+def create_notification(conn, user_id, title, message, notification_type='info'):
+    cursor = conn.execute('''
+        INSERT INTO notifications (user_id, title, message, type, is_read)
+        VALUES (?, ?, ?, ?, ?)
+    ''', (user_id, title, message, notification_type, 0))
+    return {
+        'id': cursor.lastrowid,
+        'user_id': user_id,
+        'title': title,
+        'message': message,
+        'type': notification_type,
+        'is_read': 0
+    }
+
+# Helper function to insert many notifications with one executemany. Each
+# item is (user_id, title, message, type). The caller must already hold the
+# write lock (e.g. BEGIN IMMEDIATE) so the id range read back is ours alone.
+# Returns the payloads to publish once the transaction commits.
+def create_notifications(conn, items):
+    if not items:
+        return []
+    last_id = conn.execute('SELECT COALESCE(MAX(id), 0) FROM notifications').fetchone()[0]
+    conn.executemany('''
+        INSERT INTO notifications (user_id, title, message, type, is_read)
+        VALUES (?, ?, ?, ?, 0)
+    ''', items)
+    rows = conn.execute('SELECT id FROM notifications WHERE id > ? ORDER BY id', (last_id,)).fetchall()
+    return [{
+        'id': row['id'],
+        'user_id': user_id,
+        'title': title,
+        'message': message,
+        'type': notification_type,
+        'is_read': 0
+    } for row, (user_id, title, message, notification_type) in zip(rows, items)]
+
+# Helper function to publish notification payloads and bump the recipients'
+# notification versions. Call it only after the write has been committed.
+def publish_notifications(notifications):
+    for notification in notifications:
+        publish_event(notification['user_id'], 'notification', notification)
+    bump_versions('notifications', {notification['user_id'] for notification in notifications})
+
+# Helper function to apply deltas to a user's materialised counters, e.g.
+# adjust_user_stats(conn, user_id, rating_sum=5, rating_count=1). Runs in the
+# caller's transaction so the counters commit together with the write.
+def adjust_user_stats(conn, user_id, **deltas):
+    columns = [column for column in USER_STATS_COLUMNS if deltas.get(column)]
+    if not columns:
+        return
+    conn.execute(f'''
+        INSERT INTO user_stats (user_id, {', '.join(columns)}) VALUES (?, {', '.join('?' * len(columns))})
+        ON CONFLICT (user_id) DO UPDATE SET
+            {', '.join(f'{column} = {column} + excluded.{column}' for column in columns)},
+            updated_at = CURRENT_TIMESTAMP
+    ''', [int(user_id)] + [deltas[column] for column in columns])
+
+# Helper function to count a skill row in (delta=1) or out (delta=-1) of its
+# owner's skill counters
+def adjust_skill_stats(conn, skill, delta):
+    if skill['is_rejected']:
+        return
+    column = f"{skill['skill_type']}_skills" if skill['is_approved'] else 'pending_skills'
+    adjust_user_stats(conn, skill['user_id'], **{column: delta})
+
+# Helper function to add approved skills to the match index, refreshing any
+# existing entries. Runs in the caller's transaction like adjust_user_stats.
+def index_skills(conn, skills):
+    entries = [(skill['id'], normalize_skill_name(skill['skill_name']), skill['user_id'], skill['skill_type'])
+               for skill in skills]
+    conn.executemany('''
+        INSERT OR REPLACE INTO skill_index (skill_id, term, user_id, skill_type) VALUES (?, ?, ?, ?)
+    ''', [entry for entry in entries if entry[1]])
+
+# Helper function to drop skills from the match index
+def unindex_skills(conn, skill_ids):
+    conn.executemany('DELETE FROM skill_index WHERE skill_id = ?', [(skill_id,) for skill_id in skill_ids])
+
+# Helper function to refresh a user's match profile after their location or
+# availability changed. Runs in the caller's transaction like index_skills.
+def index_match_profile(conn, user_id):
+    user = conn.execute('''
+        SELECT location, availability, availability_days, availability_start_time, availability_end_time
+        FROM users WHERE id = ?
+    ''', (user_id,)).fetchone()
+    conn.execute('''
+        INSERT OR REPLACE INTO match_profiles (user_id, day_mask, day_count, window_start, window_end, location_key)
+        VALUES (?, ?, ?, ?, ?, ?)
+    ''', (user_id,) + match_profile(user))
+
+# Helper function to read a user's counters, with zeros for users who have none yet
+def get_user_stats(conn, user_id):
+    row = conn.execute('SELECT * FROM user_stats WHERE user_id = ?', (user_id,)).fetchone()
+    stats = {column: row[column] if row else 0 for column in USER_STATS_COLUMNS}
+    stats['avg_rating'] = stats['rating_sum'] / stats['rating_count'] if stats['rating_count'] else None
+    return stats
+
+# Account flags of the signed-in user, cached briefly so that per-request
+# role and supervision checks do not each cost a query
+user_status_cache = TTLCache(ttl=app.config['USER_STATUS_CACHE_TTL'], maxsize=4096)
+USER_STATUS_COLUMNS = ('is_admin', 'is_banned', 'is_under_supervision')
+
+# Helper function to read a user's account flags through the cache.
+# Returns None for unknown users.
+def get_user_status(user_id):
+    def load():
+        row = get_db().execute(
+            f"SELECT {', '.join(USER_STATUS_COLUMNS)} FROM users WHERE id = ?", (user_id,)
+        ).fetchone()
+        return dict(row) if row else None
+    return user_status_cache.get_or_set(int(user_id), load)
+
+# Helper function to cache the flags of a users row that was read anyway
+def prime_user_status(user):
+    user_status_cache.set(user['id'], {column: user[column] for column in USER_STATUS_COLUMNS})
+
+# Helper function to drop cached flags after an account is changed
+def invalidate_user_status(*user_ids):
+    for user_id in user_ids:
+        user_status_cache.delete(int(user_id))
+
+def admin_required(fn):
+    """Require a valid token belonging to an active admin.
+
+    Tokens carry an ``is_admin`` claim, so non-admins are turned away without
+    touching the database. Admin tokens are still confirmed against the cached
+    account flags, which lets a ban take effect immediately.
+    """
+    @wraps(fn)
+    @jwt_required()
+    def wrapper(*args, **kwargs):
+        if get_jwt().get('is_admin') is False:
+            return jsonify({'error': 'Admin access required'}), 403
+        status = get_user_status(get_jwt_identity())
+        if not status or not status['is_admin'] or status['is_banned']:
+            return jsonify({'error': 'Admin access required'}), 403
+        return fn(*args, **kwargs)
+    return wrapper
 
 # Authentication endpoints
 @app.route('/api/auth/register', methods=['POST'])
@@ -255,11 +1387,12 @@ def register():
         ''', (email, password_hash, name, location))
         
         user_id = cursor.lastrowid
+        index_match_profile(conn, user_id)
         conn.commit()
-        conn.close()
+        table_versions.bump('users')
         
         # Create access token
-        access_token = create_access_token(identity=str(user_id))
+        access_token = create_access_token(identity=str(user_id), additional_claims={'is_admin': False})
         
         return jsonify({
             'message': 'Registration successful',
@@ -290,13 +1423,17 @@ def login():
         
         conn = get_db()
         user = conn.execute('SELECT * FROM users WHERE email = ?', (email,)).fetchone()
-        conn.close()
         
         if user and check_password_hash(user['password_hash'], password):
+            prime_user_status(user)
             if user['is_banned']:
                 return jsonify({'error': 'Your account has been banned'}), 403
             
-            access_token = create_access_token(identity=str(user['id']))
+            access_token = create_access_token(identity=str(user['id']),
+                                               additional_claims={'is_admin': bool(user['is_admin'])})
+            
+            conn.execute('UPDATE users SET last_login = CURRENT_TIMESTAMP WHERE id = ?', (user['id'],))
+            conn.commit()
             
             return jsonify({
                 'message': 'Login successful',
@@ -307,6 +1444,7 @@ def login():
                     'name': user['name'],
                     'location': user['location'],
                     'profile_photo': user['profile_photo'],
+                    'profile_photo_urls': photo_urls(user['profile_photo']),
                     'bio': user['bio'],
                     'availability': user['availability'],
                     'is_admin': bool(user['is_admin']),
@@ -327,7 +1465,6 @@ def get_current_user():
         user_id = int(get_jwt_identity())
         conn = get_db()
         user = conn.execute('SELECT * FROM users WHERE id = ?', (user_id,)).fetchone()
-        conn.close()
         
         if not user:
             return jsonify({'error': 'User not found'}), 404
@@ -339,6 +1476,7 @@ def get_current_user():
                 'name': user['name'],
                 'location': user['location'],
                 'profile_photo': user['profile_photo'],
+                'profile_photo_urls': photo_urls(user['profile_photo']),
                 'bio': user['bio'],
                 'availability': user['availability'],
                 'is_admin': bool(user['is_admin']),
@@ -350,12 +1488,132 @@ def get_current_user():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+# Helper function to check whether a table (or virtual table) exists
+def table_exists(conn, name):
+    return conn.execute('SELECT 1 FROM sqlite_master WHERE name = ?', (name,)).fetchone() is not None
+
+# Helper function to build a text search over skills. Returns (sql, params)
+# for a subquery yielding (skill_id, score) rows, lower score = better match.
+# Tries a BM25-ranked word-prefix match first, then a trigram substring match,
+# and only scans skills with LIKE when neither index can answer the query.
+def skill_match_subquery(conn, q, columns=('skill_name', 'description', 'user_name')):
+    needle = q.strip()
+    terms = re.findall(r'\w+', needle.lower())
+    
+    if terms and table_exists(conn, 'skills_fts'):
+        prefix_query = ' '.join(f'"{term}"*' for term in terms)
+        match = f'{{{" ".join(columns)}}} : ({prefix_query})'
+        if conn.execute('SELECT 1 FROM skills_fts WHERE skills_fts MATCH ? LIMIT 1', (match,)).fetchone():
+            return '''
+                SELECT rowid AS skill_id, bm25(skills_fts, 10.0, 1.0, 2.0) AS score
+                FROM skills_fts WHERE skills_fts MATCH ?
+            ''', [match]
+    
+    trigram_columns = [column for column in columns if column in ('skill_name', 'user_name')]
+    if len(needle) >= 3 and trigram_columns and table_exists(conn, 'skills_trigram'):
+        phrase = '"' + needle.replace('"', '""') + '"'
+        match = f'{{{" ".join(trigram_columns)}}} : {phrase}'
+        return '''
+            SELECT rowid AS skill_id, bm25(skills_trigram) AS score
+            FROM skills_trigram WHERE skills_trigram MATCH ?
+        ''', [match]
+    
+    return 'SELECT id AS skill_id, 0 AS score FROM skills WHERE skill_name LIKE ?', [f'%{needle}%']
+
+# Helper functions for keyset (cursor) pagination. A cursor is an opaque
+# token holding the sort key of the last row on the previous page.
+def encode_cursor(values):
+    return base64.urlsafe_b64encode(json.dumps(values).encode('utf-8')).decode('ascii').rstrip('=')
+
+def decode_cursor(token, size):
+    try:
+        values = json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+    except (ValueError, TypeError):
+        raise ValueError('Invalid cursor')
+    if not isinstance(values, list) or len(values) != size:
+        raise ValueError('Invalid cursor')
+    return values
+
+def keyset_condition(order_keys, values):
+    """Build the WHERE clause that seeks past ``values`` in ``order_keys`` order.
+
+    ``order_keys`` is a list of ``(column, 'ASC'|'DESC')``; the last key must
+    be unique so the seek never skips or repeats rows.
+    """
+    clauses = []
+    params = []
+    for i, (column, direction) in enumerate(order_keys):
+        parts = [f'{prev_column} = ?' for prev_column, _ in order_keys[:i]]
+        parts.append(f"{column} {'>' if direction == 'ASC' else '<'} ?")
+        clauses.append('(' + ' AND '.join(parts) + ')')
+        params.extend(values[:i + 1])
+    return '(' + ' OR '.join(clauses) + ')', params
+
+def order_by_clause(order_keys):
+    return ', '.join(f'{column} {direction}' for column, direction in order_keys)
+
+# Helper function to read page/per_page query args, clamping per_page so a
+# single request can't ask for an unbounded page
+def get_pagination_args(default_per_page):
+    page = max(request.args.get('page', 1, type=int), 1)
+    per_page = request.args.get('per_page', default_per_page, type=int)
+    per_page = min(max(per_page, 1), app.config['MAX_PER_PAGE'])
+    return page, per_page
+
+# Helper function to turn a search term into a case-insensitive prefix LIKE
+# pattern (use with ESCAPE '\'). Prefix patterns can use NOCASE indexes.
+def like_prefix(term):
+    return re.sub(r'([\\%_])', r'\\\1', term) + '%'
+
+# Helper function to read ?sort= and ?order= against a whitelist mapping sort
+# names to columns. The unique ``id_column`` is appended as a tie-breaker so
+# pages are stable.
+def get_sort_args(sortable, default_sort, id_column='id'):
+    sort = request.args.get('sort', default_sort)
+    if sort not in sortable:
+        raise ValueError(f"Invalid sort. Choose one of: {', '.join(sortable)}")
+    order = request.args.get('order', 'desc').lower()
+    if order not in ('asc', 'desc'):
+        raise ValueError('Invalid order. Choose asc or desc')
+    return [(sortable[sort], order.upper()), (id_column, order.upper())]
+
+# Helper function for the admin list endpoints: fetch one page of rows plus
+# the pagination block. The window count returns the total in the same query.
+def fetch_page(conn, columns, from_clause, where, params, order_keys, page, per_page):
+    rows = conn.execute(f'''
+        SELECT {columns}, COUNT(*) OVER () AS total_count FROM {from_clause}
+        WHERE {where}
+        ORDER BY {order_by_clause(order_keys)} LIMIT ? OFFSET ?
+    ''', params + [per_page, (page - 1) * per_page]).fetchall()
+    
+    if rows:
+        total = rows[0]['total_count']
+    else:
+        total = conn.execute(f'SELECT COUNT(*) FROM {from_clause} WHERE {where}', params).fetchone()[0]
+    total_pages = (total + per_page - 1) // per_page
+    
+    items = []
+    for row in rows:
+        item = convert_row_datetimes(row)
+        del item['total_count']
+        items.append(item)
+    
+    return items, {
+        'page': page,
+        'pages': total_pages,
+        'per_page': per_page,
+        'total': total,
+        'has_prev': page > 1,
+        'has_next': page < total_pages
+    }
+
 # User endpoints
 @app.route('/api/users', methods=['GET'])
 def get_users():
     try:
-        page = request.args.get('page', 1, type=int)
-        per_page = request.args.get('per_page', 6, type=int)
+        page, per_page = get_pagination_args(6)
+        cursor = request.args.get('cursor')
+        include_total = request.args.get('include_total', '') in ('1', 'true')
         availability = request.args.get('availability', '')
         q = request.args.get('q', '')
         
@@ -368,77 +1626,126 @@ def get_users():
         
         conn = get_db()
         
-        # Build user query with filters
-        user_query = '''SELECT * FROM users WHERE is_public = 1 AND is_banned = 0 AND is_admin = 0'''
+        # Build user filters. With a search term the matched ids drive the
+        # lookup; the unary + stops SQLite walking every non-admin user
+        # through idx_users_admin_created instead
+        admin_filter = '+is_admin = 0' if q else 'is_admin = 0'
+        where = f'is_public = 1 AND is_banned = 0 AND {admin_filter}'
         params = []
         
         if availability == 'available':
-            user_query += ' AND availability IS NOT NULL AND availability != ""'
+            where += ' AND availability IS NOT NULL AND availability != ""'
         elif availability == 'unavailable':
-            user_query += ' AND (availability IS NULL OR availability = "")'
+            where += ' AND (availability IS NULL OR availability = "")'
         
         if q:
-            user_query += ' AND (name LIKE ? OR id IN (SELECT user_id FROM skills WHERE skill_name LIKE ? AND is_rejected = 0))'
-            params.extend([f'%{q}%', f'%{q}%'])
+            # Names match by prefix on idx_users_name_nocase, or word by word
+            # through the user_name column of the skill search index
+            match_query, match_params = skill_match_subquery(conn, q, columns=('skill_name', 'user_name'))
+            where += f''' AND id IN (
+                SELECT id FROM users WHERE name LIKE ? ESCAPE '\\'
+                UNION
+                SELECT s.user_id FROM skills s JOIN ({match_query}) m ON m.skill_id = s.id
+                WHERE s.is_rejected = 0
+            )'''
+            params.extend([like_prefix(q.strip())] + match_params)
         
         # Exclude current user if logged in
         if current_user_id:
-            user_query += ' AND id != ?'
+            where += ' AND id != ?'
             params.append(current_user_id)
         
-        user_query += ' ORDER BY is_under_supervision ASC, created_at DESC LIMIT ? OFFSET ?'
-        params.extend([per_page, (page - 1) * per_page])
-        
-        users = conn.execute(user_query, params).fetchall()
-        
-        # Get total count for pagination
-        count_query = '''SELECT COUNT(*) as count FROM users WHERE is_public = 1 AND is_banned = 0 AND is_admin = 0'''
-        count_params = []
-        
-        if availability == 'available':
-            count_query += ' AND availability IS NOT NULL AND availability != ""'
-        elif availability == 'unavailable':
-            count_query += ' AND (availability IS NULL OR availability = "")'
-        
-        if q:
-            count_query += ' AND (name LIKE ? OR id IN (SELECT user_id FROM skills WHERE skill_name LIKE ? AND is_rejected = 0))'
-            count_params.extend([f'%{q}%', f'%{q}%'])
-        
-        if current_user_id:
-            count_query += ' AND id != ?'
-            count_params.append(current_user_id)
+        order_keys = [('is_under_supervision', 'ASC'), ('created_at', 'DESC'), ('id', 'DESC')]
+        count_query = f'SELECT COUNT(*) as count FROM users WHERE {where}'
+        
+        if cursor is not None:
+            # Keyset mode: seek past the previous page instead of using OFFSET
+            page_where = where
+            page_params = list(params)
+            if cursor:
+                seek, seek_params = keyset_condition(order_keys, decode_cursor(cursor, len(order_keys)))
+                page_where += f' AND {seek}'
+                page_params.extend(seek_params)
+            
+            users = conn.execute(f'''
+                SELECT * FROM users WHERE {page_where}
+                ORDER BY {order_by_clause(order_keys)} LIMIT ?
+            ''', page_params + [per_page + 1]).fetchall()
+            has_next = len(users) > per_page
+            users = users[:per_page]
+            
+            pagination = {
+                'per_page': per_page,
+                'next_cursor': encode_cursor([users[-1][column] for column, _ in order_keys]) if has_next else None,
+                'has_next': has_next
+            }
+            if include_total:
+                pagination['total'] = count_cache.get_or_set(
+                    (count_query, tuple(params)),
+                    lambda: conn.execute(count_query, params).fetchone()['count']
+                )
+        else:
+            # The window count gives the pagination total in the same query
+            users = conn.execute(f'''
+                SELECT *, COUNT(*) OVER () AS total_count FROM users WHERE {where}
+                ORDER BY {order_by_clause(order_keys)} LIMIT ? OFFSET ?
+            ''', params + [per_page, (page - 1) * per_page]).fetchall()
+            
+            if users:
+                total = users[0]['total_count']
+            else:
+                # Past the last page there are no rows to carry the count
+                total = conn.execute(count_query, params).fetchone()['count']
+            total_pages = (total + per_page - 1) // per_page
+            
+            pagination = {
+                'page': page,
+                'pages': total_pages,
+                'per_page': per_page,
+                'total': total,
+                'has_prev': page > 1,
+                'has_next': page < total_pages
+            }
         
-        total = conn.execute(count_query, count_params).fetchone()['count']
-        total_pages = (total + per_page - 1) // per_page
+        # Fetch skills and ratings for the whole page in one query each
+        user_ids = [user['id'] for user in users]
+        offered_skills = {user_id: [] for user_id in user_ids}
+        wanted_skills = {user_id: [] for user_id in user_ids}
+        ratings = {}
+        
+        if user_ids:
+            placeholders = ','.join('?' * len(user_ids))
+            skills = conn.execute(f'''
+                SELECT user_id, skill_type, skill_name FROM skills
+                WHERE user_id IN ({placeholders}) AND is_approved = 1 AND is_rejected = 0
+                ORDER BY id
+            ''', user_ids).fetchall()
+            for skill in skills:
+                if skill['skill_type'] == 'offered':
+                    offered_skills[skill['user_id']].append(skill['skill_name'])
+                elif skill['skill_type'] == 'wanted':
+                    wanted_skills[skill['user_id']].append(skill['skill_name'])
+            
+            rating_rows = conn.execute(f'''
+                SELECT user_id, rating_sum * 1.0 / rating_count as avg_rating, rating_count as total_ratings
+                FROM user_stats WHERE user_id IN ({placeholders}) AND rating_count > 0
+            ''', user_ids).fetchall()
+            ratings = {row['user_id']: row for row in rating_rows}
         
-        # For each user, get their skills and ratings
         user_profiles = []
         for user in users:
             user_id = user['id']
-            offered_skills = conn.execute('''
-                SELECT skill_name FROM skills 
-                WHERE user_id = ? AND skill_type = 'offered' AND is_approved = 1 AND is_rejected = 0
-            ''', (user_id,)).fetchall()
-            
-            wanted_skills = conn.execute('''
-                SELECT skill_name FROM skills 
-                WHERE user_id = ? AND skill_type = 'wanted' AND is_approved = 1 AND is_rejected = 0
-            ''', (user_id,)).fetchall()
-            
-            rating_data = conn.execute('''
-                SELECT AVG(rating) as avg_rating, COUNT(*) as total_ratings 
-                FROM ratings WHERE rated_id = ?
-            ''', (user_id,)).fetchone()
-            
-            avg_rating = rating_data['avg_rating']
-            total_ratings = rating_data['total_ratings']
+            rating_data = ratings.get(user_id)
+            avg_rating = rating_data['avg_rating'] if rating_data else None
+            total_ratings = rating_data['total_ratings'] if rating_data else 0
             
             user_profiles.append({
                 'id': user['id'],
                 'name': user['name'],
                 'profile_photo': user['profile_photo'],
-                'offered_skills': [s['skill_name'] for s in offered_skills],
-                'wanted_skills': [s['skill_name'] for s in wanted_skills],
+                'profile_photo_urls': photo_urls(user['profile_photo']),
+                'offered_skills': offered_skills[user_id],
+                'wanted_skills': wanted_skills[user_id],
                 'rating': round(avg_rating, 1) if avg_rating else None,
                 'total_ratings': total_ratings,
                 'availability': user['availability'],
@@ -447,20 +1754,13 @@ def get_users():
                 'is_under_supervision': bool(user['is_under_supervision'])
             })
         
-        conn.close()
-        
         return jsonify({
             'users': user_profiles,
-            'pagination': {
-                'page': page,
-                'pages': total_pages,
-                'per_page': per_page,
-                'total': total,
-                'has_prev': page > 1,
-                'has_next': page < total_pages
-            }
+            'pagination': pagination
         }), 200
         
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -486,16 +1786,7 @@ def get_user_profile(user_id):
         ''', (user_id,)).fetchall()
         
         # Get user stats
-        completed_swaps = conn.execute('''
-            SELECT COUNT(*) as count FROM swap_requests 
-            WHERE (requester_id = ? OR provider_id = ?) AND status = 'accepted'
-        ''', (user_id, user_id)).fetchone()['count']
-        
-        # Get average rating
-        avg_rating = conn.execute('''
-            SELECT AVG(rating) as avg_rating, COUNT(*) as total_ratings
-            FROM ratings WHERE rated_id = ?
-        ''', (user_id,)).fetchone()
+        user_stats = get_user_stats(conn, user_id)
         
         # Get recent reviews
         recent_reviews = conn.execute('''
@@ -507,13 +1798,13 @@ def get_user_profile(user_id):
             LIMIT 5
         ''', (user_id,)).fetchall()
         
-        conn.close()
         
         return jsonify({
             'user': {
                 'id': user['id'],
                 'name': user['name'],
                 'profile_photo': user['profile_photo'],
+                'profile_photo_urls': photo_urls(user['profile_photo']),
                 'bio': user['bio'],
                 'location': user['location'],
                 'availability': user['availability'],
@@ -524,10 +1815,10 @@ def get_user_profile(user_id):
             'stats': {
                 'offered_skills': len(offered_skills),
                 'wanted_skills': len(wanted_skills),
-                'completed_swaps': completed_swaps,
-                'avg_rating': avg_rating['avg_rating'] or 0,
-                'total_ratings': avg_rating['total_ratings'] or 0,
-                'has_rating': avg_rating['total_ratings'] > 0
+                'completed_swaps': user_stats['completed_swaps'],
+                'avg_rating': user_stats['avg_rating'] or 0,
+                'total_ratings': user_stats['rating_count'],
+                'has_rating': user_stats['rating_count'] > 0
             },
             'recent_reviews': [dict(review) for review in recent_reviews]
         }), 200
@@ -543,45 +1834,346 @@ def search_skills():
         user_id = int(get_jwt_identity())
         query = request.args.get('q', '')
         skill_type = request.args.get('skill_type', '')
-        page = request.args.get('page', 1, type=int)
-        per_page = request.args.get('per_page', 12, type=int)
+        page, per_page = get_pagination_args(12)
+        cursor = request.args.get('cursor')
+        include_total = request.args.get('include_total', '') in ('1', 'true')
         
         conn = get_db()
         
         base_query = '''
-            SELECT s.*, u.name as user_name, u.location, u.is_under_supervision
+            SELECT s.*, u.name as user_name, u.location, u.is_under_supervision{score_column}
             FROM skills s
             JOIN users u ON s.user_id = u.id
-            WHERE s.skill_type = 'offered' 
-            AND u.is_public = 1 AND u.is_banned = 0 AND u.id != ?
-            AND s.is_approved = 1 AND s.is_rejected = 0
         '''
         
-        params = [user_id]
+        params = []
+        order_keys = [('u.is_under_supervision', 'ASC'), ('s.created_at', 'DESC'), ('s.id', 'DESC')]
+        score_column = ''
         
+        # Restrict to matching skills via the search index, best matches first
         if query:
-            base_query += ' AND s.skill_name LIKE ?'
-            params.append(f'%{query}%')
+            match_query, match_params = skill_match_subquery(conn, query)
+            base_query += f' JOIN ({match_query}) m ON m.skill_id = s.id'
+            params.extend(match_params)
+            order_keys.insert(1, ('m.score', 'ASC'))
+            score_column = ', m.score AS match_score'
+        
+        base_query += '''
+            WHERE s.skill_type = 'offered' 
+            AND u.is_public = 1 AND u.is_banned = 0 AND u.id != ?
+            AND s.is_approved = 1 AND s.is_rejected = 0
+        '''
+        params.append(user_id)
         
         if skill_type:
             base_query += ' AND s.skill_type = ?'
             params.append(skill_type)
         
-        # Get total count
-        count_query = f'SELECT COUNT(*) as count FROM ({base_query})'
-        total = conn.execute(count_query, params).fetchone()['count']
+        count_query = f"SELECT COUNT(*) as count FROM ({base_query.format(score_column='')})"
+        
+        if cursor is not None:
+            # Keyset mode: seek past the previous page instead of using OFFSET
+            page_query = base_query.format(score_column=score_column)
+            page_params = list(params)
+            if cursor:
+                seek, seek_params = keyset_condition(order_keys, decode_cursor(cursor, len(order_keys)))
+                page_query += f' AND {seek}'
+                page_params.extend(seek_params)
+            page_query += f' ORDER BY {order_by_clause(order_keys)} LIMIT ?'
+            
+            results = conn.execute(page_query, page_params + [per_page + 1]).fetchall()
+            has_next = len(results) > per_page
+            results = results[:per_page]
+            
+            next_cursor = None
+            if has_next:
+                last = results[-1]
+                next_cursor = encode_cursor([
+                    last['match_score'] if column == 'm.score' else last[column.split('.')[1]]
+                    for column, _ in order_keys
+                ])
+            
+            pagination = {
+                'per_page': per_page,
+                'next_cursor': next_cursor,
+                'has_next': has_next
+            }
+            if include_total:
+                pagination['total'] = count_cache.get_or_set(
+                    (count_query, tuple(params)),
+                    lambda: conn.execute(count_query, params).fetchone()['count']
+                )
+        else:
+            # Get total count
+            total = conn.execute(count_query, params).fetchone()['count']
+            
+            # Add pagination
+            page_query = base_query.format(score_column='')
+            page_query += f' ORDER BY {order_by_clause(order_keys)} LIMIT ? OFFSET ?'
+            
+            results = conn.execute(page_query, params + [per_page, (page - 1) * per_page]).fetchall()
+            
+            total_pages = (total + per_page - 1) // per_page
+            
+            pagination = {
+                'page': page,
+                'pages': total_pages,
+                'per_page': per_page,
+                'total': total,
+                'has_prev': page > 1,
+                'has_next': page < total_pages
+            }
+        
+        skills = []
+        for row in results:
+            skill = dict(row)
+            skill.pop('match_score', None)
+            skills.append(skill)
+        
+        return jsonify({
+            'skills': skills,
+            'pagination': pagination
+        }), 200
+        
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+# Skill matching. MATCH_SIGNALS are the keys of app.config['MATCH_WEIGHTS'].
+MATCH_SIGNALS = ('skills', 'rating', 'availability', 'location')
+DAY_NAMES = ('monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday')
+DAY_GROUPS = {
+    'weekdays': DAY_NAMES[:5],
+    'weekends': DAY_NAMES[5:],
+    'weekend': DAY_NAMES[5:],
+    'daily': DAY_NAMES,
+    'everyday': DAY_NAMES,
+    'anytime': DAY_NAMES
+}
+TIME_PATTERN = re.compile(r'\b(\d{1,2}):(\d{2})\s*([ap]m)?', re.IGNORECASE)
+
+# Helper function to turn an 'HH:MM' time into minutes since midnight, or
+# None if it is not a valid time
+def parse_clock(value):
+    try:
+        parsed = datetime.strptime((value or '').strip(), '%H:%M')
+    except ValueError:
+        return None
+    return parsed.hour * 60 + parsed.minute
+
+# Helper function to read a user's availability as (days, (start, end)), with
+# times in minutes since midnight or None when unknown. Prefers the structured
+# fields from the profile form and falls back to the free-text availability,
+# e.g. "Monday to Wednesday 10:00 AM to 6:00 PM" or "Weekends".
+def availability_window(user):
+    text = (user['availability'] or '').lower()
+    
+    days = set(day for day in (user['availability_days'] or '').split(',') if day in DAY_NAMES)
+    if not days:
+        words = re.findall(r'[a-z]+', text)
+        for index, word in enumerate(words):
+            if word in DAY_GROUPS:
+                days.update(DAY_GROUPS[word])
+            elif word in DAY_NAMES:
+                days.add(word)
+                # "monday to wednesday" / "monday through wednesday"
+                if index + 2 < len(words) and words[index + 1] in ('to', 'through', 'till', 'until') \
+                        and words[index + 2] in DAY_NAMES:
+                    first, last = DAY_NAMES.index(word), DAY_NAMES.index(words[index + 2])
+                    if first <= last:
+                        days.update(DAY_NAMES[first:last + 1])
+    
+    times = []
+    if user['availability_start_time'] and user['availability_end_time']:
+        times = [parse_clock(user['availability_start_time']), parse_clock(user['availability_end_time'])]
+        if None in times:
+            times = []
+    else:
+        for hours, minutes, meridiem in TIME_PATTERN.findall(text)[:2]:
+            hours = int(hours) % 12 + (12 if meridiem.lower() == 'pm' else 0) if meridiem else int(hours)
+            if hours > 23 or int(minutes) > 59:
+                break
+            times.append(hours * 60 + int(minutes))
+    
+    window = (times[0], times[1]) if len(times) == 2 and times[0] < times[1] else None
+    return days, window
+
+# Helper function to split a free-text location into lower-case words
+def location_words(location):
+    return re.findall(r'\w+', (location or '').lower())
+
+# Helper function to reduce a user's availability and location to the stored
+# match profile: (day_mask, day_count, window_start, window_end, location_key).
+# The location key is the words padded with spaces, so a shared word can be
+# found with instr().
+def match_profile(user):
+    days, window = availability_window(user)
+    day_mask = sum(1 << DAY_NAMES.index(day) for day in days)
+    words = location_words(user['location'])
+    return (day_mask, len(days), window[0] if window else None, window[1] if window else None,
+            f" {' '.join(words)} " if words else '')
+
+# Helper function for the SQL scoring how well a candidate's availability
+# (match_profiles p) lines up with ``mine`` from availability_window(): 0 for
+# no shared days or unknown, 1 when one schedule fits inside the other.
+# Shared days are weighted by how much of the shorter daily window overlaps.
+def availability_overlap_sql(mine):
+    days, window = mine
+    if not days:
+        return '0.0', []
+    shared = ' + '.join(f'((p.day_mask >> {DAY_NAMES.index(day)}) & 1)' for day in sorted(days))
+    score = f'({shared}) * 1.0 / MIN(?, p.day_count)'
+    params = [len(days)]
+    if window:
+        score += ''' * CASE WHEN p.window_start IS NULL THEN 1.0 ELSE
+            MAX(MIN(?, p.window_end) - MAX(?, p.window_start), 0) * 1.0 / MIN(?, p.window_end - p.window_start) END'''
+        params.extend([window[1], window[0], window[1] - window[0]])
+    return f'CASE WHEN p.day_count > 0 THEN {score} ELSE 0.0 END', params
+
+# Helper function for the SQL scoring a candidate's location against mine: 1
+# for the same place, 0.5 when they share a word (same city, different area),
+# otherwise 0
+def location_similarity_sql(location):
+    words = location_words(location)
+    if not words:
+        return '0.0', []
+    shared = ' OR '.join('instr(p.location_key, ?) > 0' for _ in set(words))
+    return (f'CASE WHEN p.location_key = ? THEN 1.0 WHEN {shared} THEN 0.5 ELSE 0.0 END',
+            [f" {' '.join(words)} "] + [f' {word} ' for word in sorted(set(words))])
+
+@app.route('/api/matches', methods=['GET'])
+@jwt_required()
+def get_matches():
+    """Users whose approved skills complement the current user's: they offer
+    something you want and want something you offer. Ranked by how many of
+    your skills they cover, their rating, availability overlap and location."""
+    try:
+        user_id = int(get_jwt_identity())
+        page, per_page = get_pagination_args(10)
+        conn = get_db()
         
-        # Add pagination
-        base_query += ' ORDER BY u.is_under_supervision ASC, s.created_at DESC LIMIT ? OFFSET ?'
-        params.extend([per_page, (page - 1) * per_page])
+        me = conn.execute('''
+            SELECT location, availability, availability_days, availability_start_time, availability_end_time
+            FROM users WHERE id = ?
+        ''', (user_id,)).fetchone()
+        if not me:
+            return jsonify({'error': 'User not found'}), 404
         
-        results = conn.execute(base_query, params).fetchall()
-        conn.close()
+        my_terms = {'offered': set(), 'wanted': set()}
+        for row in conn.execute('SELECT skill_type, term FROM skill_index WHERE user_id = ?', (user_id,)).fetchall():
+            my_terms[row['skill_type']].add(row['term'])
+        
+        # Walk the index from each of my terms to the users holding the same
+        # term on the other side, counting what they offer that I want and
+        # what they want that I offer. Only reciprocal pairs make a swap, and
+        # users under supervision cannot receive swap requests.
+        candidates_query = '''
+            SELECT theirs.user_id,
+                   COUNT(DISTINCT CASE WHEN theirs.skill_type = 'offered' THEN theirs.term END) AS offered_terms,
+                   COUNT(DISTINCT CASE WHEN theirs.skill_type = 'wanted' THEN theirs.term END) AS wanted_terms
+            FROM skill_index mine
+            JOIN skill_index theirs ON theirs.term = mine.term
+                AND theirs.skill_type = CASE mine.skill_type WHEN 'offered' THEN 'wanted' ELSE 'offered' END
+            JOIN users u ON u.id = theirs.user_id
+            WHERE mine.user_id = ? AND theirs.user_id != ?
+              AND u.is_public = 1 AND u.is_banned = 0 AND u.is_admin = 0 AND u.is_under_supervision = 0
+            GROUP BY theirs.user_id
+            HAVING offered_terms > 0 AND wanted_terms > 0
+        '''
         
+        page_items = []
+        total = 0
+        if my_terms['offered'] and my_terms['wanted']:
+            weights = app.config['MATCH_WEIGHTS']
+            prior, prior_weight = app.config['MATCH_RATING_PRIOR'], app.config['MATCH_RATING_PRIOR_WEIGHT']
+            availability_sql, availability_params = availability_overlap_sql(availability_window(me))
+            location_sql, location_params = location_similarity_sql(me['location'])
+            
+            # Each signal is scored from the stored counters and match profile,
+            # so ranking and paging happen in the query. The rating is smoothed
+            # towards MATCH_RATING_PRIOR as if MATCH_RATING_PRIOR_WEIGHT extra
+            # reviews existed, so one five-star review does not outrank a long
+            # track record. Only the page's rows are joined back to users.
+            page_items = conn.execute(f'''
+                WITH candidates AS ({candidates_query}),
+                breakdown AS (
+                    SELECT c.user_id,
+                           (c.offered_terms * 1.0 / ? + c.wanted_terms * 1.0 / ?) / 2 AS skills,
+                           (COALESCE(st.rating_sum, 0) + ?) * 1.0 / (COALESCE(st.rating_count, 0) + ?) / 5 AS rating,
+                           {availability_sql} AS availability,
+                           {location_sql} AS location
+                    FROM candidates c
+                    LEFT JOIN user_stats st ON st.user_id = c.user_id
+                    LEFT JOIN match_profiles p ON p.user_id = c.user_id
+                ),
+                ranked AS (
+                    SELECT *, ? * skills + ? * rating + ? * availability + ? * location AS score,
+                           COUNT(*) OVER () AS total_count
+                    FROM breakdown
+                    ORDER BY score DESC, user_id
+                    LIMIT ? OFFSET ?
+                )
+                SELECT r.*, u.name, u.profile_photo, u.bio, u.location AS user_location, u.availability AS user_availability,
+                       COALESCE(st.rating_sum, 0) AS rating_sum,
+                       COALESCE(st.rating_count, 0) AS rating_count,
+                       COALESCE(st.completed_swaps, 0) AS completed_swaps
+                FROM ranked r
+                JOIN users u ON u.id = r.user_id
+                LEFT JOIN user_stats st ON st.user_id = r.user_id
+                ORDER BY r.score DESC, r.user_id
+            ''', [user_id, user_id, len(my_terms['wanted']), len(my_terms['offered']), prior * prior_weight, prior_weight]
+                + availability_params + location_params
+                + [weights[signal] for signal in MATCH_SIGNALS] + [per_page, (page - 1) * per_page]).fetchall()
+            
+            if page_items:
+                total = page_items[0]['total_count']
+            else:
+                # Past the last page there are no rows to carry the count
+                total = conn.execute(f'SELECT COUNT(*) AS count FROM ({candidates_query})',
+                                     (user_id, user_id)).fetchone()['count']
         total_pages = (total + per_page - 1) // per_page
         
+        # Skill names are only needed for the users on this page
+        skill_names = {candidate['user_id']: {'offered': {}, 'wanted': {}} for candidate in page_items}
+        if skill_names:
+            page_ids = list(skill_names)
+            for row in conn.execute(f'''
+                SELECT theirs.user_id, theirs.skill_type, theirs.term, s.skill_name
+                FROM skill_index mine
+                JOIN skill_index theirs ON theirs.term = mine.term
+                    AND theirs.skill_type = CASE mine.skill_type WHEN 'offered' THEN 'wanted' ELSE 'offered' END
+                JOIN skills s ON s.id = theirs.skill_id
+                WHERE mine.user_id = ? AND theirs.user_id IN ({','.join('?' * len(page_ids))})
+                ORDER BY theirs.skill_id
+            ''', [user_id] + page_ids).fetchall():
+                skill_names[row['user_id']][row['skill_type']].setdefault(row['term'], row['skill_name'])
+        
+        matches = []
+        for candidate in page_items:
+            names = skill_names[candidate['user_id']]
+            rating_count = candidate['rating_count']
+            matches.append({
+                'user': {
+                    'id': candidate['user_id'],
+                    'name': candidate['name'],
+                    'profile_photo': candidate['profile_photo'],
+                    'profile_photo_urls': photo_urls(candidate['profile_photo']),
+                    'bio': candidate['bio'],
+                    'location': candidate['user_location'],
+                    'availability': candidate['user_availability'],
+                    'rating': round(candidate['rating_sum'] / rating_count, 1) if rating_count else None,
+                    'total_ratings': rating_count,
+                    'completed_swaps': candidate['completed_swaps']
+                },
+                'they_offer': list(names['offered'].values()),
+                'they_want': list(names['wanted'].values()),
+                'score': round(candidate['score'], 4),
+                'score_breakdown': {signal: round(candidate[signal], 4) for signal in MATCH_SIGNALS}
+            })
+        
         return jsonify({
-            'skills': [dict(skill) for skill in results],
+            'matches': matches,
             'pagination': {
                 'page': page,
                 'pages': total_pages,
@@ -616,7 +2208,6 @@ def get_user_skills():
             SELECT * FROM skills WHERE user_id = ? AND is_rejected = 1 ORDER BY rejected_at DESC
         ''', (user_id,)).fetchall()
         
-        conn.close()
         
         return jsonify({
             'offered_skills': [dict(skill) for skill in offered_skills],
@@ -636,8 +2227,8 @@ def add_skill():
         
         # Check if user is under supervision
         conn = get_db()
-        user = conn.execute('SELECT is_under_supervision FROM users WHERE id = ?', (user_id,)).fetchone()
-        if user and user['is_under_supervision']:
+        status = get_user_status(user_id)
+        if status and status['is_under_supervision']:
             return jsonify({'error': 'You are currently under supervision and cannot add new skills'}), 403
         
         skill_name = data.get('skill_name', '').strip()
@@ -651,8 +2242,9 @@ def add_skill():
             INSERT INTO skills (user_id, skill_name, skill_type, description, is_approved)
             VALUES (?, ?, ?, ?, 0)
         ''', (user_id, skill_name, skill_type, description))
+        adjust_user_stats(conn, user_id, pending_skills=1)
         conn.commit()
-        conn.close()
+        table_versions.bump('skills')
         
         return jsonify({'message': 'Skill submitted for review'}), 201
         
@@ -673,13 +2265,15 @@ def delete_skill(skill_id):
         
         # Check if user is under supervision (only for non-rejected skills)
         if not skill['is_rejected']:
-            user = conn.execute('SELECT is_under_supervision FROM users WHERE id = ?', (user_id,)).fetchone()
-            if user and user['is_under_supervision']:
+            status = get_user_status(user_id)
+            if status and status['is_under_supervision']:
                 return jsonify({'error': 'You are currently under supervision and cannot delete skills'}), 403
         
         conn.execute('DELETE FROM skills WHERE id = ?', (skill_id,))
+        adjust_skill_stats(conn, skill, -1)
+        unindex_skills(conn, [skill_id])
         conn.commit()
-        conn.close()
+        table_versions.bump('skills')
         
         return jsonify({'message': 'Skill deleted successfully'}), 200
         
@@ -716,7 +2310,6 @@ def get_swap_requests():
             ORDER BY sr.created_at DESC
         ''', (user_id,)).fetchall()
         
-        conn.close()
         
         # Combine all requests
         all_requests = list(sent_requests) + list(received_requests)
@@ -744,7 +2337,6 @@ def get_announcements():
             ORDER BY created_at DESC LIMIT 10 OFFSET 1
         ''').fetchall()
         
-        conn.close()
         
         return jsonify({
             'latest': dict(latest_announcement) if latest_announcement else None,
@@ -773,6 +2365,10 @@ def update_profile():
         start_time = data.get('start_time', '').strip()
         end_time = data.get('end_time', '').strip()
         
+        for value in (start_time, end_time):
+            if value and parse_clock(value) is None:
+                return jsonify({'error': 'Times must be in HH:MM format'}), 400
+        
         # Format availability string if days are provided
         if availability_days:
             day_order = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
@@ -808,11 +2404,12 @@ def update_profile():
                            availability_days = ?, availability_start_time = ?, availability_end_time = ?
             WHERE id = ?
         ''', (name, location, bio, availability, is_public, availability_days_str, start_time, end_time, user_id))
+        index_match_profile(conn, user_id)
         conn.commit()
+        table_versions.bump('users')
         
         # Get updated user data
         user = conn.execute('SELECT * FROM users WHERE id = ?', (user_id,)).fetchone()
-        conn.close()
         
         return jsonify({
             'message': 'Profile updated successfully',
@@ -822,6 +2419,7 @@ def update_profile():
                 'name': user['name'],
                 'location': user['location'],
                 'profile_photo': user['profile_photo'],
+                'profile_photo_urls': photo_urls(user['profile_photo']),
                 'bio': user['bio'],
                 'availability': user['availability'],
                 'availability_days': (user['availability_days'] or '').split(',') if 'availability_days' in user.keys() and user['availability_days'] else [],
@@ -837,58 +2435,456 @@ def update_profile():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+# Upload storage
+class BlobStorage:
+    """Keeps uploaded files as blobs under flat keys (their file names).
+
+    Reading a missing key raises FileNotFoundError; deleting one is a no-op.
+    """
+
+    def put(self, key, data, content_type=None):
+        raise NotImplementedError
+
+    def read(self, key):
+        raise NotImplementedError
+
+    def exists(self, key):
+        raise NotImplementedError
+
+    def delete(self, key):
+        raise NotImplementedError
+
+    def local_path(self, key):
+        """Path of the blob on this machine's disk, or None if it is stored remotely"""
+        return None
+
+    def open(self, key, byte_range=None):
+        """Start a streamed read of a remote blob, optionally of a 'bytes=...'
+        range. Returns a dict with 'chunks' (an iterator to close when done),
+        'length', 'etag' and, for ranges, 'content_range'. Raises
+        ValueError for a range that cannot be satisfied."""
+        raise NotImplementedError
+
+    def presigned_url(self, key, expires, cache_control=None):
+        """Time-limited URL clients can fetch the blob from directly"""
+        raise NotImplementedError
+
+class LocalStorage(BlobStorage):
+    """Blobs in a local directory, fanned out into ``depth`` levels of up to
+    256 subdirectories chosen from a hash of the key, so that no directory
+    ends up holding millions of files. Files that older versions stored
+    directly in ``folder`` are still found."""
+
+    def __init__(self, folder, depth=2):
+        self.folder = os.path.abspath(folder)
+        self.depth = depth
+
+    def _path(self, key):
+        digest = hashlib.md5(key.encode()).hexdigest()
+        return os.path.join(self.folder, *[digest[i * 2:i * 2 + 2] for i in range(self.depth)], key)
+
+    def local_path(self, key):
+        for path in (self._path(key), os.path.join(self.folder, key)):
+            if os.path.isfile(path):
+                return path
+        raise FileNotFoundError(key)
+
+    def put(self, key, data, content_type=None):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write under a temporary name first so that nobody is ever served a
+        # partial file under a name that is cached as immutable
+        temp_path = f'{path}.{threading.get_ident()}.part'
+        with open(temp_path, 'wb') as f:
+            f.write(data)
+        os.replace(temp_path, path)
+
+    def read(self, key):
+        with open(self.local_path(key), 'rb') as f:
+            return f.read()
+
+    def exists(self, key):
+        try:
+            self.local_path(key)
+            return True
+        except FileNotFoundError:
+            return False
+
+    def delete(self, key):
+        for path in (self._path(key), os.path.join(self.folder, key)):
+            if os.path.isfile(path):
+                os.remove(path)
+
+class S3Storage(BlobStorage):
+    """Blobs in an S3-compatible bucket: AWS S3, MinIO, Ceph, or a local
+    stand-in such as ``moto_server`` for development and tests. Requires
+    boto3; credentials come from the usual ``AWS_*`` environment variables."""
+
+    def __init__(self, bucket, prefix='', endpoint_url=None, region=None):
+        import boto3
+        from botocore.exceptions import ClientError
+        self.bucket = bucket
+        self.prefix = prefix
+        self._client = boto3.client('s3', endpoint_url=endpoint_url, region_name=region)
+        self._client_error = ClientError
+
+    def _is_missing(self, error):
+        return error.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound')
+
+    def put(self, key, data, content_type=None):
+        extra = {'ContentType': content_type} if content_type else {}
+        self._client.put_object(Bucket=self.bucket, Key=self.prefix + key, Body=data, **extra)
+
+    def read(self, key):
+        try:
+            return self._client.get_object(Bucket=self.bucket, Key=self.prefix + key)['Body'].read()
+        except self._client_error as e:
+            if self._is_missing(e):
+                raise FileNotFoundError(key)
+            raise
+
+    def exists(self, key):
+        try:
+            self._client.head_object(Bucket=self.bucket, Key=self.prefix + key)
+            return True
+        except self._client_error as e:
+            if self._is_missing(e):
+                return False
+            raise
+
+    def delete(self, key):
+        self._client.delete_object(Bucket=self.bucket, Key=self.prefix + key)
+
+    def open(self, key, byte_range=None):
+        extra = {'Range': byte_range} if byte_range else {}
+        try:
+            obj = self._client.get_object(Bucket=self.bucket, Key=self.prefix + key, **extra)
+        except self._client_error as e:
+            if self._is_missing(e):
+                raise FileNotFoundError(key)
+            if e.response.get('Error', {}).get('Code') == 'InvalidRange':
+                raise ValueError('Requested range not satisfiable')
+            raise
+        
+        def chunks(body=obj['Body']):
+            try:
+                yield from body.iter_chunks(64 * 1024)
+            finally:
+                body.close()
+        
+        return {
+            'chunks': chunks(),
+            'length': obj['ContentLength'],
+            'etag': obj['ETag'].strip('"'),
+            'content_range': obj.get('ContentRange')
+        }
+
+    def presigned_url(self, key, expires, cache_control=None):
+        params = {'Bucket': self.bucket, 'Key': self.prefix + key}
+        if cache_control:
+            params['ResponseCacheControl'] = cache_control
+        return self._client.generate_presigned_url('get_object', Params=params, ExpiresIn=expires)
+
+def create_upload_storage(config):
+    backend = config['UPLOAD_STORAGE']
+    if backend == 'local':
+        return LocalStorage(config['UPLOAD_FOLDER'], config['UPLOAD_SHARD_DEPTH'])
+    if backend == 's3':
+        return S3Storage(config['S3_BUCKET'], config['S3_PREFIX'],
+                         config['S3_ENDPOINT_URL'] or None, config['S3_REGION'] or None)
+    raise ValueError(f'Unknown upload storage: {backend}')
+
+upload_storage = create_upload_storage(app.config)
+
+# Profile photo processing
+class PhotoProcessor:
+    """Validates uploaded photos and renders them on a small worker pool.
+
+    Decoding and resizing a multi-megapixel photo is CPU heavy, so it runs on
+    a bounded pool instead of on every request thread that happens to be
+    uploading. Each photo is re-encoded, which drops EXIF, GPS and any other
+    embedded metadata, and a square thumbnail is cut for every size in
+    ``sizes``.
+
+    Photos are named after a hash of their encoded bytes, so a stored file
+    never changes and can be cached indefinitely. Identical uploads share one
+    file, which is why replaced photos go through ``remove_unused_later()``.
+    """
+
+    def __init__(self, storage, sizes, max_dimension, max_pixels, quality=80, workers=2):
+        self.storage = storage
+        self.sizes = tuple(sizes)
+        self.max_dimension = max_dimension
+        self.max_pixels = max_pixels
+        self.quality = quality
+        self.workers = workers
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='photo')
+            return self._executor
+
+    def process(self, data):
+        """Render uploaded bytes as a WebP photo plus thumbnails and return its filename"""
+        return self._get_executor().submit(self._process, data).result()
+
+    def render_thumbnails(self, filename):
+        """Cut any missing thumbnails for an already stored photo"""
+        return self._get_executor().submit(self._render_thumbnails, filename).result()
+
+    def remove(self, filename):
+        for key in [filename] + [thumbnail_name(filename, size) for size in self.sizes]:
+            self.storage.delete(key)
+
+    def remove_unused_later(self, filename):
+        """Delete a replaced photo in the background unless a user still shows it"""
+        self._get_executor().submit(self._remove_unused, filename)
+
+    def _remove_unused(self, filename):
+        try:
+            conn = db_pool.acquire()
+            try:
+                in_use = photo_in_use(conn, filename)
+            finally:
+                db_pool.release(conn)
+            if not in_use:
+                self.remove(filename)
+        except Exception:
+            app.logger.exception('Could not delete photo %s', filename)
+
+    def _open(self, source):
+        try:
+            with Image.open(source) as probe:
+                if probe.width * probe.height > self.max_pixels:
+                    raise ValueError('Image dimensions are too large')
+                probe.verify()
+            source.seek(0)
+            image = Image.open(source)
+            image.load()
+        except (OSError, SyntaxError, Image.DecompressionBombError):
+            raise ValueError('Please upload a valid image file')
+        
+        # Apply the camera orientation before the EXIF block is dropped
+        image = ImageOps.exif_transpose(image)
+        image = image.convert('RGBA' if image.mode in ('RGBA', 'LA', 'PA') or 'transparency' in image.info else 'RGB')
+        image.info.clear()
+        return image
+
+    def _encode(self, image):
+        buffer = io.BytesIO()
+        image.save(buffer, 'WEBP', quality=self.quality, method=4)
+        return buffer.getvalue()
+
+    def _process(self, data):
+        image = self._open(io.BytesIO(data))
+        image.thumbnail((self.max_dimension, self.max_dimension), Image.LANCZOS)
+        encoded = self._encode(image)
+        filename = f'{hashlib.sha256(encoded).hexdigest()[:32]}.webp'
+        # Keys this call created. Files that already existed belong to
+        # another user with the same photo and must survive a failure here.
+        written = []
+        try:
+            if not self.storage.exists(filename):
+                self.storage.put(filename, encoded, 'image/webp')
+                written.append(filename)
+            self._render_thumbnails(filename, image, written)
+        except Exception:
+            for key in written:
+                self.storage.delete(key)
+            raise
+        return filename
+
+    def _render_thumbnails(self, filename, image=None, written=None):
+        missing = [size for size in self.sizes if not self.storage.exists(thumbnail_name(filename, size))]
+        if missing and image is None:
+            image = self._open(io.BytesIO(self.storage.read(filename)))
+        for size in missing:
+            thumbnail = self._encode(ImageOps.fit(image, (size, size), Image.LANCZOS))
+            self.storage.put(thumbnail_name(filename, size), thumbnail, 'image/webp')
+            if written is not None:
+                written.append(thumbnail_name(filename, size))
+        return len(missing)
+
+photo_processor = PhotoProcessor(
+    upload_storage, app.config['PHOTO_THUMBNAIL_SIZES'], app.config['PHOTO_MAX_DIMENSION'],
+    app.config['PHOTO_MAX_PIXELS'], app.config['PHOTO_QUALITY'], app.config['PHOTO_WORKERS']
+)
+
+# Leading bytes of the image formats accepted for profile photos
+# (WebP has a variable field, so it is checked separately)
+IMAGE_SIGNATURES = (
+    (b'\xff\xd8\xff', 'image/jpeg'),
+    (b'\x89PNG\r\n\x1a\n', 'image/png'),
+    (b'GIF87a', 'image/gif'),
+    (b'GIF89a', 'image/gif')
+)
+
+# Helper function to identify a supported image from its first bytes.
+# Returns the MIME type, or None for anything else.
+def sniff_image_type(header):
+    if header[:4] == b'RIFF' and header[8:12] == b'WEBP':
+        return 'image/webp'
+    for signature, mimetype in IMAGE_SIGNATURES:
+        if header.startswith(signature):
+            return mimetype
+    return None
+
+# Helper function to phrase the photo size limit for error messages
+def photo_too_large_message(limit):
+    return f'Photos can be at most {limit / (1024 * 1024):g} MB'
+
+class PhotoUploadBuffer(io.BytesIO):
+    """In-memory sink for a photo streamed out of a multipart body.
+
+    Werkzeug's form parser writes the file part into it chunk by chunk. The
+    upload is refused as soon as it grows past ``limit`` or as soon as its
+    first bytes show it is not a supported image, so the rest of an oversized
+    or bogus body is never read.
+    """
+
+    SNIFF_BYTES = 12
+
+    def __init__(self, limit):
+        super().__init__()
+        self.limit = limit
+        self.mimetype = None
+
+    def write(self, data):
+        if self.tell() + len(data) > self.limit:
+            raise RequestEntityTooLarge(photo_too_large_message(self.limit))
+        written = super().write(data)
+        if self.mimetype is None and self.tell() >= self.SNIFF_BYTES:
+            self.mimetype = sniff_image_type(self.getbuffer()[:self.SNIFF_BYTES].tobytes())
+            if self.mimetype is None:
+                raise UnsupportedMediaType('Please upload a JPEG, PNG, GIF or WebP image')
+        return written
+
+class UploadMetrics:
+    """Per-user upload counters over a sliding window of ``window`` seconds.
+
+    Counts are kept in one-minute buckets, so memory per user stays bounded
+    however fast they upload.
+    """
+
+    def __init__(self, window=3600):
+        self.window = window
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def record(self, user_id, size, accepted):
+        minute = int(time.time() // 60)
+        with self._lock:
+            buckets = self._buckets.setdefault(user_id, {})
+            bucket = buckets.setdefault(minute, [0, 0, 0])
+            bucket[0 if accepted else 1] += 1
+            bucket[2] += size
+            self._expire(buckets, minute)
+
+    def _expire(self, buckets, minute):
+        oldest = minute - self.window // 60
+        for key in [key for key in buckets if key <= oldest]:
+            del buckets[key]
+
+    def snapshot(self, limit=50):
+        minute = int(time.time() // 60)
+        users = []
+        with self._lock:
+            for user_id, buckets in list(self._buckets.items()):
+                self._expire(buckets, minute)
+                if not buckets:
+                    del self._buckets[user_id]
+                    continue
+                users.append({
+                    'user_id': user_id,
+                    'uploads': sum(bucket[0] for bucket in buckets.values()),
+                    'rejected': sum(bucket[1] for bucket in buckets.values()),
+                    'bytes': sum(bucket[2] for bucket in buckets.values()),
+                    'last_minute_uploads': sum(buckets.get(minute, [0, 0])[:2])
+                })
+        users.sort(key=lambda user: (user['uploads'] + user['rejected'], user['bytes']), reverse=True)
+        return {
+            'window_seconds': self.window,
+            'totals': {field: sum(user[field] for user in users) for field in ('uploads', 'rejected', 'bytes')},
+            'users': users[:limit]
+        }
+
+upload_metrics = UploadMetrics(app.config['UPLOAD_METRICS_WINDOW'])
+
+# Helper function to check whether any user still shows a stored photo
+def photo_in_use(conn, photo):
+    return conn.execute('SELECT 1 FROM users WHERE profile_photo = ? LIMIT 1', (photo,)).fetchone() is not None
+
 # Profile photo upload endpoint
 @app.route('/api/profile/photo', methods=['POST'])
 @jwt_required()
 def upload_profile_photo():
     try:
         user_id = int(get_jwt_identity())
+        limit = app.config['PHOTO_MAX_BYTES']
+        overhead = app.config['UPLOAD_FORM_OVERHEAD']
+        accepted = False
         
-        if 'profile_photo' not in request.files:
-            return jsonify({'error': 'No file provided'}), 400
-        
-        file = request.files['profile_photo']
-        
-        if file.filename == '':
-            return jsonify({'error': 'No file selected'}), 400
-        
-        # Check if file is an image
-        if not file.content_type or not file.content_type.startswith('image/'):
-            return jsonify({'error': 'Please upload a valid image file'}), 400
-        
-        # Generate secure filename
-        filename = secure_filename(file.filename)
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        filename = f"{timestamp}_{filename}"
-        
-        # Save file
-        file_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        file.save(file_path)
+        try:
+            # Refuse a declared body that cannot fit before reading any of it
+            if request.content_length and request.content_length > limit + overhead:
+                raise RequestEntityTooLarge(photo_too_large_message(limit))
+            
+            # Stream the file part into a capped buffer that checks the
+            # image signature as the first chunk arrives
+            _, _, files = parse_form_data(
+                request.environ,
+                stream_factory=lambda *args, **kwargs: PhotoUploadBuffer(limit),
+                max_content_length=limit + overhead,
+                silent=False
+            )
+            
+            if 'profile_photo' not in files:
+                return jsonify({'error': 'No file provided'}), 400
+            
+            file = files['profile_photo']
+            
+            if file.filename == '':
+                return jsonify({'error': 'No file selected'}), 400
+            
+            # Check if file is an image
+            if file.stream.mimetype is None:
+                return jsonify({'error': 'Please upload a valid image file'}), 400
+            
+            # Validate, strip metadata and write the photo and its thumbnails
+            # under a content-derived filename
+            filename = photo_processor.process(file.stream.getvalue())
+            accepted = True
+        finally:
+            upload_metrics.record(user_id, request.content_length or 0, accepted)
         
         # Update user profile
         conn = get_db()
         
         # Get current photo to delete old one
         old_photo = conn.execute('SELECT profile_photo FROM users WHERE id = ?', (user_id,)).fetchone()
-        if old_photo and old_photo['profile_photo']:
-            old_file_path = os.path.join(app.config['UPLOAD_FOLDER'], old_photo['profile_photo'])
-            if os.path.exists(old_file_path):
-                os.remove(old_file_path)
         
         conn.execute('UPDATE users SET profile_photo = ? WHERE id = ?', (filename, user_id))
         conn.commit()
+        table_versions.bump('users')
+        
+        if old_photo and old_photo['profile_photo'] and old_photo['profile_photo'] != filename:
+            photo_processor.remove_unused_later(old_photo['profile_photo'])
         # Get updated user data
         user = conn.execute('SELECT * FROM users WHERE id = ?', (user_id,)).fetchone()
-        conn.close()
         return jsonify({
             'message': 'Profile photo updated successfully',
             'profile_photo': filename,
+            'profile_photo_urls': photo_urls(filename),
             'user': {
                 'id': user['id'],
                 'email': user['email'],
                 'name': user['name'],
                 'location': user['location'],
                 'profile_photo': user['profile_photo'],
+                'profile_photo_urls': photo_urls(user['profile_photo']),
                 'bio': user['bio'],
                 'availability': user['availability'],
                 'is_admin': bool(user['is_admin']),
@@ -897,6 +2893,10 @@ def upload_profile_photo():
             }
         }), 200
         
+    except HTTPException as e:
+        return jsonify({'error': e.description}), e.code
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -911,18 +2911,18 @@ def remove_profile_photo():
         
         # Get current photo filename
         user = conn.execute('SELECT profile_photo FROM users WHERE id = ?', (user_id,)).fetchone()
-        if user and user['profile_photo']:
-            file_path = os.path.join(app.config['UPLOAD_FOLDER'], user['profile_photo'])
-            if os.path.exists(file_path):
-                os.remove(file_path)
         
         # Set profile_photo to NULL
         conn.execute('UPDATE users SET profile_photo = NULL WHERE id = ?', (user_id,))
         conn.commit()
+        table_versions.bump('users')
+        
+        # Delete the file unless another user shows the same photo
+        if user and user['profile_photo']:
+            photo_processor.remove_unused_later(user['profile_photo'])
         
         # Get updated user data
         updated_user = conn.execute('SELECT * FROM users WHERE id = ?', (user_id,)).fetchone()
-        conn.close()
         
         return jsonify({
             'message': 'Profile photo removed successfully',
@@ -932,6 +2932,7 @@ def remove_profile_photo():
                 'name': updated_user['name'],
                 'location': updated_user['location'],
                 'profile_photo': updated_user['profile_photo'],
+                'profile_photo_urls': photo_urls(updated_user['profile_photo']),
                 'bio': updated_user['bio'],
                 'availability': updated_user['availability'],
                 'is_admin': bool(updated_user['is_admin']),
@@ -961,27 +2962,16 @@ def get_profile_stats():
             SELECT * FROM skills WHERE user_id = ? AND skill_type = 'wanted' AND is_rejected = 0
         ''', (user_id,)).fetchall()
         
-        # Get completed swaps count
-        completed_swaps = conn.execute('''
-            SELECT COUNT(*) as count FROM swap_requests 
-            WHERE (requester_id = ? OR provider_id = ?) AND status = 'accepted'
-        ''', (user_id, user_id)).fetchone()['count']
-        
-        # Get average rating
-        avg_rating = conn.execute('''
-            SELECT AVG(rating) as avg_rating, COUNT(*) as total_ratings
-            FROM ratings WHERE rated_id = ?
-        ''', (user_id,)).fetchone()
-        
-        conn.close()
+        # Get completed swaps and rating counters
+        user_stats = get_user_stats(conn, user_id)
         
         stats = {
             'offered_skills': len(offered_skills),
             'wanted_skills': len(wanted_skills),
-            'completed_swaps': completed_swaps,
-            'avg_rating': avg_rating['avg_rating'] or 0,
-            'total_ratings': avg_rating['total_ratings'] or 0,
-            'has_rating': avg_rating['total_ratings'] > 0
+            'completed_swaps': user_stats['completed_swaps'],
+            'avg_rating': user_stats['avg_rating'] or 0,
+            'total_ratings': user_stats['rating_count'],
+            'has_rating': user_stats['rating_count'] > 0
         }
         
         return jsonify({
@@ -993,115 +2983,340 @@ def get_profile_stats():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-# Serve uploaded files
+# Content-addressed photo files, optionally with a thumbnail size suffix
+CONTENT_ADDRESSED_PATTERN = re.compile(r'^([0-9a-f]{32})(?:_\d+)?\.webp$')
+
+# Helper function to set the caching headers for an upload response
+def set_upload_cache_control(response, immutable):
+    if immutable:
+        response.cache_control.no_cache = None
+        response.cache_control.public = True
+        response.cache_control.max_age = 31536000
+        response.cache_control.immutable = True
+    else:
+        response.cache_control.no_cache = True
+    return response
+
+# Helper function to serve an upload from remote storage without holding it
+# in memory: either redirect to a presigned URL, or stream the object (or
+# the requested byte range) through in chunks
+def send_remote_upload(key, mimetype, etag, immutable):
+    if app.config['S3_PRESIGNED_REDIRECT']:
+        # Checked here so that a missing thumbnail still falls back to the photo
+        if not upload_storage.exists(key):
+            raise FileNotFoundError(key)
+        expires = app.config['S3_PRESIGNED_EXPIRY']
+        cache_control = 'public, max-age=31536000, immutable' if immutable else 'no-cache'
+        response = redirect(upload_storage.presigned_url(key, expires, cache_control))
+        # The redirect may be reused only while the signature is still valid
+        response.cache_control.private = True
+        response.cache_control.max_age = expires // 2
+        return response
+    
+    # A content-addressed name is its own ETag, so revalidation needs no fetch
+    if etag and etag in request.if_none_match:
+        response = Response(status=304)
+        response.set_etag(etag)
+        return set_upload_cache_control(response, immutable)
+    
+    # If-Range cannot be checked before fetching, so such requests get the
+    # whole file, which HTTP allows
+    byte_range = request.headers.get('Range') if 'If-Range' not in request.headers else None
+    try:
+        blob = upload_storage.open(key, byte_range)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 416
+    
+    response = Response(blob['chunks'], mimetype=mimetype, direct_passthrough=True)
+    response.headers['Content-Length'] = str(blob['length'])
+    response.headers['Accept-Ranges'] = 'bytes'
+    if blob['content_range']:
+        response.status_code = 206
+        response.headers['Content-Range'] = blob['content_range']
+    response.set_etag(etag or blob['etag'])
+    response.make_conditional(request)
+    return set_upload_cache_control(response, immutable)
+
+# Helper function to send an upload, or hand it to the front-end server.
+# Conditional (If-None-Match) and Range requests are answered either way.
+def send_upload(key, immutable):
+    path = upload_storage.local_path(key)
+    mimetype = mimetypes.guess_type(key)[0] or 'application/octet-stream'
+    # A content-addressed name is the content hash, which makes a cheap strong ETag
+    etag = os.path.splitext(key)[0] if CONTENT_ADDRESSED_PATTERN.match(key) else None
+    
+    if path is None:
+        return send_remote_upload(key, mimetype, etag, immutable)
+    
+    if etag is None:
+        stat = os.stat(path)
+        etag = f'{int(stat.st_mtime)}-{stat.st_size}'
+    if app.config['UPLOADS_SENDFILE'] == 'x-accel-redirect':
+        response = Response(mimetype=mimetype)
+        relative_path = os.path.relpath(path, upload_storage.folder).replace(os.sep, '/')
+        response.headers['X-Accel-Redirect'] = app.config['UPLOADS_ACCEL_PREFIX'] + relative_path
+        response.set_etag(etag)
+        response.make_conditional(request)
+    else:
+        # With USE_X_SENDFILE set, send_file emits an X-Sendfile header
+        response = send_file(path, conditional=True, etag=etag)
+    
+    return set_upload_cache_control(response, immutable)
+
+# Serve uploaded files. ?size=N serves the square thumbnail of that size,
+# falling back to the full photo for files that have none yet.
 @app.route('/api/uploads/<filename>')
 def uploaded_file(filename):
     try:
-        return send_file(os.path.join(app.config['UPLOAD_FOLDER'], filename))
+        # A URL is immutable only if it names a content-addressed file and
+        # resolves to exactly the variant it asks for
+        immutable = CONTENT_ADDRESSED_PATTERN.match(filename) is not None
+        size = request.args.get('size', type=int)
+        if size is not None:
+            if size in app.config['PHOTO_THUMBNAIL_SIZES']:
+                try:
+                    return send_upload(thumbnail_name(filename, size), immutable)
+                except FileNotFoundError:
+                    pass
+            immutable = False
+        
+        return send_upload(filename, immutable)
     except FileNotFoundError:
         return jsonify({'error': 'File not found'}), 404
 
+# Admin dashboard panels
+def compute_admin_stats(conn):
+    return {
+        'total_users': conn.execute('SELECT COUNT(*) as count FROM users WHERE is_admin = 0').fetchone()['count'],
+        'total_skills': conn.execute('SELECT COUNT(*) as count FROM skills').fetchone()['count'],
+        'pending_swaps': conn.execute('SELECT COUNT(*) as count FROM swap_requests WHERE status = "pending"').fetchone()['count'],
+        'completed_swaps': conn.execute('SELECT COUNT(*) as count FROM swap_requests WHERE status = "completed"').fetchone()['count']
+    }
+
+def compute_recent_users(conn):
+    users = conn.execute('''
+        SELECT * FROM users 
+        WHERE is_admin = 0 
+        ORDER BY created_at DESC 
+        LIMIT 5
+    ''').fetchall()
+    return [convert_row_datetimes(user) for user in users]
+
+def compute_recent_swaps(conn):
+    swaps = conn.execute('''
+        SELECT sr.*, 
+               u1.name as requester_name, 
+               u2.name as provider_name
+        FROM swap_requests sr
+        JOIN users u1 ON sr.requester_id = u1.id
+        JOIN users u2 ON sr.provider_id = u2.id
+        ORDER BY sr.created_at DESC 
+        LIMIT 5
+    ''').fetchall()
+    return [convert_row_datetimes(swap) for swap in swaps]
+
+# Panel name -> (tables it reads, function computing it)
+ADMIN_DASHBOARD_PANELS = {
+    'stats': (('users', 'skills', 'swap_requests'), compute_admin_stats),
+    'recent_users': (('users',), compute_recent_users),
+    'recent_swaps': (('users', 'swap_requests'), compute_recent_swaps)
+}
+
+# Helper function to serve a dashboard panel from admin_stats_cache. The
+# versions are read before computing, so a write that lands mid-computation
+# still invalidates the entry.
+def get_admin_panel(conn, name):
+    tables, compute = ADMIN_DASHBOARD_PANELS[name]
+    key = (name, table_versions.get(tables))
+    return admin_stats_cache.get_or_set(key, lambda: compute(conn))
+
 # Admin API Endpoints
 @app.route('/api/admin/stats', methods=['GET'])
-@jwt_required()
+@admin_required
 def admin_stats():
     try:
-        user_id = get_jwt_identity()
         conn = get_db()
         
-        # Check if user is admin
-        user = conn.execute('SELECT is_admin FROM users WHERE id = ?', (user_id,)).fetchone()
-        if not user or not user['is_admin']:
-            return jsonify({'error': 'Admin access required'}), 403
+        return jsonify({'stats': get_admin_panel(conn, 'stats')}), 200
         
-        # Get statistics
-        total_users = conn.execute('SELECT COUNT(*) as count FROM users WHERE is_admin = 0').fetchone()['count']
-        total_skills = conn.execute('SELECT COUNT(*) as count FROM skills').fetchone()['count']
-        pending_swaps = conn.execute('SELECT COUNT(*) as count FROM swap_requests WHERE status = "pending"').fetchone()['count']
-        completed_swaps = conn.execute('SELECT COUNT(*) as count FROM swap_requests WHERE status = "completed"').fetchone()['count']
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/admin/dashboard', methods=['GET'])
+@admin_required
+def admin_dashboard():
+    """Get every admin dashboard panel in one response"""
+    try:
+        conn = get_db()
         
-        conn.close()
+        return jsonify({name: get_admin_panel(conn, name) for name in ADMIN_DASHBOARD_PANELS}), 200
         
-        return jsonify({
-            'stats': {
-                'total_users': total_users,
-                'total_skills': total_skills,
-                'pending_swaps': pending_swaps,
-                'completed_swaps': completed_swaps
-            }
-        }), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/admin/db_pool', methods=['GET'])
+@admin_required
+def admin_db_pool():
+    """Get connection pool metrics"""
+    try:
+        return jsonify({'pool': db_pool.metrics()}), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/admin/caches', methods=['GET'])
+@admin_required
+def admin_caches():
+    """Get hit/miss counters of the in-process caches"""
+    try:
+        return jsonify({'caches': {
+            'user_status': user_status_cache.metrics(),
+            'admin_stats': admin_stats_cache.metrics(),
+            'counts': count_cache.metrics()
+        }}), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/admin/upload_metrics', methods=['GET'])
+@admin_required
+def admin_upload_metrics():
+    """Get per-user photo upload counts for the last hour"""
+    try:
+        conn = get_db()
+        
+        metrics = upload_metrics.snapshot(limit=min(request.args.get('limit', 50, type=int), app.config['MAX_PER_PAGE']))
+        user_ids = [user['user_id'] for user in metrics['users']]
+        if user_ids:
+            placeholders = ','.join('?' * len(user_ids))
+            names = dict(conn.execute(f'SELECT id, name FROM users WHERE id IN ({placeholders})', user_ids).fetchall())
+            for user in metrics['users']:
+                user['name'] = names.get(user['user_id'])
+        
+        return jsonify({'uploads': metrics}), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/admin/users', methods=['GET'])
-@jwt_required()
+@admin_required
 def admin_users():
     try:
-        user_id = get_jwt_identity()
         conn = get_db()
         
-        # Check if user is admin
-        user = conn.execute('SELECT is_admin FROM users WHERE id = ?', (user_id,)).fetchone()
-        if not user or not user['is_admin']:
-            return jsonify({'error': 'Admin access required'}), 403
+        page, per_page = get_pagination_args(20)
+        order_keys = get_sort_args({'created_at': 'created_at', 'name': 'name COLLATE NOCASE',
+                                    'email': 'email COLLATE NOCASE'}, 'created_at')
+        status = request.args.get('status', '')
+        q = request.args.get('q', '').strip()
+        
+        # With a search term the unary + keeps the planner on the name/email
+        # prefix indexes rather than walking every non-admin user
+        where = '+is_admin = 0' if q else 'is_admin = 0'
+        params = []
+        if status == 'active':
+            where += ' AND is_banned = 0 AND is_under_supervision = 0'
+        elif status == 'banned':
+            where += ' AND is_banned = 1'
+        elif status == 'supervised':
+            where += ' AND is_under_supervision = 1'
+        elif status:
+            return jsonify({'error': 'Invalid status. Choose active, banned or supervised'}), 400
+        if q:
+            where += " AND (name LIKE ? ESCAPE '\\' OR email LIKE ? ESCAPE '\\')"
+            params.extend([like_prefix(q), like_prefix(q)])
         
-        # Get all non-admin users
-        users = conn.execute('SELECT * FROM users WHERE is_admin = 0 ORDER BY created_at DESC').fetchall()
-        users_list = [convert_row_datetimes(user) for user in users]
+        users, pagination = fetch_page(conn, '''
+            id, email, name, location, profile_photo, availability, bio, is_public, is_admin,
+            is_banned, is_under_supervision, created_at, last_login
+        ''', 'users', where, params, order_keys, page, per_page)
         
-        conn.close()
+        return jsonify({'users': users, 'pagination': pagination}), 200
         
-        return jsonify({'users': users_list}), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/admin/recipients', methods=['GET'])
+@admin_required
+def admin_recipients():
+    """Typeahead for the quick-message recipient picker"""
+    try:
+        conn = get_db()
+        
+        q = request.args.get('q', '').strip()
+        limit = min(max(request.args.get('limit', 10, type=int), 1), app.config['MAX_PER_PAGE'])
+        
+        where = 'is_admin = 0 AND is_banned = 0'
+        params = []
+        if q:
+            where += " AND (name LIKE ? ESCAPE '\\' OR email LIKE ? ESCAPE '\\')"
+            params.extend([like_prefix(q), like_prefix(q)])
+        
+        users = conn.execute(f'''
+            SELECT id, name, email FROM users WHERE {where}
+            ORDER BY name COLLATE NOCASE, id LIMIT ?
+        ''', params + [limit]).fetchall()
+        
+        return jsonify({'users': [dict(user) for user in users]}), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/admin/skills', methods=['GET'])
-@jwt_required()
+@admin_required
 def admin_skills():
     try:
-        user_id = get_jwt_identity()
         conn = get_db()
         
-        # Check if user is admin
-        user = conn.execute('SELECT is_admin FROM users WHERE id = ?', (user_id,)).fetchone()
-        if not user or not user['is_admin']:
-            return jsonify({'error': 'Admin access required'}), 403
-        
-        # Get all skills with user info
-        skills = conn.execute('''
-            SELECT s.*, u.name as user_name, u.email
-            FROM skills s
-            JOIN users u ON s.user_id = u.id
-            ORDER BY s.created_at DESC
-        ''').fetchall()
+        page, per_page = get_pagination_args(20)
+        order_keys = get_sort_args({'created_at': 's.created_at', 'skill_name': 's.skill_name COLLATE NOCASE'},
+                                   'created_at', id_column='s.id')
+        status = request.args.get('status', '')
+        skill_type = request.args.get('skill_type', '')
+        q = request.args.get('q', '').strip()
         
-        skills_list = [convert_row_datetimes(skill) for skill in skills]
+        from_clause = 'skills s JOIN users u ON s.user_id = u.id'
+        where = '1 = 1'
+        params = []
+        if status == 'pending':
+            where += ' AND s.is_approved = 0 AND s.is_rejected = 0'
+        elif status == 'approved':
+            where += ' AND s.is_approved = 1 AND s.is_rejected = 0'
+        elif status == 'rejected':
+            where += ' AND s.is_rejected = 1'
+        elif status:
+            return jsonify({'error': 'Invalid status. Choose pending, approved or rejected'}), 400
+        if skill_type in ('offered', 'wanted'):
+            where += ' AND s.skill_type = ?'
+            params.append(skill_type)
+        if q:
+            match_query, match_params = skill_match_subquery(conn, q)
+            where += f' AND s.id IN (SELECT skill_id FROM ({match_query}))'
+            params.extend(match_params)
         
-        conn.close()
+        skills, pagination = fetch_page(conn, 's.*, u.name as user_name, u.email', from_clause,
+                                        where, params, order_keys, page, per_page)
         
-        return jsonify({'skills': skills_list}), 200
+        return jsonify({'skills': skills, 'pagination': pagination}), 200
         
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/admin/ban_user/<int:target_user_id>', methods=['POST'])
-@jwt_required()
+@admin_required
 def admin_ban_user(target_user_id):
     try:
-        user_id = get_jwt_identity()
         conn = get_db()
         
-        # Check if user is admin
-        user = conn.execute('SELECT is_admin FROM users WHERE id = ?', (user_id,)).fetchone()
-        if not user or not user['is_admin']:
-            return jsonify({'error': 'Admin access required'}), 403
-        
         # Ban the user
         conn.execute('UPDATE users SET is_banned = 1 WHERE id = ?', (target_user_id,))
         conn.commit()
-        conn.close()
+        table_versions.bump('users')
+        invalidate_user_status(target_user_id)
         
         return jsonify({'message': 'User banned successfully'}), 200
         
@@ -1109,21 +3324,16 @@ def admin_ban_user(target_user_id):
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/admin/unban_user/<int:target_user_id>', methods=['POST'])
-@jwt_required()
+@admin_required
 def admin_unban_user(target_user_id):
     try:
-        user_id = get_jwt_identity()
         conn = get_db()
         
-        # Check if user is admin
-        user = conn.execute('SELECT is_admin FROM users WHERE id = ?', (user_id,)).fetchone()
-        if not user or not user['is_admin']:
-            return jsonify({'error': 'Admin access required'}), 403
-        
         # Unban the user
         conn.execute('UPDATE users SET is_banned = 0 WHERE id = ?', (target_user_id,))
         conn.commit()
-        conn.close()
+        table_versions.bump('users')
+        invalidate_user_status(target_user_id)
         
         return jsonify({'message': 'User unbanned successfully'}), 200
         
@@ -1131,21 +3341,16 @@ def admin_unban_user(target_user_id):
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/admin/supervise_user/<int:target_user_id>', methods=['POST'])
-@jwt_required()
+@admin_required
 def admin_supervise_user(target_user_id):
     try:
-        user_id = get_jwt_identity()
         conn = get_db()
         
-        # Check if user is admin
-        user = conn.execute('SELECT is_admin FROM users WHERE id = ?', (user_id,)).fetchone()
-        if not user or not user['is_admin']:
-            return jsonify({'error': 'Admin access required'}), 403
-        
         # Place user under supervision
         conn.execute('UPDATE users SET is_under_supervision = 1 WHERE id = ?', (target_user_id,))
         conn.commit()
-        conn.close()
+        table_versions.bump('users')
+        invalidate_user_status(target_user_id)
         
         return jsonify({'message': 'User placed under supervision'}), 200
         
@@ -1153,21 +3358,16 @@ def admin_supervise_user(target_user_id):
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/admin/unsupervise_user/<int:target_user_id>', methods=['POST'])
-@jwt_required()
+@admin_required
 def admin_unsupervise_user(target_user_id):
     try:
-        user_id = get_jwt_identity()
         conn = get_db()
         
-        # Check if user is admin
-        user = conn.execute('SELECT is_admin FROM users WHERE id = ?', (user_id,)).fetchone()
-        if not user or not user['is_admin']:
-            return jsonify({'error': 'Admin access required'}), 403
-        
         # Remove user from supervision
         conn.execute('UPDATE users SET is_under_supervision = 0 WHERE id = ?', (target_user_id,))
         conn.commit()
-        conn.close()
+        table_versions.bump('users')
+        invalidate_user_status(target_user_id)
         
         return jsonify({'message': 'User removed from supervision'}), 200
         
@@ -1175,21 +3375,21 @@ def admin_unsupervise_user(target_user_id):
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/admin/approve_skill/<int:skill_id>', methods=['POST'])
-@jwt_required()
+@admin_required
 def admin_approve_skill(skill_id):
     try:
-        user_id = get_jwt_identity()
         conn = get_db()
         
-        # Check if user is admin
-        user = conn.execute('SELECT is_admin FROM users WHERE id = ?', (user_id,)).fetchone()
-        if not user or not user['is_admin']:
-            return jsonify({'error': 'Admin access required'}), 403
+        skill = conn.execute('SELECT * FROM skills WHERE id = ?', (skill_id,)).fetchone()
         
         # Approve the skill
         conn.execute('UPDATE skills SET is_approved = 1 WHERE id = ?', (skill_id,))
+        if skill and not skill['is_approved'] and not skill['is_rejected']:
+            adjust_user_stats(conn, skill['user_id'], pending_skills=-1, **{f"{skill['skill_type']}_skills": 1})
+        if skill and not skill['is_rejected']:
+            index_skills(conn, [skill])
         conn.commit()
-        conn.close()
+        table_versions.bump('skills')
         
         return jsonify({'message': 'Skill approved successfully'}), 200
         
@@ -1197,17 +3397,11 @@ def admin_approve_skill(skill_id):
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/admin/reject_skill_with_reason', methods=['POST'])
-@jwt_required()
+@admin_required
 def admin_reject_skill_with_reason():
     try:
-        user_id = get_jwt_identity()
         conn = get_db()
         
-        # Check if user is admin
-        user = conn.execute('SELECT is_admin FROM users WHERE id = ?', (user_id,)).fetchone()
-        if not user or not user['is_admin']:
-            return jsonify({'error': 'Admin access required'}), 403
-        
         data = request.get_json()
         skill_id = data.get('skill_id')
         rejection_reason = data.get('rejection_reason', '').strip()
@@ -1222,56 +3416,234 @@ def admin_reject_skill_with_reason():
         
         # Delete the skill (reject it)
         conn.execute('DELETE FROM skills WHERE id = ?', (skill_id,))
+        adjust_skill_stats(conn, skill, -1)
+        unindex_skills(conn, [skill['id']])
         conn.commit()
-        conn.close()
+        table_versions.bump('skills')
         
         return jsonify({'message': 'Skill rejected successfully'}), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+# Bulk moderation
+# Helper function to read a non-empty list of integer ids from a JSON body,
+# dropping duplicates but keeping the caller's order
+def get_bulk_ids(data, key):
+    ids = data.get(key)
+    if not isinstance(ids, list) or not ids:
+        raise ValueError(f'{key} must be a non-empty list of ids')
+    if len(ids) > app.config['BULK_MAX_IDS']:
+        raise ValueError(f"At most {app.config['BULK_MAX_IDS']} ids can be processed per request")
+    try:
+        return list(dict.fromkeys(int(item_id) for item_id in ids))
+    except (TypeError, ValueError):
+        raise ValueError(f'{key} must be a non-empty list of ids')
+
+# Helper function to build the bulk response: per-id results plus a count per status
+def bulk_response(action, results):
+    summary = {}
+    for result in results:
+        summary[result['status']] = summary.get(result['status'], 0) + 1
+    return jsonify({'action': action, 'results': results, 'summary': summary})
+
+@app.route('/api/admin/skills/bulk', methods=['POST'])
+@admin_required
+def admin_bulk_skills():
+    """Approve or reject many skills in one transaction"""
+    try:
+        conn = get_db()
+        
+        data = request.get_json() or {}
+        action = data.get('action')
+        skill_ids = get_bulk_ids(data, 'skill_ids')
+        rejection_reason = (data.get('rejection_reason') or '').strip()
+        
+        if action not in ('approve', 'reject'):
+            return jsonify({'error': 'Action must be approve or reject'}), 400
+        if action == 'reject' and not rejection_reason:
+            return jsonify({'error': 'Rejection reason is required'}), 400
+        
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            placeholders = ','.join('?' * len(skill_ids))
+            skills = {skill['id']: skill for skill in conn.execute(
+                f'SELECT * FROM skills WHERE id IN ({placeholders})', skill_ids
+            ).fetchall()}
+            
+            results = []
+            changed = []
+            for skill_id in skill_ids:
+                skill = skills.get(skill_id)
+                if not skill:
+                    results.append({'id': skill_id, 'status': 'not_found'})
+                elif action == 'approve' and skill['is_approved']:
+                    results.append({'id': skill_id, 'status': 'already_approved'})
+                else:
+                    results.append({'id': skill_id, 'status': 'approved' if action == 'approve' else 'rejected'})
+                    changed.append(skill)
+            
+            if action == 'approve':
+                conn.executemany('UPDATE skills SET is_approved = 1 WHERE id = ?',
+                                 [(skill['id'],) for skill in changed])
+                index_skills(conn, [skill for skill in changed if not skill['is_rejected']])
+                notification_items = [(
+                    skill['user_id'], 'Skill Approved',
+                    f'Your skill "{skill["skill_name"]}" has been approved and is now visible to other users.',
+                    'success'
+                ) for skill in changed]
+            else:
+                conn.executemany('DELETE FROM skills WHERE id = ?', [(skill['id'],) for skill in changed])
+                unindex_skills(conn, [skill['id'] for skill in changed])
+                notification_items = [(
+                    skill['user_id'], 'Skill Rejected',
+                    f'Your skill "{skill["skill_name"]}" was rejected: {rejection_reason}',
+                    'warning'
+                ) for skill in changed]
+            
+            # Move each skill out of its current counter (and into the
+            # approved one), netted per owner
+            deltas = {}
+            for skill in changed:
+                if skill['is_rejected']:
+                    continue
+                owner = deltas.setdefault(skill['user_id'], {})
+                column = f"{skill['skill_type']}_skills" if skill['is_approved'] else 'pending_skills'
+                owner[column] = owner.get(column, 0) - 1
+                if action == 'approve':
+                    column = f"{skill['skill_type']}_skills"
+                    owner[column] = owner.get(column, 0) + 1
+            for owner_id, owner_deltas in deltas.items():
+                adjust_user_stats(conn, owner_id, **owner_deltas)
+            
+            notifications = create_notifications(conn, notification_items)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        
+        if changed:
+            table_versions.bump('skills')
+            publish_notifications(notifications)
+        
+        return bulk_response(action, results), 200
+        
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+# Bulk user actions: action -> (column, new value, result status, notification or None)
+BULK_USER_ACTIONS = {
+    'ban': ('is_banned', 1, 'banned', None),
+    'unban': ('is_banned', 0, 'unbanned', (
+        'Account Restored', 'Your account has been restored. Welcome back!', 'success')),
+    'supervise': ('is_under_supervision', 1, 'supervised', (
+        'Account Under Supervision',
+        'Your account has been placed under supervision. You cannot add, edit or delete skills until it is lifted.',
+        'warning')),
+    'unsupervise': ('is_under_supervision', 0, 'unsupervised', (
+        'Supervision Lifted', 'Your account is no longer under supervision.', 'info'))
+}
+
+@app.route('/api/admin/users/bulk', methods=['POST'])
+@admin_required
+def admin_bulk_users():
+    """Ban, unban, supervise or unsupervise many users in one transaction"""
+    try:
+        conn = get_db()
+        
+        data = request.get_json() or {}
+        action = data.get('action')
+        target_ids = get_bulk_ids(data, 'user_ids')
+        
+        if action not in BULK_USER_ACTIONS:
+            return jsonify({'error': f"Action must be one of: {', '.join(BULK_USER_ACTIONS)}"}), 400
+        column, value, status, notification = BULK_USER_ACTIONS[action]
+        
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            placeholders = ','.join('?' * len(target_ids))
+            targets = {target['id']: target for target in conn.execute(
+                f'SELECT id, is_admin, {column} FROM users WHERE id IN ({placeholders})', target_ids
+            ).fetchall()}
+            
+            results = []
+            changed = []
+            for target_id in target_ids:
+                target = targets.get(target_id)
+                if not target:
+                    results.append({'id': target_id, 'status': 'not_found'})
+                elif target['is_admin']:
+                    results.append({'id': target_id, 'status': 'not_allowed'})
+                elif target[column] == value:
+                    results.append({'id': target_id, 'status': 'unchanged'})
+                else:
+                    results.append({'id': target_id, 'status': status})
+                    changed.append(target_id)
+            
+            conn.executemany(f'UPDATE users SET {column} = ? WHERE id = ?',
+                             [(value, target_id) for target_id in changed])
+            notifications = create_notifications(
+                conn, [(target_id,) + notification for target_id in changed] if notification else []
+            )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        
+        if changed:
+            table_versions.bump('users')
+            invalidate_user_status(*changed)
+            publish_notifications(notifications)
+        
+        return bulk_response(action, results), 200
+        
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/api/admin/messages', methods=['GET'])
-@jwt_required()
+@admin_required
 def admin_messages():
     try:
-        user_id = get_jwt_identity()
         conn = get_db()
         
-        # Check if user is admin
-        user = conn.execute('SELECT is_admin FROM users WHERE id = ?', (user_id,)).fetchone()
-        if not user or not user['is_admin']:
-            return jsonify({'error': 'Admin access required'}), 403
-        
-        # Get all messages
-        messages = conn.execute('SELECT * FROM messages ORDER BY created_at DESC').fetchall()
-        messages_list = [convert_row_datetimes(message) for message in messages]
+        page, per_page = get_pagination_args(20)
+        order_keys = get_sort_args({'created_at': 'created_at', 'title': 'title COLLATE NOCASE'}, 'created_at')
+        status = request.args.get('status', '')
+        q = request.args.get('q', '').strip()
         
-        # Get users for quick message
-        users = conn.execute('SELECT id, name, email FROM users WHERE is_admin = 0 AND is_banned = 0').fetchall()
-        users_list = [dict(user) for user in users]
+        where = '1 = 1'
+        params = []
+        if status == 'active':
+            where += ' AND is_active = 1'
+        elif status == 'inactive':
+            where += ' AND is_active = 0'
+        elif status:
+            return jsonify({'error': 'Invalid status. Choose active or inactive'}), 400
+        if q:
+            where += ' AND (title LIKE ? OR content LIKE ?)'
+            params.extend([f'%{q}%', f'%{q}%'])
         
-        conn.close()
+        # Recipients for quick messages come from /api/admin/recipients
+        messages, pagination = fetch_page(conn, '*', 'messages', where, params, order_keys, page, per_page)
         
-        return jsonify({
-            'messages': messages_list,
-            'users': users_list
-        }), 200
+        return jsonify({'messages': messages, 'pagination': pagination}), 200
         
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/admin/send_message', methods=['POST'])
-@jwt_required()
+@admin_required
 def admin_send_message():
     try:
         user_id = get_jwt_identity()
         conn = get_db()
         
-        # Check if user is admin
-        user = conn.execute('SELECT is_admin FROM users WHERE id = ?', (user_id,)).fetchone()
-        if not user or not user['is_admin']:
-            return jsonify({'error': 'Admin access required'}), 403
-        
         data = request.get_json()
         title = data.get('title', '').strip()
         content = data.get('content', '').strip()
@@ -1284,26 +3656,30 @@ def admin_send_message():
             INSERT INTO messages (title, content, is_active)
             VALUES (?, ?, 1)
         ''', (title, content))
+        
+        # Optionally also notify every active user, in the background
+        fanout_id = None
+        if data.get('notify_users'):
+            fanout_id = create_fanout(conn, user_id, title, content)
         conn.commit()
-        conn.close()
         
-        return jsonify({'message': 'Message created successfully'}), 200
+        response = {'message': 'Message created successfully'}
+        if fanout_id:
+            fanout_runner.submit(fanout_id)
+            fanout = conn.execute('SELECT * FROM notification_fanouts WHERE id = ?', (fanout_id,)).fetchone()
+            response['fanout'] = fanout_dict(fanout)
+        
+        return jsonify(response), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/admin/toggle_message/<int:message_id>', methods=['POST'])
-@jwt_required()
+@admin_required
 def admin_toggle_message(message_id):
     try:
-        user_id = get_jwt_identity()
         conn = get_db()
         
-        # Check if user is admin
-        user = conn.execute('SELECT is_admin FROM users WHERE id = ?', (user_id,)).fetchone()
-        if not user or not user['is_admin']:
-            return jsonify({'error': 'Admin access required'}), 403
-        
         # Toggle message status
         message = conn.execute('SELECT is_active FROM messages WHERE id = ?', (message_id,)).fetchone()
         if not message:
@@ -1312,7 +3688,6 @@ def admin_toggle_message(message_id):
         new_status = 0 if message['is_active'] else 1
         conn.execute('UPDATE messages SET is_active = ? WHERE id = ?', (new_status, message_id))
         conn.commit()
-        conn.close()
         
         return jsonify({'message': 'Message status updated successfully'}), 200
         
@@ -1320,39 +3695,137 @@ def admin_toggle_message(message_id):
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/admin/delete_message/<int:message_id>', methods=['DELETE'])
-@jwt_required()
+@admin_required
 def admin_delete_message(message_id):
     try:
-        user_id = get_jwt_identity()
         conn = get_db()
         
-        # Check if user is admin
-        user = conn.execute('SELECT is_admin FROM users WHERE id = ?', (user_id,)).fetchone()
-        if not user or not user['is_admin']:
-            return jsonify({'error': 'Admin access required'}), 403
-        
         # Delete the message
         conn.execute('DELETE FROM messages WHERE id = ?', (message_id,))
         conn.commit()
-        conn.close()
         
         return jsonify({'message': 'Message deleted successfully'}), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+# Notification fan-out
+class NotificationFanout(BackgroundRunner):
+    """Delivers one notification to many users off the request thread.
+
+    Recipients are walked in id order and inserted ``chunk_size`` at a time,
+    each chunk in its own short transaction, so other writers are never
+    locked out for long. ``last_user_id`` records how far delivery got,
+    which makes progress visible and lets ``recover()`` resume an
+    interrupted fan-out without notifying anyone twice.
+    """
+
+    table = 'notification_fanouts'
+
+    def __init__(self, workers=1, chunk_size=500):
+        super().__init__(workers, name='fanout')
+        self.chunk_size = chunk_size
+
+    def run(self, fanout_id):
+        conn = db_pool.acquire()
+        try:
+            fanout = conn.execute('SELECT * FROM notification_fanouts WHERE id = ?', (fanout_id,)).fetchone()
+            if not fanout or fanout['status'] != 'queued':
+                return
+            
+            # An explicit recipient list is stored sorted; otherwise every
+            # active non-admin user is notified
+            recipients = json.loads(fanout['recipients']) if fanout['recipients'] else None
+            if recipients is None:
+                total = conn.execute('SELECT COUNT(*) FROM users WHERE is_admin = 0 AND is_banned = 0').fetchone()[0]
+            else:
+                total = len(recipients)
+            conn.execute('''
+                UPDATE notification_fanouts SET status = 'running', total = ?, started_at = CURRENT_TIMESTAMP
+                WHERE id = ?
+            ''', (total, fanout_id))
+            conn.commit()
+            
+            last_user_id = fanout['last_user_id']
+            delivered = fanout['delivered']
+            while True:
+                if recipients is None:
+                    batch = [row['id'] for row in conn.execute('''
+                        SELECT id FROM users WHERE is_admin = 0 AND is_banned = 0 AND id > ?
+                        ORDER BY id LIMIT ?
+                    ''', (last_user_id, self.chunk_size)).fetchall()]
+                else:
+                    batch = [user_id for user_id in recipients if user_id > last_user_id][:self.chunk_size]
+                if not batch:
+                    break
+                
+                conn.execute('BEGIN IMMEDIATE')
+                try:
+                    notifications = create_notifications(conn, [
+                        (user_id, fanout['title'], fanout['message'], fanout['type']) for user_id in batch
+                    ])
+                    delivered += len(batch)
+                    last_user_id = batch[-1]
+                    conn.execute('''
+                        UPDATE notification_fanouts SET delivered = ?, last_user_id = ? WHERE id = ?
+                    ''', (delivered, last_user_id, fanout_id))
+                    conn.commit()
+                except Exception:
+                    conn.rollback()
+                    raise
+                publish_notifications(notifications)
+            
+            conn.execute('''
+                UPDATE notification_fanouts SET status = 'completed', finished_at = CURRENT_TIMESTAMP
+                WHERE id = ?
+            ''', (fanout_id,))
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            conn.execute('''
+                UPDATE notification_fanouts SET status = 'failed', error = ?, finished_at = CURRENT_TIMESTAMP
+                WHERE id = ?
+            ''', (str(e), fanout_id))
+            conn.commit()
+        finally:
+            db_pool.release(conn)
+
+fanout_runner = NotificationFanout(chunk_size=app.config['FANOUT_CHUNK_SIZE'])
+
+# Helper function to queue a fan-out. ``recipients`` is a list of user ids,
+# or None for every active user. Returns the new fan-out id; call
+# fanout_runner.submit() with it once the row is committed.
+def create_fanout(conn, created_by, title, message, notification_type='info', recipients=None):
+    if recipients is not None:
+        recipients = json.dumps(sorted(set(int(user_id) for user_id in recipients)))
+    cursor = conn.execute('''
+        INSERT INTO notification_fanouts (title, message, type, recipients, created_by)
+        VALUES (?, ?, ?, ?, ?)
+    ''', (title, message, notification_type, recipients, created_by))
+    return cursor.lastrowid
+
+# Helper function to serialise a fan-out for the API
+def fanout_dict(fanout):
+    fanout_dict = convert_row_datetimes(fanout)
+    for field in ('started_at', 'finished_at'):
+        parsed_dt = parse_datetime(fanout_dict[field])
+        if parsed_dt:
+            fanout_dict[field] = parsed_dt.isoformat()
+    fanout_dict['audience'] = 'selected' if fanout_dict.pop('recipients') else 'all'
+    del fanout_dict['last_user_id']
+    if fanout_dict['total']:
+        fanout_dict['progress'] = round(min(fanout_dict['delivered'] / fanout_dict['total'], 1) * 100, 1)
+    else:
+        fanout_dict['progress'] = 100.0 if fanout_dict['status'] == 'completed' else 0.0
+    return fanout_dict
+
 @app.route('/api/admin/quick_message', methods=['POST'])
-@jwt_required()
+@admin_required
 def admin_quick_message():
     try:
         user_id = get_jwt_identity()
         conn = get_db()
         
-        # Check if user is admin
-        user = conn.execute('SELECT is_admin FROM users WHERE id = ?', (user_id,)).fetchone()
-        if not user or not user['is_admin']:
-            return jsonify({'error': 'Admin access required'}), 403
-        
         data = request.get_json()
         title = data.get('quick_title', '').strip()
         content = data.get('quick_content', '').strip()
@@ -1362,77 +3835,72 @@ def admin_quick_message():
         if not title or not content or not recipients:
             return jsonify({'error': 'Title, content, and recipients are required'}), 400
         
-        # Send notifications to selected users
-        for recipient_id in recipients:
-            conn.execute('''
-                INSERT INTO notifications (user_id, title, message, type, is_read)
-                VALUES (?, ?, ?, ?, ?)
-            ''', (recipient_id, title, content, message_type, 0))
+        # recipients is a list of user ids, or "all" for every active user
+        if recipients == 'all':
+            recipients = None
+        elif not isinstance(recipients, list) or not all(isinstance(r, int) for r in recipients):
+            return jsonify({'error': 'Recipients must be a list of user ids or "all"'}), 400
         
+        # Delivery happens in the background, in batches
+        fanout_id = create_fanout(conn, user_id, title, content, message_type, recipients)
         conn.commit()
-        conn.close()
+        fanout_runner.submit(fanout_id)
         
-        return jsonify({'message': 'Quick message sent successfully'}), 200
+        fanout = conn.execute('SELECT * FROM notification_fanouts WHERE id = ?', (fanout_id,)).fetchone()
+        return jsonify({'message': 'Quick message queued for delivery', 'fanout': fanout_dict(fanout)}), 202
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-@app.route('/api/admin/recent_users', methods=['GET'])
-@jwt_required()
-def admin_recent_users():
+@app.route('/api/admin/fanouts', methods=['GET'])
+@admin_required
+def list_fanouts():
+    """List recent notification fan-outs"""
     try:
-        user_id = get_jwt_identity()
         conn = get_db()
         
-        # Check if user is admin
-        user = conn.execute('SELECT is_admin FROM users WHERE id = ?', (user_id,)).fetchone()
-        if not user or not user['is_admin']:
-            return jsonify({'error': 'Admin access required'}), 403
+        limit = min(request.args.get('limit', 20, type=int), app.config['MAX_PER_PAGE'])
+        fanouts = conn.execute('SELECT * FROM notification_fanouts ORDER BY id DESC LIMIT ?', (limit,)).fetchall()
         
-        # Get recent users
-        users = conn.execute('''
-            SELECT * FROM users 
-            WHERE is_admin = 0 
-            ORDER BY created_at DESC 
-            LIMIT 5
-        ''').fetchall()
-        users_list = [convert_row_datetimes(user) for user in users]
+        return jsonify({'fanouts': [fanout_dict(fanout) for fanout in fanouts]}), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/admin/fanouts/<int:fanout_id>', methods=['GET'])
+@admin_required
+def get_fanout(fanout_id):
+    """Get the delivery progress of a notification fan-out"""
+    try:
+        conn = get_db()
         
-        conn.close()
+        fanout = conn.execute('SELECT * FROM notification_fanouts WHERE id = ?', (fanout_id,)).fetchone()
+        if not fanout:
+            return jsonify({'error': 'Fan-out not found'}), 404
         
-        return jsonify({'users': users_list}), 200
+        return jsonify({'fanout': fanout_dict(fanout)}), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-@app.route('/api/admin/recent_swaps', methods=['GET'])
-@jwt_required()
-def admin_recent_swaps():
+@app.route('/api/admin/recent_users', methods=['GET'])
+@admin_required
+def admin_recent_users():
     try:
-        user_id = get_jwt_identity()
         conn = get_db()
         
-        # Check if user is admin
-        user = conn.execute('SELECT is_admin FROM users WHERE id = ?', (user_id,)).fetchone()
-        if not user or not user['is_admin']:
-            return jsonify({'error': 'Admin access required'}), 403
-        
-        # Get recent swaps
-        swaps = conn.execute('''
-            SELECT sr.*, 
-                   u1.name as requester_name, 
-                   u2.name as provider_name
-            FROM swap_requests sr
-            JOIN users u1 ON sr.requester_id = u1.id
-            JOIN users u2 ON sr.provider_id = u2.id
-            ORDER BY sr.created_at DESC 
-            LIMIT 5
-        ''').fetchall()
-        swaps_list = [convert_row_datetimes(swap) for swap in swaps]
+        return jsonify({'users': get_admin_panel(conn, 'recent_users')}), 200
         
-        conn.close()
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/admin/recent_swaps', methods=['GET'])
+@admin_required
+def admin_recent_swaps():
+    try:
+        conn = get_db()
         
-        return jsonify({'swaps': swaps_list}), 200
+        return jsonify({'swaps': get_admin_panel(conn, 'recent_swaps')}), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -1464,7 +3932,6 @@ def get_swap_request_form(skill_id):
         if skill['is_under_supervision']:
             return jsonify({'error': 'This user is currently under supervision and cannot receive swap requests'}), 400
         
-        conn.close()
         
         return jsonify({'skill': convert_row_datetimes(skill)}), 200
         
@@ -1513,20 +3980,28 @@ def send_swap_request():
             return jsonify({'error': 'You already have a pending request for this skill'}), 400
         
         # Create swap request
-        conn.execute('''
+        cursor = conn.execute('''
             INSERT INTO swap_requests (requester_id, provider_id, offered_skill_id, wanted_skill_id, message, status)
             VALUES (?, ?, ?, ?, ?, ?)
         ''', (user_id, skill['user_id'], offered_skill_id, skill_id, message, 'pending'))
+        swap_request_id = cursor.lastrowid
         
         # Create notification for provider
-        conn.execute('''
-            INSERT INTO notifications (user_id, title, message, type, is_read)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (skill['user_id'], 'New Swap Request', 
-              f'You have received a new skill swap request for "{skill["skill_name"]}"', 'info', 0))
+        notification = create_notification(conn, skill['user_id'], 'New Swap Request',
+                                           f'You have received a new skill swap request for "{skill["skill_name"]}"')
         
         conn.commit()
-        conn.close()
+        table_versions.bump('swap_requests')
+        
+        publish_event([user_id, skill['user_id']], 'swap_request', {
+            'id': swap_request_id,
+            'requester_id': int(user_id),
+            'provider_id': skill['user_id'],
+            'wanted_skill_id': skill['id'],
+            'status': 'pending'
+        })
+        publish_event(skill['user_id'], 'notification', notification)
+        bump_versions('notifications', skill['user_id'])
         
         return jsonify({'message': 'Swap request sent successfully'}), 200
         
@@ -1558,7 +4033,11 @@ def respond_swap_request(request_id, action):
         
         # Update request status
         if action == 'accept':
-            conn.execute('UPDATE swap_requests SET status = ? WHERE id = ?', ('accepted', request_id))
+            conn.execute('''
+                UPDATE swap_requests SET status = ?, completed_at = CURRENT_TIMESTAMP WHERE id = ?
+            ''', ('accepted', request_id))
+            adjust_user_stats(conn, swap_request['requester_id'], completed_swaps=1)
+            adjust_user_stats(conn, swap_request['provider_id'], completed_swaps=1)
             notification_title = 'Swap Request Accepted'
             notification_message = f'Your request for "{swap_request["wanted_skill_name"]}" has been accepted!'
         elif action == 'reject':
@@ -1569,13 +4048,20 @@ def respond_swap_request(request_id, action):
             return jsonify({'error': 'Invalid action'}), 400
         
         # Create notification for requester
-        conn.execute('''
-            INSERT INTO notifications (user_id, title, message, type, is_read)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (swap_request['requester_id'], notification_title, notification_message, 'info', 0))
+        notification = create_notification(conn, swap_request['requester_id'], notification_title, notification_message)
         
         conn.commit()
-        conn.close()
+        table_versions.bump('swap_requests')
+        
+        publish_event([swap_request['requester_id'], swap_request['provider_id']], 'swap_request', {
+            'id': request_id,
+            'requester_id': swap_request['requester_id'],
+            'provider_id': swap_request['provider_id'],
+            'wanted_skill_id': swap_request['wanted_skill_id'],
+            'status': 'accepted' if action == 'accept' else 'rejected'
+        })
+        publish_event(swap_request['requester_id'], 'notification', notification)
+        bump_versions('notifications', swap_request['requester_id'])
         
         return jsonify({'message': f'Swap request {action}ed successfully'}), 200
         
@@ -1604,7 +4090,15 @@ def cancel_swap_request(request_id):
         # Cancel the request
         conn.execute('UPDATE swap_requests SET status = ? WHERE id = ?', ('cancelled', request_id))
         conn.commit()
-        conn.close()
+        table_versions.bump('swap_requests')
+        
+        publish_event([swap_request['requester_id'], swap_request['provider_id']], 'swap_request', {
+            'id': request_id,
+            'requester_id': swap_request['requester_id'],
+            'provider_id': swap_request['provider_id'],
+            'wanted_skill_id': swap_request['wanted_skill_id'],
+            'status': 'cancelled'
+        })
         
         return jsonify({'message': 'Swap request cancelled successfully'}), 200
         
@@ -1631,7 +4125,6 @@ def get_rating_form(request_id):
         if not swap_request:
             return jsonify({'error': 'Swap request not found or not completed'}), 404
         
-        conn.close()
         
         return jsonify({'swap_request': convert_row_datetimes(swap_request)}), 200
         
@@ -1676,21 +4169,14 @@ def submit_rating():
         
         # Create rating
         conn.execute('''
-            INSERT INTO ratings (swap_request_id, rater_id, rated_user_id, rating, feedback)
+            INSERT INTO ratings (swap_request_id, rater_id, rated_id, rating, feedback)
             VALUES (?, ?, ?, ?, ?)
         ''', (request_id, user_id, swap_request['provider_id'], rating, feedback))
         
-        # Update user's average rating
-        avg_rating = conn.execute('''
-            SELECT AVG(rating) as avg_rating FROM ratings 
-            WHERE rated_user_id = ?
-        ''', (swap_request['provider_id'],)).fetchone()['avg_rating']
-        
-        conn.execute('UPDATE users SET rating = ? WHERE id = ?', 
-                    (round(avg_rating, 2), swap_request['provider_id']))
+        # Update user's rating counters
+        adjust_user_stats(conn, swap_request['provider_id'], rating_sum=rating, rating_count=1)
         
         conn.commit()
-        conn.close()
         
         return jsonify({'message': 'Rating submitted successfully'}), 200
         
@@ -1726,7 +4212,6 @@ def get_all_swap_requests():
             ORDER BY sr.created_at DESC
         ''', (user_id,)).fetchall()
         
-        conn.close()
         
         return jsonify({
             'sent_requests': [convert_row_datetimes(req) for req in sent_requests],
@@ -1753,7 +4238,6 @@ def get_notifications():
         
         notifications_list = [convert_row_datetimes(notification) for notification in notifications]
         
-        conn.close()
         
         return jsonify({'notifications': notifications_list}), 200
         
@@ -1775,7 +4259,7 @@ def mark_notification_read(notification_id):
         ''', (notification_id, user_id))
         
         conn.commit()
-        conn.close()
+        bump_versions('notifications', user_id)
         
         return jsonify({'message': 'Notification marked as read'}), 200
         
@@ -1797,7 +4281,7 @@ def mark_all_notifications_read():
         ''', (user_id,))
         
         conn.commit()
-        conn.close()
+        bump_versions('notifications', user_id)
         
         return jsonify({'message': 'All notifications marked as read'}), 200
         
@@ -1818,7 +4302,7 @@ def delete_notification(notification_id):
         ''', (notification_id, user_id))
         
         conn.commit()
-        conn.close()
+        bump_versions('notifications', user_id)
         
         return jsonify({'message': 'Notification deleted successfully'}), 200
         
@@ -1830,21 +4314,77 @@ def delete_notification(notification_id):
 def get_unread_notifications_count():
     try:
         user_id = get_jwt_identity()
-        conn = get_db()
         
         # Get unread notifications count
-        count = conn.execute('''
-            SELECT COUNT(*) as count FROM notifications 
-            WHERE user_id = ? AND is_read = 0
-        ''', (user_id,)).fetchone()['count']
+        def count_unread():
+            return get_db().execute('''
+                SELECT COUNT(*) as count FROM notifications 
+                WHERE user_id = ? AND is_read = 0
+            ''', (user_id,)).fetchone()['count']
         
-        conn.close()
-        
-        return jsonify({'unread_count': count}), 200
+        return conditional_count_response('notifications', user_id, count_unread)
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+# Server-sent events endpoint
+@app.route('/api/events/stream', methods=['GET'])
+@jwt_required(locations=['headers', 'query_string'])
+def event_stream():
+    """Stream chat, swap request and notification events to the current user
+
+    EventSource can't send headers, so the token may also be passed as
+    ``?jwt=<token>``. A comment line is sent every EVENT_STREAM_HEARTBEAT
+    seconds to keep proxies from closing an idle connection.
+    """
+    user_id = int(get_jwt_identity())
+    broker = app.extensions['event_broker']
+    heartbeat = app.config['EVENT_STREAM_HEARTBEAT']
+    subscriber = broker.subscribe(user_id)
+    
+    def generate():
+        try:
+            yield 'retry: 3000\n\n'
+            while True:
+                try:
+                    event_id, event, data = subscriber.get(timeout=heartbeat)
+                except queue.Empty:
+                    yield ': keepalive\n\n'
+                    continue
+                yield f'id: {event_id}\nevent: {event}\ndata: {json.dumps(data)}\n\n'
+        finally:
+            broker.unsubscribe(user_id, subscriber)
+    
+    return Response(generate(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+# Helper functions to keep chat_inbox in step with chat_messages. Callers
+# run these inside the same transaction as the message write.
+def record_chat_message(conn, user1_id, user2_id, message_id):
+    """Move the conversation to the top of both participants' inboxes"""
+    for participant_id, other_id in {(user1_id, user2_id), (user2_id, user1_id)}:
+        conn.execute('''
+            INSERT INTO chat_inbox
+                (user_id, conversation_id, other_user_id, last_message_id, last_message, last_message_at, unread_count)
+            SELECT ?, m.conversation_id, ?, m.id, substr(m.message, 1, ?), m.created_at,
+                   CASE WHEN m.sender_id != ? THEN 1 ELSE 0 END
+            FROM chat_messages m WHERE m.id = ?
+            ON CONFLICT (user_id, conversation_id) DO UPDATE SET
+                last_message_id = excluded.last_message_id,
+                last_message = excluded.last_message,
+                last_message_at = excluded.last_message_at,
+                unread_count = unread_count + excluded.unread_count
+        ''', (participant_id, other_id, app.config['CHAT_PREVIEW_LENGTH'], participant_id, message_id))
+
+def record_chat_read(conn, user_id, conversation_id, read_count):
+    if read_count > 0:
+        conn.execute('''
+            UPDATE chat_inbox SET unread_count = MAX(unread_count - ?, 0)
+            WHERE user_id = ? AND conversation_id = ?
+        ''', (read_count, user_id, conversation_id))
+
 # Chat API Endpoints
 @app.route('/api/chat/conversations', methods=['GET'])
 @jwt_required()
@@ -1854,61 +4394,30 @@ def get_chat_conversations():
         user_id = int(get_jwt_identity())
         conn = get_db()
         
-        # Get conversations with actual messages for the current user
+        # Inbox rows only exist for conversations with messages
         conversations = conn.execute('''
             SELECT 
-                c.*,
-                CASE 
-                    WHEN c.user1_id = ? THEN c.user2_id 
-                    ELSE c.user1_id 
-                END as other_user_id,
+                i.*,
+                c.created_at,
                 u.name as other_user_name,
                 u.profile_photo as other_user_photo,
                 u.location as other_user_location,
-                u.bio as other_user_bio,
-                (SELECT COUNT(*) FROM chat_messages 
-                 WHERE conversation_id = c.id AND sender_id != ? AND is_read = 0) as unread_count,
-                (SELECT message FROM chat_messages 
-                 WHERE conversation_id = c.id 
-                 ORDER BY created_at DESC 
-                 LIMIT 1) as last_message,
-                (SELECT created_at FROM chat_messages 
-                 WHERE conversation_id = c.id 
-                 ORDER BY created_at DESC 
-                 LIMIT 1) as last_message_at
-            FROM chat_conversations c
-            JOIN users u ON (
-                CASE 
-                    WHEN c.user1_id = ? THEN c.user2_id 
-                    ELSE c.user1_id 
-                END = u.id
-            )
-            WHERE (c.user1_id = ? OR c.user2_id = ?)
-            AND EXISTS (
-                SELECT 1 FROM chat_messages 
-                WHERE conversation_id = c.id
-            )
-            ORDER BY c.last_message_at DESC
-        ''', (user_id, user_id, user_id, user_id, user_id)).fetchall()
-        
-        conn.close()
+                u.bio as other_user_bio
+            FROM chat_inbox i
+            JOIN chat_conversations c ON c.id = i.conversation_id
+            JOIN users u ON u.id = i.other_user_id
+            WHERE i.user_id = ?
+            ORDER BY i.last_message_at DESC, i.last_message_id DESC
+        ''', (user_id,)).fetchall()
         
         # Convert to list of dicts
         conversations_list = []
         for conv in conversations:
-            # Convert relative photo path to full URL if it exists
-            other_user_photo = conv['other_user_photo']
-            if other_user_photo and not other_user_photo.startswith('http'):
-                if other_user_photo.startswith('/'):
-                    other_user_photo = other_user_photo
-                else:
-                    other_user_photo = f'/api/uploads/{other_user_photo}'
-            
             conversations_list.append({
-                'id': conv['id'],
+                'id': conv['conversation_id'],
                 'other_user_id': conv['other_user_id'],
                 'other_user_name': conv['other_user_name'],
-                'other_user_photo': other_user_photo,
+                'other_user_photo': photo_url(conv['other_user_photo']),
                 'other_user_location': conv['other_user_location'],
                 'other_user_bio': conv['other_user_bio'],
                 'unread_count': conv['unread_count'],
@@ -1925,9 +4434,18 @@ def get_chat_conversations():
 @app.route('/api/chat/conversation/<int:conversation_id>', methods=['GET'])
 @jwt_required()
 def get_conversation(conversation_id):
-    """Get messages for a specific conversation"""
+    """Get a window of messages for a specific conversation
+
+    Without parameters the newest ``limit`` messages are returned. Pass
+    ``before_id`` to page back through older history, or ``after_id`` to
+    fetch only messages newer than the last one the client has.
+    """
     try:
         user_id = int(get_jwt_identity())
+        before_id = request.args.get('before_id', type=int)
+        after_id = request.args.get('after_id', type=int)
+        limit = request.args.get('limit', app.config['CHAT_PAGE_SIZE'], type=int)
+        limit = min(max(limit, 1), app.config['CHAT_MAX_PAGE_SIZE'])
         conn = get_db()
         
         # Verify user is part of this conversation
@@ -1955,43 +4473,58 @@ def get_conversation(conversation_id):
         if not conversation:
             return jsonify({'error': 'Conversation not found'}), 404
         
-        # Get messages for this conversation
-        messages = conn.execute('''
-            SELECT 
-                m.*,
-                u.name as sender_name,
-                u.profile_photo as sender_photo
-            FROM chat_messages m
-            JOIN users u ON m.sender_id = u.id
-            WHERE m.conversation_id = ?
-            ORDER BY m.created_at ASC
-        ''', (conversation_id,)).fetchall()
-        
-        # Mark messages as read
-        conn.execute('''
-            UPDATE chat_messages 
-            SET is_read = 1 
-            WHERE conversation_id = ? AND sender_id != ?
-        ''', (conversation_id, user_id))
-        
-        conn.commit()
-        conn.close()
+        # Walk the (conversation_id, id) index from the requested edge
+        if after_id is not None:
+            messages = conn.execute('''
+                SELECT * FROM chat_messages
+                WHERE conversation_id = ? AND id > ?
+                ORDER BY id ASC LIMIT ?
+            ''', (conversation_id, after_id, limit + 1)).fetchall()
+            has_more = len(messages) > limit
+            messages = messages[:limit]
+        else:
+            query = 'SELECT * FROM chat_messages WHERE conversation_id = ?'
+            params = [conversation_id]
+            if before_id is not None:
+                query += ' AND id < ?'
+                params.append(before_id)
+            query += ' ORDER BY id DESC LIMIT ?'
+            params.append(limit + 1)
+            messages = conn.execute(query, params).fetchall()
+            has_more = len(messages) > limit
+            messages = list(reversed(messages[:limit]))
+        
+        # Look up senders once per window instead of joining per message
+        senders = {}
+        sender_ids = list({msg['sender_id'] for msg in messages})
+        if sender_ids:
+            placeholders = ','.join('?' * len(sender_ids))
+            for sender in conn.execute(f'''
+                SELECT id, name, profile_photo FROM users WHERE id IN ({placeholders})
+            ''', sender_ids).fetchall():
+                senders[sender['id']] = (sender['name'], photo_url(sender['profile_photo']))
+        
+        # Mark only the returned messages as read
+        if messages:
+            cursor = conn.execute('''
+                UPDATE chat_messages 
+                SET is_read = 1 
+                WHERE conversation_id = ? AND id BETWEEN ? AND ? AND sender_id != ? AND is_read = 0
+            ''', (conversation_id, messages[0]['id'], messages[-1]['id'], user_id))
+            record_chat_read(conn, user_id, conversation_id, cursor.rowcount)
+            conn.commit()
+            if cursor.rowcount > 0:
+                bump_versions('chat', user_id)
         
         # Convert to list of dicts
         messages_list = []
         for msg in messages:
-            sender_photo = msg['sender_photo']
-            if sender_photo and not sender_photo.startswith('http'):
-                if sender_photo.startswith('/'):
-                    sender_photo = sender_photo
-                else:
-                    sender_photo = f'/api/uploads/{sender_photo}'
-            
+            sender_name, sender_photo = senders.get(msg['sender_id'], (None, None))
             messages_list.append({
                 'id': msg['id'],
                 'conversation_id': msg['conversation_id'],
                 'sender_id': msg['sender_id'],
-                'sender_name': msg['sender_name'],
+                'sender_name': sender_name,
                 'sender_photo': sender_photo,
                 'message': msg['message'],
                 'message_type': msg['message_type'],
@@ -2008,7 +4541,8 @@ def get_conversation(conversation_id):
                 'other_user_location': conversation['other_user_location'],
                 'other_user_bio': conversation['other_user_bio']
             },
-            'messages': messages_list
+            'messages': messages_list,
+            'has_more': has_more
         }), 200
         
     except Exception as e:
@@ -2052,6 +4586,7 @@ def send_chat_message():
             SET last_message_at = CURRENT_TIMESTAMP 
             WHERE id = ?
         ''', (conversation_id,))
+        record_chat_message(conn, conversation['user1_id'], conversation['user2_id'], message_id)
         
         # Get message details
         new_message = conn.execute('''
@@ -2065,29 +4600,24 @@ def send_chat_message():
         ''', (message_id,)).fetchone()
         
         conn.commit()
-        conn.close()
         
-        # Convert sender photo URL
-        sender_photo = new_message['sender_photo']
-        if sender_photo and not sender_photo.startswith('http'):
-            if sender_photo.startswith('/'):
-                sender_photo = sender_photo
-            else:
-                sender_photo = f'/api/uploads/{sender_photo}'
+        message_data = {
+            'id': new_message['id'],
+            'conversation_id': new_message['conversation_id'],
+            'sender_id': new_message['sender_id'],
+            'sender_name': new_message['sender_name'],
+            'sender_photo': photo_url(new_message['sender_photo']),
+            'message': new_message['message'],
+            'message_type': new_message['message_type'],
+            'is_read': new_message['is_read'],
+            'created_at': new_message['created_at']
+        }
+        publish_event([conversation['user1_id'], conversation['user2_id']], 'chat_message', message_data)
+        bump_versions('chat', [conversation['user1_id'], conversation['user2_id']])
         
         return jsonify({
             'success': True,
-            'message': {
-                'id': new_message['id'],
-                'conversation_id': new_message['conversation_id'],
-                'sender_id': new_message['sender_id'],
-                'sender_name': new_message['sender_name'],
-                'sender_photo': sender_photo,
-                'message': new_message['message'],
-                'message_type': new_message['message_type'],
-                'is_read': new_message['is_read'],
-                'created_at': new_message['created_at']
-            }
+            'message': message_data
         }), 200
         
     except Exception as e:
@@ -2114,7 +4644,6 @@ def start_conversation():
         ''', (user_id, other_user_id, other_user_id, user_id)).fetchone()
         
         if existing:
-            conn.close()
             return jsonify({'conversation_id': existing['id']})
         
         # Create new conversation
@@ -2125,7 +4654,6 @@ def start_conversation():
         
         conversation_id = cursor.lastrowid
         conn.commit()
-        conn.close()
         
         return jsonify({'conversation_id': conversation_id}), 200
         
@@ -2148,7 +4676,6 @@ def get_chat_users():
             ORDER BY name ASC
         ''', (user_id,)).fetchall()
         
-        conn.close()
         
         # Convert to list of dicts
         users_list = []
@@ -2175,18 +4702,13 @@ def get_chat_users():
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/chat/admin_message', methods=['POST'])
-@jwt_required()
+@admin_required
 def send_admin_message():
     """Send a message to a specific user as admin"""
     try:
         user_id = int(get_jwt_identity())
         conn = get_db()
         
-        # Check if user is admin
-        user = conn.execute('SELECT is_admin FROM users WHERE id = ?', (user_id,)).fetchone()
-        if not user or not user['is_admin']:
-            return jsonify({'error': 'Admin access required'}), 403
-        
         data = request.get_json()
         target_user_id = data.get('user_id')
         message = data.get('message', '').strip()
@@ -2199,12 +4721,13 @@ def send_admin_message():
         
         # Check if conversation exists, create if not
         conversation = conn.execute('''
-            SELECT id FROM chat_conversations 
+            SELECT id, user1_id, user2_id FROM chat_conversations 
             WHERE (user1_id = ? AND user2_id = ?) OR (user1_id = ? AND user2_id = ?)
         ''', (user_id, target_user_id, target_user_id, user_id)).fetchone()
         
         if conversation:
             conversation_id = conversation['id']
+            participants = (conversation['user1_id'], conversation['user2_id'])
         else:
             # Create new conversation
             cursor = conn.execute('''
@@ -2212,12 +4735,14 @@ def send_admin_message():
                 VALUES (?, ?)
             ''', (user_id, target_user_id))
             conversation_id = cursor.lastrowid
+            participants = (user_id, target_user_id)
         
         # Insert message
         cursor = conn.execute('''
             INSERT INTO chat_messages (conversation_id, sender_id, message, message_type)
             VALUES (?, ?, ?, 'system')
         ''', (conversation_id, user_id, message))
+        message_id = cursor.lastrowid
         
         # Update conversation last_message_at
         conn.execute('''
@@ -2225,9 +4750,19 @@ def send_admin_message():
             SET last_message_at = CURRENT_TIMESTAMP 
             WHERE id = ?
         ''', (conversation_id,))
+        record_chat_message(conn, participants[0], participants[1], message_id)
         
         conn.commit()
-        conn.close()
+        
+        publish_event(participants, 'chat_message', {
+            'id': message_id,
+            'conversation_id': conversation_id,
+            'sender_id': user_id,
+            'message': message,
+            'message_type': 'system',
+            'is_read': 0
+        })
+        bump_versions('chat', participants)
         
         return jsonify({'success': True, 'conversation_id': conversation_id}), 200
         
@@ -2240,263 +4775,446 @@ def get_unread_count():
     """Get total unread message count for the user"""
     try:
         user_id = int(get_jwt_identity())
-        conn = get_db()
         
-        unread_count = conn.execute('''
-            SELECT COUNT(*) as count FROM chat_messages cm
-            JOIN chat_conversations c ON cm.conversation_id = c.id
-            WHERE (c.user1_id = ? OR c.user2_id = ?) 
-            AND cm.sender_id != ? AND cm.is_read = 0
-        ''', (user_id, user_id, user_id)).fetchone()['count']
+        def count_unread():
+            return get_db().execute('''
+                SELECT COALESCE(SUM(unread_count), 0) as count FROM chat_inbox
+                WHERE user_id = ?
+            ''', (user_id,)).fetchone()['count']
         
-        conn.close()
-        
-        return jsonify({'unread_count': unread_count}), 200
+        return conditional_count_response('chat', user_id, count_unread)
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 # Admin Download Reports
+# Helper function to stream a report as CSV. The query runs on its own pooled
+# connection inside the response generator (the request's connection is
+# released as soon as the view returns) and rows are fetched, encoded and
+# sent in chunks, so memory use doesn't grow with the size of the table.
+def stream_csv_report(filename_prefix, header, query, format_row, params=()):
+    chunk_size = app.config['EXPORT_CHUNK_SIZE']
+    
+    def generate():
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(header)
+        yield buffer.getvalue().encode('utf-8')
+        
+        conn = db_pool.acquire()
+        try:
+            cursor = conn.execute(query, params)
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                buffer.seek(0)
+                buffer.truncate(0)
+                writer.writerows(format_row(row) for row in rows)
+                yield buffer.getvalue().encode('utf-8')
+        finally:
+            db_pool.release(conn)
+    
+    filename = f'{filename_prefix}_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv'
+    return Response(generate(), mimetype='text/csv', headers={
+        'Content-Disposition': f'attachment; filename={filename}'
+    })
+
+USER_ACTIVITY_REPORT = {
+    'filename_prefix': 'user_activity_report',
+    'header': ['User ID', 'Name', 'Email', 'Location', 'Registration Date', 'Last Login', 'Skills Count', 'Swap Requests Sent', 'Swap Requests Received', 'Completed Swaps', 'Average Rating'],
+    # Skill, swap and rating counters come from user_stats; the request counts
+    # are aggregated per table before joining so the work stays linear
+    'query': '''
+        SELECT u.*, 
+               COALESCE(st.offered_skills + st.wanted_skills, 0) as skills_count,
+               COALESCE(sent.requests_sent, 0) as requests_sent,
+               COALESCE(received.requests_received, 0) as requests_received,
+               COALESCE(st.completed_swaps, 0) as completed_swaps,
+               st.rating_sum * 1.0 / NULLIF(st.rating_count, 0) as avg_rating
+        FROM users u
+        LEFT JOIN user_stats st ON st.user_id = u.id
+        LEFT JOIN (
+            SELECT requester_id, COUNT(*) as requests_sent
+            FROM swap_requests GROUP BY requester_id
+        ) sent ON sent.requester_id = u.id
+        LEFT JOIN (
+            SELECT provider_id, COUNT(*) as requests_received
+            FROM swap_requests GROUP BY provider_id
+        ) received ON received.provider_id = u.id
+        WHERE u.is_admin = 0
+        ORDER BY u.created_at DESC
+    ''',
+    'format_row': lambda user: [
+        user['id'],
+        user['name'],
+        user['email'],
+        user['location'] or '',
+        user['created_at'],
+        user['last_login'] or '',
+        user['skills_count'],
+        user['requests_sent'],
+        user['requests_received'],
+        user['completed_swaps'],
+        round(user['avg_rating'], 2) if user['avg_rating'] else 0
+    ]
+}
+
+FEEDBACK_LOGS_REPORT = {
+    'filename_prefix': 'feedback_logs_report',
+    'header': ['Rating ID', 'Rater Name', 'Rated User', 'Rating', 'Feedback', 'Swap Request ID', 'Date'],
+    'query': '''
+        SELECT r.*, 
+               u1.name as rater_name,
+               u2.name as rated_name
+        FROM ratings r
+        JOIN users u1 ON r.rater_id = u1.id
+        JOIN users u2 ON r.rated_id = u2.id
+        ORDER BY r.created_at DESC
+    ''',
+    'format_row': lambda rating: [
+        rating['id'],
+        rating['rater_name'],
+        rating['rated_name'],
+        rating['rating'],
+        rating['feedback'] or '',
+        rating['swap_request_id'],
+        rating['created_at']
+    ]
+}
+
+SWAP_STATS_REPORT = {
+    'filename_prefix': 'swap_stats_report',
+    'header': ['Swap Request ID', 'Requester Name', 'Provider Name', 'Offered Skill', 'Wanted Skill', 'Status', 'Created Date', 'Completed Date', 'Rating Given', 'Rating Received'],
+    'query': '''
+        SELECT sr.*,
+               u1.name as requester_name,
+               u2.name as provider_name,
+               s1.skill_name as offered_skill_name,
+               s2.skill_name as wanted_skill_name,
+               r1.rating as rating_given,
+               r2.rating as rating_received
+        FROM swap_requests sr
+        JOIN users u1 ON sr.requester_id = u1.id
+        JOIN users u2 ON sr.provider_id = u2.id
+        JOIN skills s1 ON sr.offered_skill_id = s1.id
+        JOIN skills s2 ON sr.wanted_skill_id = s2.id
+        LEFT JOIN ratings r1 ON sr.id = r1.swap_request_id AND r1.rater_id = sr.requester_id
+        LEFT JOIN ratings r2 ON sr.id = r2.swap_request_id AND r2.rater_id = sr.provider_id
+        ORDER BY sr.created_at DESC
+    ''',
+    'format_row': lambda swap: [
+        swap['id'],
+        swap['requester_name'],
+        swap['provider_name'],
+        swap['offered_skill_name'],
+        swap['wanted_skill_name'],
+        swap['status'],
+        swap['created_at'],
+        swap['completed_at'] or '',
+        swap['rating_given'] or '',
+        swap['rating_received'] or ''
+    ]
+}
+
+USERS_REPORT = {
+    'filename_prefix': 'users_report',
+    'header': ['User ID', 'Name', 'Email', 'Location', 'Bio', 'Registration Date', 'Last Login', 'Is Admin', 'Is Banned', 'Is Under Supervision', 'Profile Photo'],
+    'query': '''
+        SELECT * FROM users ORDER BY created_at DESC
+    ''',
+    'format_row': lambda user: [
+        user['id'],
+        user['name'],
+        user['email'],
+        user['location'] or '',
+        user['bio'] or '',
+        user['created_at'],
+        user['last_login'] or '',
+        user['is_admin'],
+        user['is_banned'],
+        user['is_under_supervision'],
+        user['profile_photo'] or ''
+    ]
+}
+
 @app.route('/api/admin/download/user_activity', methods=['GET'])
-@jwt_required()
+@admin_required
 def download_user_activity():
     """Download user activity report as CSV"""
     try:
-        user_id = get_jwt_identity()
-        conn = get_db()
-        
-        # Check if user is admin
-        user = conn.execute('SELECT is_admin FROM users WHERE id = ?', (user_id,)).fetchone()
-        if not user or not user['is_admin']:
-            return jsonify({'error': 'Admin access required'}), 403
-        
-        # Generate user activity report
-        output = io.StringIO()
-        writer = csv.writer(output)
-        
-        # Write header
-        writer.writerow(['User ID', 'Name', 'Email', 'Location', 'Registration Date', 'Last Login', 'Skills Count', 'Swap Requests Sent', 'Swap Requests Received', 'Completed Swaps', 'Average Rating'])
-        
-        # Get all users with their activity data
-        users = conn.execute('''
-            SELECT u.*, 
-                   COUNT(DISTINCT s.id) as skills_count,
-                   COUNT(DISTINCT sr1.id) as requests_sent,
-                   COUNT(DISTINCT sr2.id) as requests_received,
-                   COUNT(DISTINCT sr3.id) as completed_swaps,
-                   AVG(r.rating) as avg_rating
-            FROM users u
-            LEFT JOIN skills s ON u.id = s.user_id AND s.is_approved = 1
-            LEFT JOIN swap_requests sr1 ON u.id = sr1.requester_id
-            LEFT JOIN swap_requests sr2 ON u.id = sr2.provider_id
-            LEFT JOIN swap_requests sr3 ON (u.id = sr3.requester_id OR u.id = sr3.provider_id) AND sr3.status = 'accepted'
-            LEFT JOIN ratings r ON u.id = r.rated_id
-            WHERE u.is_admin = 0
-            GROUP BY u.id
-            ORDER BY u.created_at DESC
-        ''').fetchall()
-        
-        for user in users:
-            writer.writerow([
-                user['id'],
-                user['name'],
-                user['email'],
-                user['location'] or '',
-                user['created_at'],
-                user['last_login'] or '',
-                user['skills_count'],
-                user['requests_sent'],
-                user['requests_received'],
-                user['completed_swaps'],
-                round(user['avg_rating'], 2) if user['avg_rating'] else 0
-            ])
-        
-        conn.close()
-        
-        # Create file response
-        output.seek(0)
-        return send_file(
-            io.BytesIO(output.getvalue().encode('utf-8')),
-            mimetype='text/csv',
-            as_attachment=True,
-            download_name=f'user_activity_report_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv'
-        )
+        return stream_csv_report(**USER_ACTIVITY_REPORT)
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/admin/download/feedback_logs', methods=['GET'])
-@jwt_required()
+@admin_required
 def download_feedback_logs():
     """Download feedback logs report as CSV"""
+    try:
+        return stream_csv_report(**FEEDBACK_LOGS_REPORT)
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/admin/download/swap_stats', methods=['GET'])
+@admin_required
+def download_swap_stats():
+    """Download swap statistics report as CSV"""
+    try:
+        return stream_csv_report(**SWAP_STATS_REPORT)
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/admin/download/users', methods=['GET'])
+@admin_required
+def download_users():
+    """Download all users data as CSV"""
+    try:
+        return stream_csv_report(**USERS_REPORT)
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+# Reports that can be generated as background export jobs
+EXPORT_REPORTS = {
+    'user_activity': USER_ACTIVITY_REPORT,
+    'feedback_logs': FEEDBACK_LOGS_REPORT,
+    'swap_stats': SWAP_STATS_REPORT,
+    'users': USERS_REPORT
+}
+
+# Row count of each report's driving table, used as the progress total. The
+# reports only join lookups onto it, so this is an upper bound.
+EXPORT_ROW_ESTIMATES = {
+    'user_activity': 'SELECT COUNT(*) FROM users WHERE is_admin = 0',
+    'feedback_logs': 'SELECT COUNT(*) FROM ratings',
+    'swap_stats': 'SELECT COUNT(*) FROM swap_requests',
+    'users': 'SELECT COUNT(*) FROM users'
+}
+
+# Background export jobs
+class ExportJobRunner(BackgroundRunner):
+    """Generates admin reports on a small thread pool instead of in a request.
+
+    Jobs are persisted in ``export_jobs`` so their status survives a restart,
+    and ``recover()`` re-queues anything that was queued or running when the
+    process stopped. Each report is written to a ``.part`` file in ``folder``
+    (gzip-compressed if requested) and renamed into place once complete, so
+    a finished job never points at a half-written file. Files are kept for
+    EXPORT_RETENTION seconds; ``purge_expired()`` removes older ones.
+    """
+
+    table = 'export_jobs'
+    reset_columns = {'rows_written': 0, 'started_at': None}
+
+    def __init__(self, folder, workers=2):
+        super().__init__(workers, name='export')
+        self.folder = folder
+
+    def run(self, job_id):
+        # Progress updates go through a second connection so they can commit
+        # while the report query is still being read
+        conn = read_conn = None
+        partial_path = None
+        try:
+            conn = db_pool.acquire()
+            read_conn = db_pool.acquire()
+            job = conn.execute('SELECT * FROM export_jobs WHERE id = ?', (job_id,)).fetchone()
+            if not job or job['status'] != 'queued':
+                return
+            report = EXPORT_REPORTS[job['report']]
+            
+            # Progress is measured against a cheap count of the report's
+            # driving table rather than by running the report query twice
+            total_rows = read_conn.execute(EXPORT_ROW_ESTIMATES[job['report']]).fetchone()[0]
+            conn.execute('''
+                UPDATE export_jobs SET status = 'running', total_rows = ?, started_at = CURRENT_TIMESTAMP
+                WHERE id = ?
+            ''', (total_rows, job_id))
+            conn.commit()
+            
+            file_name = f"{report['filename_prefix']}_{job_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+            if job['compress']:
+                file_name += '.gz'
+            path = os.path.join(self.folder, file_name)
+            partial_path = path + '.part'
+            
+            opener = gzip.open if job['compress'] else open
+            rows_written = 0
+            with opener(partial_path, 'wt', encoding='utf-8', newline='') as f:
+                writer = csv.writer(f)
+                writer.writerow(report['header'])
+                cursor = read_conn.execute(report['query'])
+                while True:
+                    rows = cursor.fetchmany(app.config['EXPORT_CHUNK_SIZE'])
+                    if not rows:
+                        break
+                    writer.writerows(report['format_row'](row) for row in rows)
+                    rows_written += len(rows)
+                    conn.execute('UPDATE export_jobs SET rows_written = ? WHERE id = ?', (rows_written, job_id))
+                    conn.commit()
+            os.replace(partial_path, path)
+            
+            conn.execute('''
+                UPDATE export_jobs
+                SET status = 'completed', rows_written = ?, total_rows = ?, file_name = ?, file_size = ?,
+                    finished_at = CURRENT_TIMESTAMP
+                WHERE id = ?
+            ''', (rows_written, rows_written, file_name, os.path.getsize(path), job_id))
+            conn.commit()
+        except Exception as e:
+            app.logger.exception('Export job %s failed', job_id)
+            if partial_path and os.path.exists(partial_path):
+                os.remove(partial_path)
+            try:
+                if conn is None:
+                    conn = db_pool.acquire()
+                conn.rollback()
+                conn.execute('''
+                    UPDATE export_jobs SET status = 'failed', error = ?, finished_at = CURRENT_TIMESTAMP
+                    WHERE id = ?
+                ''', (str(e), job_id))
+                conn.commit()
+            except Exception:
+                app.logger.exception('Could not record the failure of export job %s', job_id)
+        finally:
+            if read_conn is not None:
+                db_pool.release(read_conn)
+            if conn is not None:
+                db_pool.release(conn)
+
+    def purge_expired(self):
+        """Delete report files older than EXPORT_RETENTION and mark their jobs expired"""
+        retention = app.config['EXPORT_RETENTION']
+        conn = db_pool.acquire()
+        try:
+            jobs = conn.execute('''
+                SELECT id, file_name FROM export_jobs
+                WHERE status = 'completed' AND finished_at < datetime('now', ?)
+            ''', (f'-{int(retention)} seconds',)).fetchall()
+            for job in jobs:
+                path = os.path.join(self.folder, job['file_name'])
+                if os.path.exists(path):
+                    os.remove(path)
+            conn.executemany("UPDATE export_jobs SET status = 'expired' WHERE id = ?",
+                             [(job['id'],) for job in jobs])
+            conn.commit()
+        finally:
+            db_pool.release(conn)
+        
+        # Partial files left behind by a process that stopped mid-export
+        cutoff = time.time() - retention
+        for entry in os.scandir(self.folder):
+            if entry.name.endswith('.part') and entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+        return len(jobs)
+
+export_runner = ExportJobRunner(app.config['EXPORT_FOLDER'], workers=app.config['EXPORT_WORKERS'])
+
+# Helper function to serialise an export job for the API
+def export_job_dict(job):
+    job_dict = convert_row_datetimes(job)
+    for field in ('started_at', 'finished_at'):
+        parsed_dt = parse_datetime(job_dict[field])
+        if parsed_dt:
+            job_dict[field] = parsed_dt.isoformat()
+    if job_dict['total_rows']:
+        job_dict['progress'] = min(round(job_dict['rows_written'] / job_dict['total_rows'] * 100, 1), 100.0)
+    else:
+        job_dict['progress'] = 100.0 if job_dict['status'] == 'completed' else 0.0
+    job_dict['download_url'] = (f"/api/admin/exports/{job_dict['id']}/download"
+                                if job_dict['status'] == 'completed' else None)
+    return job_dict
+
+@app.route('/api/admin/exports', methods=['POST'])
+@admin_required
+def create_export():
+    """Queue a report to be generated in the background"""
     try:
         user_id = get_jwt_identity()
         conn = get_db()
         
-        # Check if user is admin
-        user = conn.execute('SELECT is_admin FROM users WHERE id = ?', (user_id,)).fetchone()
-        if not user or not user['is_admin']:
-            return jsonify({'error': 'Admin access required'}), 403
+        data = request.get_json() or {}
+        report = data.get('report')
+        if report not in EXPORT_REPORTS:
+            return jsonify({'error': f"Unknown report. Choose one of: {', '.join(EXPORT_REPORTS)}"}), 400
         
-        # Generate feedback logs report
-        output = io.StringIO()
-        writer = csv.writer(output)
+        export_runner.purge_expired()
         
-        # Write header
-        writer.writerow(['Rating ID', 'Rater Name', 'Rated User', 'Rating', 'Feedback', 'Swap Request ID', 'Date'])
+        cursor = conn.execute('''
+            INSERT INTO export_jobs (report, requested_by, compress) VALUES (?, ?, ?)
+        ''', (report, user_id, 1 if data.get('compress') else 0))
+        job_id = cursor.lastrowid
+        conn.commit()
         
-        # Get all ratings with user names
-        ratings = conn.execute('''
-            SELECT r.*, 
-                   u1.name as rater_name,
-                   u2.name as rated_name
-            FROM ratings r
-            JOIN users u1 ON r.rater_id = u1.id
-            JOIN users u2 ON r.rated_id = u2.id
-            ORDER BY r.created_at DESC
-        ''').fetchall()
+        export_runner.submit(job_id)
         
-        for rating in ratings:
-            writer.writerow([
-                rating['id'],
-                rating['rater_name'],
-                rating['rated_name'],
-                rating['rating'],
-                rating['feedback'] or '',
-                rating['swap_request_id'],
-                rating['created_at']
-            ])
-        
-        conn.close()
-        
-        # Create file response
-        output.seek(0)
-        return send_file(
-            io.BytesIO(output.getvalue().encode('utf-8')),
-            mimetype='text/csv',
-            as_attachment=True,
-            download_name=f'feedback_logs_report_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv'
-        )
+        job = conn.execute('SELECT * FROM export_jobs WHERE id = ?', (job_id,)).fetchone()
+        response = jsonify({'message': 'Export queued', 'job': export_job_dict(job)})
+        response.headers['Location'] = f'/api/admin/exports/{job_id}'
+        return response, 202
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-@app.route('/api/admin/download/swap_stats', methods=['GET'])
-@jwt_required()
-def download_swap_stats():
-    """Download swap statistics report as CSV"""
+@app.route('/api/admin/exports', methods=['GET'])
+@admin_required
+def list_exports():
+    """List recent export jobs"""
     try:
-        user_id = get_jwt_identity()
         conn = get_db()
         
-        # Check if user is admin
-        user = conn.execute('SELECT is_admin FROM users WHERE id = ?', (user_id,)).fetchone()
-        if not user or not user['is_admin']:
-            return jsonify({'error': 'Admin access required'}), 403
-        
-        # Generate swap statistics report
-        output = io.StringIO()
-        writer = csv.writer(output)
-        
-        # Write header
-        writer.writerow(['Swap Request ID', 'Requester Name', 'Provider Name', 'Offered Skill', 'Wanted Skill', 'Status', 'Created Date', 'Completed Date', 'Rating Given', 'Rating Received'])
-        
-        # Get all swap requests with details
-        swaps = conn.execute('''
-            SELECT sr.*,
-                   u1.name as requester_name,
-                   u2.name as provider_name,
-                   s1.skill_name as offered_skill_name,
-                   s2.skill_name as wanted_skill_name,
-                   r1.rating as rating_given,
-                   r2.rating as rating_received
-            FROM swap_requests sr
-            JOIN users u1 ON sr.requester_id = u1.id
-            JOIN users u2 ON sr.provider_id = u2.id
-            JOIN skills s1 ON sr.offered_skill_id = s1.id
-            JOIN skills s2 ON sr.wanted_skill_id = s2.id
-            LEFT JOIN ratings r1 ON sr.id = r1.swap_request_id AND r1.rater_id = sr.requester_id
-            LEFT JOIN ratings r2 ON sr.id = r2.swap_request_id AND r2.rater_id = sr.provider_id
-            ORDER BY sr.created_at DESC
-        ''').fetchall()
+        limit = min(request.args.get('limit', 20, type=int), app.config['MAX_PER_PAGE'])
+        jobs = conn.execute('SELECT * FROM export_jobs ORDER BY id DESC LIMIT ?', (limit,)).fetchall()
         
-        for swap in swaps:
-            writer.writerow([
-                swap['id'],
-                swap['requester_name'],
-                swap['provider_name'],
-                swap['offered_skill_name'],
-                swap['wanted_skill_name'],
-                swap['status'],
-                swap['created_at'],
-                swap['completed_at'] or '',
-                swap['rating_given'] or '',
-                swap['rating_received'] or ''
-            ])
-        
-        conn.close()
-        
-        # Create file response
-        output.seek(0)
-        return send_file(
-            io.BytesIO(output.getvalue().encode('utf-8')),
-            mimetype='text/csv',
-            as_attachment=True,
-            download_name=f'swap_stats_report_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv'
-        )
+        return jsonify({'jobs': [export_job_dict(job) for job in jobs]}), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-@app.route('/api/admin/download/users', methods=['GET'])
-@jwt_required()
-def download_users():
-    """Download all users data as CSV"""
+@app.route('/api/admin/exports/<int:job_id>', methods=['GET'])
+@admin_required
+def get_export(job_id):
+    """Get the status and progress of an export job"""
     try:
-        user_id = get_jwt_identity()
         conn = get_db()
         
-        # Check if user is admin
-        user = conn.execute('SELECT is_admin FROM users WHERE id = ?', (user_id,)).fetchone()
-        if not user or not user['is_admin']:
-            return jsonify({'error': 'Admin access required'}), 403
+        job = conn.execute('SELECT * FROM export_jobs WHERE id = ?', (job_id,)).fetchone()
+        if not job:
+            return jsonify({'error': 'Export job not found'}), 404
+        
+        return jsonify({'job': export_job_dict(job)}), 200
         
-        # Generate users report
-        output = io.StringIO()
-        writer = csv.writer(output)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/admin/exports/<int:job_id>/download', methods=['GET'])
+@admin_required
+def download_export(job_id):
+    """Download a finished export. Supports conditional and Range requests."""
+    try:
+        conn = get_db()
         
-        # Write header
-        writer.writerow(['User ID', 'Name', 'Email', 'Location', 'Bio', 'Registration Date', 'Last Login', 'Is Admin', 'Is Banned', 'Is Under Supervision', 'Profile Photo'])
+        job = conn.execute('SELECT * FROM export_jobs WHERE id = ?', (job_id,)).fetchone()
+        if not job:
+            return jsonify({'error': 'Export job not found'}), 404
+        if job['status'] != 'completed':
+            return jsonify({'error': f"Export is {job['status']}"}), 409
         
-        # Get all users
-        users = conn.execute('''
-            SELECT * FROM users ORDER BY created_at DESC
-        ''').fetchall()
+        path = os.path.join(app.config['EXPORT_FOLDER'], job['file_name'])
+        if not os.path.exists(path):
+            return jsonify({'error': 'Export file no longer exists'}), 410
         
-        for user in users:
-            writer.writerow([
-                user['id'],
-                user['name'],
-                user['email'],
-                user['location'] or '',
-                user['bio'] or '',
-                user['created_at'],
-                user['last_login'] or '',
-                user['is_admin'],
-                user['is_banned'],
-                user['is_under_supervision'],
-                user['profile_photo'] or ''
-            ])
-        
-        conn.close()
-        
-        # Create file response
-        output.seek(0)
         return send_file(
-            io.BytesIO(output.getvalue().encode('utf-8')),
-            mimetype='text/csv',
+            os.path.abspath(path),
+            mimetype='application/gzip' if job['compress'] else 'text/csv',
             as_attachment=True,
-            download_name=f'users_report_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv'
+            download_name=job['file_name'],
+            conditional=True
         )
         
     except Exception as e:
@@ -2509,7 +5227,7 @@ def download_users():
 def resubmit_skill(skill_id):
     """Resubmit a rejected skill for review"""
     try:
-        user_id = get_jwt_identity()
+        user_id = int(get_jwt_identity())
         conn = get_db()
         
         # Check if the skill belongs to the current user and is rejected
@@ -2524,8 +5242,8 @@ def resubmit_skill(skill_id):
             return jsonify({'error': 'Only rejected skills can be resubmitted'}), 400
         
         # Check if user is under supervision
-        user = conn.execute('SELECT is_under_supervision FROM users WHERE id = ?', (user_id,)).fetchone()
-        if user and user['is_under_supervision']:
+        status = get_user_status(user_id)
+        if status and status['is_under_supervision']:
             return jsonify({'error': 'You are currently under supervision and cannot resubmit skills'}), 403
         
         data = request.get_json()
@@ -2540,18 +5258,79 @@ def resubmit_skill(skill_id):
         conn.execute('''
             UPDATE skills 
             SET skill_name = ?, skill_type = ?, description = ?, is_rejected = 0, is_approved = 0, 
-                rejection_reason = NULL, rejected_at = NULL, updated_at = CURRENT_TIMESTAMP
+                rejection_reason = NULL, rejected_at = NULL
             WHERE id = ?
         ''', (skill_name, skill_type, description, skill_id))
+        adjust_user_stats(conn, skill['user_id'], pending_skills=1)
+        # Back in the review queue, so out of matching until approved again
+        unindex_skills(conn, [skill_id])
         
         conn.commit()
-        conn.close()
+        table_versions.bump('skills')
         
         return jsonify({'message': 'Skill resubmitted successfully for review'}), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+# Maintenance commands
+@app.cli.command('rebuild-user-stats')
+def rebuild_user_stats_command():
+    """Recompute user_stats from the source tables to repair drift"""
+    conn = db_pool.acquire()
+    try:
+        # Hold the write lock so no counter update lands between read and rewrite
+        conn.execute('BEGIN IMMEDIATE')
+        drifted = rebuild_user_stats(conn)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        db_pool.release(conn)
+    print(f'Rebuilt user_stats ({drifted} users had drifted)')
+
+@app.cli.command('rebuild-skill-index')
+def rebuild_skill_index_command():
+    """Re-derive the skill match index and match profiles, e.g. after changing
+    normalize_skill_name or availability_window"""
+    conn = db_pool.acquire()
+    try:
+        conn.execute('BEGIN IMMEDIATE')
+        indexed = rebuild_skill_index(conn)
+        profiled = rebuild_match_profiles(conn)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        db_pool.release(conn)
+    print(f'Rebuilt skill_index ({indexed} approved skills) and match_profiles ({profiled} users)')
+
+@app.cli.command('generate-thumbnails')
+def generate_thumbnails_command():
+    """Cut missing thumbnails for profile photos uploaded before resizing existed"""
+    conn = db_pool.acquire()
+    try:
+        photos = [row['profile_photo'] for row in conn.execute(
+            "SELECT DISTINCT profile_photo FROM users WHERE profile_photo IS NOT NULL AND profile_photo != ''"
+        ).fetchall()]
+    finally:
+        db_pool.release(conn)
+    
+    rendered = 0
+    for photo in photos:
+        if photo.startswith('http') or photo.startswith('/'):
+            continue
+        try:
+            rendered += photo_processor.render_thumbnails(photo)
+        except (OSError, ValueError) as e:
+            print(f'Skipped {photo}: {e}')
+    print(f'Generated {rendered} thumbnails for {len(photos)} photos')
+
 if __name__ == '__main__':
     init_db()
+    export_runner.recover()
+    export_runner.purge_expired()
+    fanout_runner.recover()
     app.run(debug=False, port=5000)
\ No newline at end of file
@@ -0,0 +1,125 @@
+"""Benchmark the user activity report against the query it replaced.
+
+The old query LEFT JOINed skills, three copies of swap_requests and ratings
+at once and used COUNT(DISTINCT ...) to undo the row explosion, so its cost
+grew with the product of each user's skills, swaps and ratings. The current
+one (USER_ACTIVITY_REPORT) reads the per-user counters and aggregates each
+table separately, so it stays linear. Both run on the same generated dataset
+and must produce the same rows.
+
+Run from the backend directory:
+
+    python tests/bench_user_activity_report.py --users 40 --skills 4 --swaps 6 --ratings 5
+    python tests/bench_user_activity_report.py --users 5000 --skills 10 --swaps 20 --ratings 16 --skip-legacy
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+WORK_DIR = tempfile.mkdtemp(prefix='skillswap-bench-')
+os.environ['SKILLSWAP_DATABASE'] = os.path.join(WORK_DIR, 'skill_swap.db')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.chdir(WORK_DIR)
+
+import app as skillswap  # noqa: E402
+
+# The report query before it was rewritten, kept for comparison
+LEGACY_QUERY = '''
+    SELECT u.*,
+           COUNT(DISTINCT s.id) as skills_count,
+           COUNT(DISTINCT sr1.id) as requests_sent,
+           COUNT(DISTINCT sr2.id) as requests_received,
+           COUNT(DISTINCT sr3.id) as completed_swaps,
+           AVG(r.rating) as avg_rating
+    FROM users u
+    LEFT JOIN skills s ON u.id = s.user_id AND s.is_approved = 1
+    LEFT JOIN swap_requests sr1 ON u.id = sr1.requester_id
+    LEFT JOIN swap_requests sr2 ON u.id = sr2.provider_id
+    LEFT JOIN swap_requests sr3 ON (u.id = sr3.requester_id OR u.id = sr3.provider_id) AND sr3.status = 'accepted'
+    LEFT JOIN ratings r ON u.id = r.rated_id
+    WHERE u.is_admin = 0
+    GROUP BY u.id
+    ORDER BY u.created_at DESC
+'''
+
+COMPARED_COLUMNS = ('id', 'skills_count', 'requests_sent', 'requests_received', 'completed_swaps')
+
+
+def generate(conn, users, skills, swaps, ratings, seed=0):
+    """Fill the database with ``users`` users, each owning ``skills`` approved
+    skills, sending ``swaps`` requests and receiving ``ratings`` ratings"""
+    rnd = random.Random(seed)
+    # Distinct registration times keep the report order deterministic
+    registered = datetime(2025, 1, 1)
+    conn.executemany('INSERT INTO users (email, password_hash, name, created_at) VALUES (?, ?, ?, ?)', [
+        (f'user{i}@example.com', 'x', f'User {i}', (registered + timedelta(minutes=i)).strftime('%Y-%m-%d %H:%M:%S'))
+        for i in range(users)
+    ])
+    ids = [row[0] for row in conn.execute('SELECT id FROM users WHERE is_admin = 0')]
+
+    # Swap partners are always someone else, as send_swap_request() enforces
+    def partner(user_id):
+        other = user_id
+        while other == user_id:
+            other = rnd.choice(ids)
+        return other
+
+    conn.executemany('''
+        INSERT INTO skills (user_id, skill_name, skill_type, is_approved) VALUES (?, ?, ?, 1)
+    ''', [(user_id, f'Skill {n}', rnd.choice(['offered', 'wanted'])) for user_id in ids for n in range(skills)])
+    conn.executemany('''
+        INSERT INTO swap_requests (requester_id, provider_id, offered_skill_id, wanted_skill_id, status)
+        VALUES (?, ?, 1, 1, ?)
+    ''', [(user_id, partner(user_id), rnd.choice(['accepted', 'pending', 'rejected']))
+          for user_id in ids for _ in range(swaps)])
+    conn.executemany('INSERT INTO ratings (swap_request_id, rater_id, rated_id, rating) VALUES (1, ?, ?, ?)',
+                     [(partner(user_id), user_id, rnd.randint(1, 5)) for user_id in ids for _ in range(ratings)])
+    # The report reads the materialised counters, which the app would have
+    # kept up to date as these rows were written
+    skillswap.rebuild_user_stats(conn.cursor())
+    conn.commit()
+
+
+def run(conn, query):
+    started = time.perf_counter()
+    rows = conn.execute(query).fetchall()
+    elapsed = time.perf_counter() - started
+    return elapsed, [tuple(row[column] for column in COMPARED_COLUMNS) + (round(row['avg_rating'] or 0, 9),)
+                     for row in rows]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=40, help='at least two, so swaps have a partner')
+    parser.add_argument('--skills', type=int, default=4, help='approved skills per user')
+    parser.add_argument('--swaps', type=int, default=6, help='swap requests sent per user')
+    parser.add_argument('--ratings', type=int, default=5, help='ratings received per user')
+    parser.add_argument('--skip-legacy', action='store_true', help='only time the current query')
+    args = parser.parse_args()
+
+    skillswap.init_db()
+    conn = sqlite3.connect(skillswap.app.config['DATABASE'])
+    conn.row_factory = sqlite3.Row
+    generate(conn, args.users, args.skills, args.swaps, args.ratings)
+
+    print(f'{args.users} users x {args.skills} skills x {args.swaps} swaps x {args.ratings} ratings')
+    current_time, current_rows = run(conn, skillswap.USER_ACTIVITY_REPORT['query'])
+    print(f'current: {current_time:.3f}s, {len(current_rows)} rows')
+    if not args.skip_legacy:
+        legacy_time, legacy_rows = run(conn, LEGACY_QUERY)
+        print(f'legacy:  {legacy_time:.3f}s, {len(legacy_rows)} rows')
+        print(f'speed-up: {legacy_time / max(current_time, 1e-9):.0f}x')
+        if legacy_rows != current_rows:
+            print('ROWS DIFFER')
+            return 1
+        print('rows identical')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,16 @@
+"""Shared setup for the tests: point the app at a throwaway database.
+
+app.py creates its upload and export folders relative to the working
+directory and reads the database path at import time, so every test module
+imports the app through here.
+"""
+import os
+import sys
+import tempfile
+
+WORK_DIR = tempfile.mkdtemp(prefix='skillswap-tests-')
+os.environ['SKILLSWAP_DATABASE'] = os.path.join(WORK_DIR, 'skill_swap.db')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.chdir(WORK_DIR)
+
+import app as skillswap  # noqa: E402,F401
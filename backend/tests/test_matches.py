@@ -0,0 +1,86 @@
+"""Check the ranking of /api/matches through the HTTP API.
+
+Run from the backend directory with
+
+    python -m unittest discover tests
+"""
+import sqlite3
+import unittest
+
+from support import skillswap
+
+
+class MatchRankingTests(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        skillswap.init_db()
+        cls.client = skillswap.app.test_client()
+        response = cls.client.post('/api/auth/login', json={'email': 'admin@skillswap.com', 'password': 'admin123'})
+        cls.admin = {'Authorization': 'Bearer ' + response.get_json()['access_token']}
+
+    def add_user(self, email, location, days, start_time, end_time, offered, wanted):
+        response = self.client.post('/api/auth/register', json={
+            'email': email, 'password': 'secret', 'name': email.split('@')[0], 'location': location
+        })
+        self.assertEqual(response.status_code, 201, response.get_json())
+        headers = {'Authorization': 'Bearer ' + response.get_json()['access_token']}
+        response = self.client.put('/api/profile', json={
+            'name': email.split('@')[0], 'location': location, 'availability_days': days,
+            'start_time': start_time, 'end_time': end_time
+        }, headers=headers)
+        self.assertEqual(response.status_code, 200, response.get_json())
+        for skill_name, skill_type in [(offered, 'offered'), (wanted, 'wanted')]:
+            response = self.client.post('/api/skills', json={'skill_name': skill_name, 'skill_type': skill_type},
+                                        headers=headers)
+            self.assertEqual(response.status_code, 201, response.get_json())
+        return headers, self.user_id(email)
+
+    def user_id(self, email):
+        conn = sqlite3.connect(skillswap.app.config['DATABASE'])
+        try:
+            return conn.execute('SELECT id FROM users WHERE email = ?', (email,)).fetchone()[0]
+        finally:
+            conn.close()
+
+    def approve_all_skills(self):
+        conn = sqlite3.connect(skillswap.app.config['DATABASE'])
+        try:
+            skill_ids = [row[0] for row in conn.execute('SELECT id FROM skills WHERE is_approved = 0')]
+        finally:
+            conn.close()
+        response = self.client.post('/api/admin/skills/bulk', json={'action': 'approve', 'skill_ids': skill_ids},
+                                    headers=self.admin)
+        self.assertEqual(response.status_code, 200, response.get_json())
+
+    def test_matches_are_ranked_and_paged_by_score(self):
+        me, _ = self.add_user('me@example.com', 'Paris North', ['monday', 'tuesday'], '09:00', '17:00',
+                              'Python', 'Guitar')
+        _, neighbour = self.add_user('neighbour@example.com', 'Paris North', ['monday', 'tuesday'], '09:00', '17:00',
+                                     'Guitar lessons', 'Advanced Python')
+        _, same_city = self.add_user('city@example.com', 'Paris South', ['tuesday'], '13:00', '21:00',
+                                     'guitar', 'python')
+        _, far_away = self.add_user('far@example.com', 'Lyon', ['sunday'], '09:00', '17:00', 'Guitar', 'Python')
+        self.add_user('unrelated@example.com', 'Paris North', ['monday'], '09:00', '17:00', 'Cooking', 'French')
+        self.approve_all_skills()
+
+        response = self.client.get('/api/matches', headers=me)
+        self.assertEqual(response.status_code, 200, response.get_json())
+        matches = response.get_json()['matches']
+        self.assertEqual([match['user']['id'] for match in matches], [neighbour, same_city, far_away])
+        self.assertEqual(matches[0]['score_breakdown'], {'skills': 1.0, 'rating': 0.6, 'availability': 1.0, 'location': 1.0})
+        self.assertEqual(matches[1]['score_breakdown']['availability'], 0.5)
+        self.assertEqual(matches[1]['score_breakdown']['location'], 0.5)
+        self.assertEqual(matches[2]['score_breakdown']['availability'], 0.0)
+        self.assertEqual(matches[2]['score_breakdown']['location'], 0.0)
+
+        response = self.client.get('/api/matches?per_page=2&page=2', headers=me)
+        self.assertEqual([match['user']['id'] for match in response.get_json()['matches']], [far_away])
+        self.assertEqual(response.get_json()['pagination']['total'], 3)
+        response = self.client.get('/api/matches?per_page=2&page=5', headers=me)
+        self.assertEqual(response.get_json()['matches'], [])
+        self.assertEqual(response.get_json()['pagination']['total'], 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
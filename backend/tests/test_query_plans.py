@@ -0,0 +1,123 @@
+"""Check that the hot queries are answered from the secondary indexes.
+
+Each case runs EXPLAIN QUERY PLAN against a freshly migrated database and
+asserts which index SQLite picks, so a migration or query change that falls
+back to a full table scan fails here. Run from the backend directory with
+
+    python -m unittest discover tests
+"""
+import sqlite3
+import unittest
+
+from support import skillswap
+
+# (description, query, params, table, indexes the table must be searched with)
+HOT_QUERIES = [
+    ('profile skills by owner and type',
+     "SELECT * FROM skills WHERE user_id = ? AND skill_type = 'offered' AND is_rejected = 0",
+     (1,), 'skills', 'idx_skills_user_type'),
+    ('sent swap requests, newest first',
+     'SELECT * FROM swap_requests WHERE requester_id = ? ORDER BY created_at DESC',
+     (1,), 'swap_requests', 'idx_swap_requests_requester'),
+    ('received swap requests, newest first',
+     'SELECT * FROM swap_requests WHERE provider_id = ? ORDER BY created_at DESC',
+     (1,), 'swap_requests', 'idx_swap_requests_provider'),
+    ('swap counts by status',
+     "SELECT COUNT(*) FROM swap_requests WHERE status = 'pending'",
+     (), 'swap_requests', 'idx_swap_requests_status'),
+    ('per-user rating aggregate',
+     'SELECT AVG(rating), COUNT(*) FROM ratings WHERE rated_id = ?',
+     (1,), 'ratings', 'idx_ratings_rated'),
+    ('already-rated check',
+     'SELECT id FROM ratings WHERE swap_request_id = ? AND rater_id = ?',
+     (1, 1), 'ratings', 'idx_ratings_swap_rater'),
+    ('unread notification count',
+     'SELECT COUNT(*) FROM notifications WHERE user_id = ? AND is_read = 0',
+     (1,), 'notifications', 'idx_notifications_user_read'),
+    ('chat history page',
+     'SELECT * FROM chat_messages WHERE conversation_id = ? AND id < ? ORDER BY id DESC LIMIT ?',
+     (1, 100, 51), 'chat_messages', 'idx_chat_messages_conversation_id'),
+    ('chat inbox, most recent first',
+     'SELECT * FROM chat_inbox WHERE user_id = ? ORDER BY last_message_at DESC, last_message_id DESC',
+     (1,), 'chat_inbox', 'idx_chat_inbox_user_recent'),
+    ('admin user search by name or email prefix',
+     "SELECT * FROM users WHERE name LIKE ? ESCAPE '\\' OR email LIKE ? ESCAPE '\\'",
+     ('ann%', 'ann%'), 'users', ('idx_users_name_nocase', 'idx_users_email_nocase')),
+    ('skill moderation queue',
+     'SELECT * FROM skills WHERE is_approved = 0 AND is_rejected = 0 ORDER BY created_at DESC',
+     (), 'skills', 'idx_skills_review'),
+    ('skill match index by term',
+     "SELECT user_id FROM skill_index WHERE term = ? AND skill_type = 'offered'",
+     ('python',), 'skill_index', 'idx_skill_index_term'),
+]
+
+
+def query_plan(conn, query, params=()):
+    return [row[3] for row in conn.execute(f'EXPLAIN QUERY PLAN {query}', params).fetchall()]
+
+
+class QueryPlanTests(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        skillswap.init_db()
+        cls.conn = sqlite3.connect(skillswap.app.config['DATABASE'])
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.conn.close()
+
+    def test_migrations_are_recorded_once(self):
+        latest = max(version for version, _, _ in skillswap.MIGRATIONS)
+        self.assertEqual(skillswap.get_schema_version(self.conn), latest)
+        self.assertEqual(skillswap.run_migrations(self.conn), [])
+
+    def test_hot_queries_use_their_index(self):
+        for description, query, params, table, indexes in HOT_QUERIES:
+            with self.subTest(description):
+                plan = query_plan(self.conn, query, params)
+                for index in ([indexes] if isinstance(indexes, str) else indexes):
+                    self.assertTrue(
+                        any(step.startswith(f'SEARCH {table} ') and f' {index} ' in step for step in plan),
+                        f'{table} is not searched with {index}: {plan}'
+                    )
+                self.assertFalse(
+                    any(step == f'SCAN {table}' for step in plan),
+                    f'{table} is scanned: {plan}'
+                )
+
+    def test_swap_lists_need_no_sort(self):
+        plan = query_plan(self.conn, '''
+            SELECT sr.*, u.name FROM swap_requests sr JOIN users u ON sr.provider_id = u.id
+            WHERE sr.requester_id = ? ORDER BY sr.created_at DESC
+        ''', (1,))
+        self.assertFalse(any('TEMP B-TREE' in step for step in plan), plan)
+
+    def test_user_search_is_driven_by_the_matches(self):
+        match_query, match_params = skillswap.skill_match_subquery(
+            self.conn, 'ann', columns=('skill_name', 'user_name'))
+        plan = query_plan(self.conn, f'''
+            SELECT * FROM users WHERE is_public = 1 AND is_banned = 0 AND +is_admin = 0 AND id IN (
+                SELECT id FROM users WHERE name LIKE ? ESCAPE '\\'
+                UNION
+                SELECT s.user_id FROM skills s JOIN ({match_query}) m ON m.skill_id = s.id
+                WHERE s.is_rejected = 0
+            )
+            ORDER BY is_under_supervision ASC, created_at DESC, id DESC LIMIT 6
+        ''', [skillswap.like_prefix('ann')] + match_params)
+        self.assertIn('SEARCH users USING INTEGER PRIMARY KEY (rowid=?)', plan)
+        self.assertIn('SEARCH users USING COVERING INDEX idx_users_name_nocase (name>? AND name<?)', plan)
+
+    def test_reciprocal_match_join_stays_on_the_index(self):
+        plan = query_plan(self.conn, '''
+            SELECT theirs.user_id FROM skill_index mine
+            JOIN skill_index theirs ON theirs.term = mine.term
+                AND theirs.skill_type = CASE mine.skill_type WHEN 'offered' THEN 'wanted' ELSE 'offered' END
+            WHERE mine.user_id = ? AND theirs.user_id != ?
+        ''', (1, 1))
+        self.assertIn('SEARCH mine USING COVERING INDEX idx_skill_index_user (user_id=?)', plan)
+        self.assertIn('SEARCH theirs USING COVERING INDEX idx_skill_index_term (term=? AND skill_type=?)', plan)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+"""Exercise the swap request flow through the HTTP API.
+
+Run from the backend directory with
+
+    python -m unittest discover tests
+"""
+import csv
+import io
+import sqlite3
+import unittest
+
+from support import skillswap
+
+
+class SwapRequestTests(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        skillswap.init_db()
+        cls.client = skillswap.app.test_client()
+        cls.admin = cls.login('admin@skillswap.com', 'admin123')
+
+    @classmethod
+    def login(cls, email, password):
+        response = cls.client.post('/api/auth/login', json={'email': email, 'password': password})
+        return {'Authorization': 'Bearer ' + response.get_json()['access_token']}
+
+    def register(self, email, name):
+        response = self.client.post('/api/auth/register', json={
+            'email': email, 'password': 'secret', 'name': name, 'location': 'Town'
+        })
+        self.assertEqual(response.status_code, 201, response.get_json())
+        return {'Authorization': 'Bearer ' + response.get_json()['access_token']}
+
+    def add_approved_skill(self, headers, skill_name, skill_type):
+        response = self.client.post('/api/skills', json={'skill_name': skill_name, 'skill_type': skill_type},
+                                    headers=headers)
+        self.assertEqual(response.status_code, 201, response.get_json())
+        skill_id = self.query('SELECT MAX(id) AS id FROM skills')['id']
+        self.assertEqual(self.client.post(f'/api/admin/approve_skill/{skill_id}', headers=self.admin).status_code, 200)
+        return skill_id
+
+    def query(self, query, params=()):
+        conn = sqlite3.connect(skillswap.app.config['DATABASE'])
+        conn.row_factory = sqlite3.Row
+        try:
+            return conn.execute(query, params).fetchone()
+        finally:
+            conn.close()
+
+    def swap_request(self, request_id):
+        return self.query('SELECT * FROM swap_requests WHERE id = ?', (request_id,))
+
+    def test_accepting_a_request_records_when_it_completed(self):
+        requester = self.register('requester@example.com', 'Requester')
+        provider = self.register('provider@example.com', 'Provider')
+        offered_skill_id = self.add_approved_skill(requester, 'Python', 'offered')
+        wanted_skill_id = self.add_approved_skill(provider, 'Guitar', 'offered')
+
+        response = self.client.post('/api/swap/send_request', json={
+            'skill_id': wanted_skill_id, 'offered_skill_id': offered_skill_id, 'message': 'Swap?'
+        }, headers=requester)
+        self.assertEqual(response.status_code, 200, response.get_json())
+        request_id = self.query('SELECT MAX(id) AS id FROM swap_requests')['id']
+        self.assertIsNone(self.swap_request(request_id)['completed_at'])
+
+        response = self.client.post(f'/api/swap/respond/{request_id}/accept', headers=provider)
+        self.assertEqual(response.status_code, 200, response.get_json())
+        completed_at = self.swap_request(request_id)['completed_at']
+        self.assertIsNotNone(completed_at)
+
+        response = self.client.get('/api/admin/download/swap_stats', headers=self.admin)
+        self.assertEqual(response.status_code, 200)
+        rows = list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+        row = next(row for row in rows if row['Swap Request ID'] == str(request_id))
+        self.assertEqual(row['Status'], 'accepted')
+        self.assertEqual(row['Completed Date'], completed_at)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,7 +1,8 @@
 import React, { useState, useEffect, useRef, useCallback } from 'react';
 import { useAuth } from '../contexts/AuthContext';
 import { useNotification } from '../contexts/NotificationContext';
-import { getProfilePhotoUrl, handleImageError, handleImageLoad } from '../utils/photoUtils';
+import { PHOTO_SIZES, getProfilePhotoUrl, handleImageError, handleImageLoad } from '../utils/photoUtils';
+import { subscribeToEvents } from '../utils/eventStream';
 import axios from 'axios';
 
 const Chat = () => {
@@ -11,6 +12,7 @@ const Chat = () => {
   const [unreadCount, setUnreadCount] = useState(0);
   const [selectedConversation, setSelectedConversation] = useState(null);
   const [newMessage, setNewMessage] = useState('');
+  const [inboxVersion, setInboxVersion] = useState(0);
   const messagesEndRef = useRef(null);
 
   const fetchUnreadCount = useCallback(async () => {
@@ -37,12 +39,29 @@ const Chat = () => {
     // Fetch immediately
     fetchUnreadCount();
 
-    // Poll for unread count every 10 seconds
-    const interval = setInterval(fetchUnreadCount, 10000);
+    // New messages are pushed; poll slowly in case the stream drops
+    const interval = setInterval(fetchUnreadCount, 60000);
 
     return () => clearInterval(interval);
   }, [fetchUnreadCount]);
 
+  // Listen for pushed chat messages
+  useEffect(() => {
+    if (!user) return undefined;
+
+    return subscribeToEvents({
+      chat_message: (message) => {
+        fetchUnreadCount();
+        setInboxVersion(version => version + 1);
+        setSelectedConversation(prev => {
+          if (!prev || prev.id !== message.conversation_id) return prev;
+          if (prev.messages.some(existing => existing.id === message.id)) return prev;
+          return { ...prev, messages: [...prev.messages, message] };
+        });
+      }
+    });
+  }, [user, fetchUnreadCount]);
+
   // Don't render chat if user is not logged in
   if (!user) return null;
 
@@ -145,6 +164,7 @@ const Chat = () => {
                 setUnreadCount={setUnreadCount}
                 unreadCount={unreadCount}
                 fetchUnreadCount={fetchUnreadCount}
+                inboxVersion={inboxVersion}
               />
             )}
             {activeTab === 'users' && (
@@ -171,7 +191,8 @@ const ConversationsTab = ({
   messagesEndRef,
   setUnreadCount,
   unreadCount,
-  fetchUnreadCount
+  fetchUnreadCount,
+  inboxVersion
 }) => {
   const { user } = useAuth();
   const [conversations, setConversations] = useState([]);
@@ -195,15 +216,22 @@ const ConversationsTab = ({
     fetchConversations();
     fetchUnreadCount();
     
-    // Poll for new messages every 5 seconds
+    // New messages are pushed; poll slowly in case the stream drops
     const interval = setInterval(() => {
       fetchConversations();
       fetchUnreadCount();
-    }, 5000);
+    }, 60000);
 
     return () => clearInterval(interval);
   }, [fetchConversations, fetchUnreadCount]);
 
+  // Refresh the inbox whenever a message is pushed
+  useEffect(() => {
+    if (inboxVersion > 0) {
+      fetchConversations();
+    }
+  }, [inboxVersion, fetchConversations]);
+
   const handleSendMessage = async (e) => {
     e.preventDefault();
     if (!newMessage.trim() || sending) return;
@@ -234,6 +262,26 @@ const ConversationsTab = ({
     }
   };
 
+  const loadEarlierMessages = async () => {
+    const oldestMessage = selectedConversation.messages[0];
+    if (!oldestMessage) return;
+
+    try {
+      const response = await axios.get(`/api/chat/conversation/${selectedConversation.id}`, {
+        params: { before_id: oldestMessage.id }
+      });
+      // Prepend the older window to the messages already shown
+      setSelectedConversation(prev => ({
+        ...prev,
+        messages: [...(response.data.messages || []), ...prev.messages],
+        has_more: response.data.has_more
+      }));
+      fetchUnreadCount();
+    } catch (error) {
+      showError('Failed to load earlier messages');
+    }
+  };
+
   const formatTime = (timestamp) => {
     if (!timestamp) return 'Unknown time';
     
@@ -317,7 +365,7 @@ const ConversationsTab = ({
           </button>
           <div className="conversation-user-info">
             <img
-              src={getProfilePhotoUrl(selectedConversation.other_user_photo)}
+              src={getProfilePhotoUrl(selectedConversation.other_user_photo, PHOTO_SIZES.medium)}
               alt={selectedConversation.other_user_name}
               className="conversation-avatar"
               onError={handleImageError}
@@ -335,6 +383,13 @@ const ConversationsTab = ({
         </div>
 
         <div className="messages-container">
+          {selectedConversation.has_more && (
+            <div className="text-center mb-2">
+              <button className="btn btn-link btn-sm" onClick={loadEarlierMessages}>
+                Load earlier messages
+              </button>
+            </div>
+          )}
           {selectedConversation.messages.map(message => (
             <div 
               key={message.id} 
@@ -408,7 +463,8 @@ const ConversationsTab = ({
                   const response = await axios.get(`/api/chat/conversation/${conversation.id}`);
                   const conversationData = {
                     ...response.data.conversation,
-                    messages: response.data.messages || []
+                    messages: response.data.messages || [],
+                    has_more: response.data.has_more
                   };
                   setSelectedConversation(conversationData);
                   // Refresh unread count after selecting conversation (messages are marked as read)
@@ -420,7 +476,7 @@ const ConversationsTab = ({
               }}
             >
               <img
-                src={getProfilePhotoUrl(conversation.other_user_photo)}
+                src={getProfilePhotoUrl(conversation.other_user_photo, PHOTO_SIZES.medium)}
                 alt={conversation.other_user_name}
                 className="conversation-avatar"
                 onError={handleImageError}
@@ -485,7 +541,8 @@ const UsersTab = ({ setSelectedConversation, setActiveTab, fetchUnreadCount }) =
       // Combine conversation and messages into a single object
       const conversationData = {
         ...convResponse.data.conversation,
-        messages: convResponse.data.messages || []
+        messages: convResponse.data.messages || [],
+        has_more: convResponse.data.has_more
       };
       
       setSelectedConversation(conversationData);
@@ -517,7 +574,7 @@ const UsersTab = ({ setSelectedConversation, setActiveTab, fetchUnreadCount }) =
         {users.map(user => (
           <div key={user.id} className="user-item">
             <img
-              src={getProfilePhotoUrl(user.profile_photo)}
+              src={getProfilePhotoUrl(user.profile_photo, PHOTO_SIZES.medium)}
               alt={user.name}
               className="user-avatar"
               onError={handleImageError}
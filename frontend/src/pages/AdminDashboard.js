@@ -26,17 +26,11 @@ const AdminDashboard = () => {
     try {
       setLoading(true);
       
-      // Fetch statistics
-      const statsResponse = await axios.get('/api/admin/stats');
-      setStats(statsResponse.data.stats);
-      
-      // Fetch recent users
-      const usersResponse = await axios.get('/api/admin/recent_users');
-      setRecentUsers(usersResponse.data.users);
-      
-      // Fetch recent swaps
-      const swapsResponse = await axios.get('/api/admin/recent_swaps');
-      setRecentSwaps(swapsResponse.data.swaps);
+      // Fetch statistics, recent users and recent swaps in one request
+      const response = await axios.get('/api/admin/dashboard');
+      setStats(response.data.stats);
+      setRecentUsers(response.data.recent_users);
+      setRecentSwaps(response.data.recent_swaps);
       
     } catch (error) {
       console.error('Error fetching dashboard data:', error);
@@ -48,14 +42,26 @@ const AdminDashboard = () => {
 
   const downloadReport = async (reportType) => {
     try {
-      const response = await axios.get(`/api/admin/download/${reportType}`, {
+      // Reports are generated in the background; poll the job until the file is ready
+      const jobResponse = await axios.post('/api/admin/exports', { report: reportType });
+      let job = jobResponse.data.job;
+      while (job.status === 'queued' || job.status === 'running') {
+        await new Promise(resolve => setTimeout(resolve, 1000));
+        const statusResponse = await axios.get(`/api/admin/exports/${job.id}`);
+        job = statusResponse.data.job;
+      }
+      if (job.status !== 'completed') {
+        throw new Error(job.error || 'Export failed');
+      }
+      
+      const response = await axios.get(job.download_url, {
         responseType: 'blob'
       });
       
       const url = window.URL.createObjectURL(new Blob([response.data]));
       const link = document.createElement('a');
       link.href = url;
-      link.setAttribute('download', `${reportType}_report.csv`);
+      link.setAttribute('download', job.file_name);
       document.body.appendChild(link);
       link.click();
       link.remove();
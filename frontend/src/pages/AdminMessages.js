@@ -7,7 +7,10 @@ const AdminMessages = () => {
   const { user } = useAuth();
   const { showSuccess, showError } = useNotification();
   const [messages, setMessages] = useState([]);
-  const [users, setUsers] = useState([]);
+  const [pagination, setPagination] = useState({});
+  const [statusFilter, setStatusFilter] = useState('');
+  const [recipientQuery, setRecipientQuery] = useState('');
+  const [recipientResults, setRecipientResults] = useState([]);
   const [loading, setLoading] = useState(true);
   const [showQuickMessageModal, setShowQuickMessageModal] = useState(false);
   const [quickMessage, setQuickMessage] = useState({
@@ -16,23 +19,33 @@ const AdminMessages = () => {
     type: 'info'
   });
   const [selectedUsers, setSelectedUsers] = useState([]);
+  const [sendToAll, setSendToAll] = useState(false);
+  const [notifyUsers, setNotifyUsers] = useState(false);
   const [sending, setSending] = useState(false);
 
   useEffect(() => {
     if (user && user.is_admin) {
       fetchData();
     }
-  }, [user]);
+  }, [user, statusFilter]);
 
-  const fetchData = async () => {
+  useEffect(() => {
+    if (showQuickMessageModal) {
+      fetchRecipients();
+    }
+  }, [showQuickMessageModal, recipientQuery]);
+
+  const fetchData = async (page = 1) => {
     try {
-      setLoading(true);
-      const [messagesResponse, usersResponse] = await Promise.all([
-        axios.get('/api/admin/messages'),
-        axios.get('/api/admin/users')
-      ]);
-      setMessages(messagesResponse.data.messages);
-      setUsers(usersResponse.data.users);
+      const params = {
+        page,
+        per_page: 20,
+        ...(statusFilter && { status: statusFilter })
+      };
+
+      const response = await axios.get('/api/admin/messages', { params });
+      setMessages(response.data.messages);
+      setPagination(response.data.pagination);
     } catch (error) {
       console.error('Error fetching data:', error);
       showError('Failed to load data');
@@ -41,6 +54,17 @@ const AdminMessages = () => {
     }
   };
 
+  const fetchRecipients = async () => {
+    try {
+      const response = await axios.get('/api/admin/recipients', {
+        params: { q: recipientQuery, limit: 20 }
+      });
+      setRecipientResults(response.data.users);
+    } catch (error) {
+      console.error('Error fetching recipients:', error);
+    }
+  };
+
   const handleSendMessage = async (e) => {
     e.preventDefault();
     if (!quickMessage.title.trim() || !quickMessage.content.trim()) {
@@ -52,11 +76,13 @@ const AdminMessages = () => {
       setSending(true);
       await axios.post('/api/admin/send_message', {
         title: quickMessage.title,
-        content: quickMessage.content
+        content: quickMessage.content,
+        notify_users: notifyUsers
       });
-      showSuccess('Message sent successfully');
+      showSuccess(notifyUsers ? 'Message sent, notifying users in the background' : 'Message sent successfully');
       setQuickMessage({ title: '', content: '', type: 'info' });
-      fetchData(); // Refresh messages
+      setNotifyUsers(false);
+      fetchData(pagination.page); // Refresh messages
     } catch (error) {
       console.error('Error sending message:', error);
       showError('Failed to send message');
@@ -67,7 +93,7 @@ const AdminMessages = () => {
 
   const handleQuickMessage = async (e) => {
     e.preventDefault();
-    if (!quickMessage.title.trim() || !quickMessage.content.trim() || selectedUsers.length === 0) {
+    if (!quickMessage.title.trim() || !quickMessage.content.trim() || (!sendToAll && selectedUsers.length === 0)) {
       showError('Please fill in all required fields and select recipients');
       return;
     }
@@ -78,11 +104,13 @@ const AdminMessages = () => {
         quick_title: quickMessage.title,
         quick_content: quickMessage.content,
         quick_type: quickMessage.type,
-        recipients: selectedUsers
+        recipients: sendToAll ? 'all' : selectedUsers.map(userItem => userItem.id)
       });
-      showSuccess('Quick message sent successfully');
+      // Delivery is queued on the server and happens in batches
+      showSuccess('Quick message queued for delivery');
       setQuickMessage({ title: '', content: '', type: 'info' });
       setSelectedUsers([]);
+      setSendToAll(false);
       setShowQuickMessageModal(false);
     } catch (error) {
       console.error('Error sending quick message:', error);
@@ -96,7 +124,7 @@ const AdminMessages = () => {
     try {
       await axios.post(`/api/admin/toggle_message/${messageId}`);
       showSuccess('Message status updated successfully');
-      fetchData(); // Refresh messages
+      fetchData(pagination.page); // Refresh messages
     } catch (error) {
       console.error('Error toggling message:', error);
       showError('Failed to update message status');
@@ -111,23 +139,28 @@ const AdminMessages = () => {
     try {
       await axios.delete(`/api/admin/delete_message/${messageId}`);
       showSuccess('Message deleted successfully');
-      fetchData(); // Refresh messages
+      fetchData(pagination.page); // Refresh messages
     } catch (error) {
       console.error('Error deleting message:', error);
       showError('Failed to delete message');
     }
   };
 
-  const handleUserSelection = (userId) => {
+  const isSelected = (userId) => selectedUsers.some(userItem => userItem.id === userId);
+
+  const handleUserSelection = (recipient) => {
     setSelectedUsers(prev => 
-      prev.includes(userId) 
-        ? prev.filter(id => id !== userId)
-        : [...prev, userId]
+      prev.some(userItem => userItem.id === recipient.id)
+        ? prev.filter(userItem => userItem.id !== recipient.id)
+        : [...prev, recipient]
     );
   };
 
   const selectAllUsers = () => {
-    setSelectedUsers(users.map(user => user.id));
+    setSelectedUsers(prev => [
+      ...prev,
+      ...recipientResults.filter(recipient => !prev.some(userItem => userItem.id === recipient.id))
+    ]);
   };
 
   const clearAllUsers = () => {
@@ -233,6 +266,18 @@ const AdminMessages = () => {
                     />
                   </div>
                 </div>
+                <div className="form-check mb-4">
+                  <input
+                    className="form-check-input"
+                    type="checkbox"
+                    id="notify_users"
+                    checked={notifyUsers}
+                    onChange={(e) => setNotifyUsers(e.target.checked)}
+                  />
+                  <label className="form-check-label" htmlFor="notify_users">
+                    Also send as a notification to all users
+                  </label>
+                </div>
                 <div className="d-grid">
                   <button 
                     type="submit" 
@@ -263,6 +308,16 @@ const AdminMessages = () => {
               <h5 className="mb-0">
                 <i className="fas fa-list me-2"></i>All Messages
               </h5>
+              <select
+                className="form-select form-select-sm ms-auto me-2"
+                style={{width: 'auto'}}
+                value={statusFilter}
+                onChange={(e) => setStatusFilter(e.target.value)}
+              >
+                <option value="">All</option>
+                <option value="active">Active</option>
+                <option value="inactive">Inactive</option>
+              </select>
               <button 
                 className="btn btn-sm btn-light" 
                 onClick={() => setShowQuickMessageModal(true)}
@@ -349,6 +404,49 @@ const AdminMessages = () => {
                   <p>No messages found</p>
                 </div>
               )}
+
+              {/* Pagination */}
+              {pagination.pages > 1 && (
+                <nav className="mt-4">
+                  <ul className="pagination justify-content-center">
+                    <li className={`page-item ${!pagination.has_prev ? 'disabled' : ''}`}>
+                      <button 
+                        className="page-link"
+                        onClick={() => fetchData(pagination.page - 1)}
+                        disabled={!pagination.has_prev}
+                      >
+                        Previous
+                      </button>
+                    </li>
+                    
+                    {Array.from({ length: Math.min(5, pagination.pages) }, (_, i) => {
+                      const pageNum = Math.max(1, pagination.page - 2) + i;
+                      if (pageNum > pagination.pages) return null;
+                      
+                      return (
+                        <li key={pageNum} className={`page-item ${pageNum === pagination.page ? 'active' : ''}`}>
+                          <button 
+                            className="page-link"
+                            onClick={() => fetchData(pageNum)}
+                          >
+                            {pageNum}
+                          </button>
+                        </li>
+                      );
+                    })}
+                    
+                    <li className={`page-item ${!pagination.has_next ? 'disabled' : ''}`}>
+                      <button 
+                        className="page-link"
+                        onClick={() => fetchData(pagination.page + 1)}
+                        disabled={!pagination.has_next}
+                      >
+                        Next
+                      </button>
+                    </li>
+                  </ul>
+                </nav>
+              )}
             </div>
           </div>
         </div>
@@ -460,14 +558,47 @@ const AdminMessages = () => {
                   <div className="row g-3">
                     <div className="col-12 d-flex align-items-center justify-content-between">
                       <h6 className="mb-0"><i className="fas fa-users me-2"></i>Select Recipients</h6>
-                      <div>
-                        <button type="button" className="btn btn-sm btn-outline-secondary" onClick={selectAllUsers}>Select All</button>
-                        <button type="button" className="btn btn-sm btn-outline-secondary ms-2" onClick={clearAllUsers}>Clear</button>
+                      <div className="form-check mb-0">
+                        <input
+                          className="form-check-input"
+                          type="checkbox"
+                          id="send_to_all"
+                          checked={sendToAll}
+                          onChange={(e) => setSendToAll(e.target.checked)}
+                        />
+                        <label className="form-check-label" htmlFor="send_to_all">Send to all users</label>
                       </div>
+                      {!sendToAll && (
+                        <div>
+                          <button type="button" className="btn btn-sm btn-outline-secondary" onClick={selectAllUsers}>Select All</button>
+                          <button type="button" className="btn btn-sm btn-outline-secondary ms-2" onClick={clearAllUsers}>Clear</button>
+                        </div>
+                      )}
                     </div>
+                    {!sendToAll && (<>
+                    <div className="col-12">
+                      <input
+                        type="text"
+                        className="form-control"
+                        placeholder="Search users by name or email..."
+                        value={recipientQuery}
+                        onChange={(e) => setRecipientQuery(e.target.value)}
+                      />
+                    </div>
+                    {selectedUsers.length > 0 && (
+                      <div className="col-12">
+                        {selectedUsers.map(userItem => (
+                          <span key={userItem.id} className="badge bg-primary me-1 mb-1">
+                            {userItem.name}
+                            <i className="fas fa-times ms-1" style={{cursor: 'pointer'}}
+                               onClick={() => handleUserSelection(userItem)}></i>
+                          </span>
+                        ))}
+                      </div>
+                    )}
                     <div className="col-12">
                       <div className="row row-cols-1 row-cols-md-2 g-2" style={{maxHeight: '300px', overflow: 'auto'}}>
-                        {users.map(userItem => (
+                        {recipientResults.map(userItem => (
                           <div key={userItem.id} className="col">
                             <div className="form-check">
                               <input 
@@ -475,8 +606,8 @@ const AdminMessages = () => {
                                 type="checkbox" 
                                 value={userItem.id} 
                                 id={`user_${userItem.id}`}
-                                checked={selectedUsers.includes(userItem.id)}
-                                onChange={() => handleUserSelection(userItem.id)}
+                                checked={isSelected(userItem.id)}
+                                onChange={() => handleUserSelection(userItem)}
                               />
                               <label className="form-check-label" htmlFor={`user_${userItem.id}`}>
                                 {userItem.name} <small className="text-muted">({userItem.email})</small>
@@ -486,6 +617,7 @@ const AdminMessages = () => {
                         ))}
                       </div>
                     </div>
+                    </>)}
                   </div>
                 </div>
                 <div className="modal-footer">
@@ -11,18 +11,30 @@ const AdminSkills = () => {
   const [showRejectModal, setShowRejectModal] = useState(false);
   const [selectedSkill, setSelectedSkill] = useState(null);
   const [rejectionReason, setRejectionReason] = useState('');
+  const [searchQuery, setSearchQuery] = useState('');
+  const [statusFilter, setStatusFilter] = useState('');
+  const [typeFilter, setTypeFilter] = useState('');
+  const [pagination, setPagination] = useState({});
 
   useEffect(() => {
     if (user && user.is_admin) {
       fetchSkills();
     }
-  }, [user]);
+  }, [user, searchQuery, statusFilter, typeFilter]);
 
-  const fetchSkills = async () => {
+  const fetchSkills = async (page = 1) => {
     try {
-      setLoading(true);
-      const response = await axios.get('/api/admin/skills');
+      const params = {
+        page,
+        per_page: 20,
+        ...(searchQuery && { q: searchQuery }),
+        ...(statusFilter && { status: statusFilter }),
+        ...(typeFilter && { skill_type: typeFilter })
+      };
+
+      const response = await axios.get('/api/admin/skills', { params });
       setSkills(response.data.skills);
+      setPagination(response.data.pagination);
     } catch (error) {
       console.error('Error fetching skills:', error);
       showError('Failed to load skills');
@@ -35,7 +47,7 @@ const AdminSkills = () => {
     try {
       await axios.post(`/api/admin/approve_skill/${skillId}`);
       showSuccess('Skill approved successfully');
-      fetchSkills(); // Refresh the list
+      fetchSkills(pagination.page); // Refresh the current page
     } catch (error) {
       console.error('Error approving skill:', error);
       showError('Failed to approve skill');
@@ -57,7 +69,7 @@ const AdminSkills = () => {
       setShowRejectModal(false);
       setSelectedSkill(null);
       setRejectionReason('');
-      fetchSkills(); // Refresh the list
+      fetchSkills(pagination.page); // Refresh the current page
     } catch (error) {
       console.error('Error rejecting skill:', error);
       showError('Failed to reject skill');
@@ -86,12 +98,20 @@ const AdminSkills = () => {
     }
 
     try {
-      const pendingSkills = skills.filter(skill => !skill.is_approved);
-      for (const skill of pendingSkills) {
-        await axios.post(`/api/admin/approve_skill/${skill.id}`);
+      // Approving removes skills from the pending filter, so keep taking the first page
+      let approvedCount = 0;
+      while (true) {
+        const response = await axios.get('/api/admin/skills', { params: { status: 'pending', per_page: 50 } });
+        const pendingSkills = response.data.skills;
+        if (pendingSkills.length === 0) break;
+        const bulkResponse = await axios.post('/api/admin/skills/bulk', {
+          action: 'approve',
+          skill_ids: pendingSkills.map(skill => skill.id)
+        });
+        approvedCount += bulkResponse.data.summary.approved || 0;
       }
-      showSuccess(`Approved ${pendingSkills.length} skills successfully`);
-      fetchSkills(); // Refresh the list
+      showSuccess(`Approved ${approvedCount} skills successfully`);
+      fetchSkills(pagination.page); // Refresh the current page
     } catch (error) {
       console.error('Error approving all skills:', error);
       showError('Failed to approve all skills');
@@ -167,9 +187,47 @@ const AdminSkills = () => {
             <div className="card-header" style={{background: 'linear-gradient(135deg, var(--success) 0%, #059669 100%)', color: 'white', border: 'none'}}>
               <h5 className="mb-0">
                 <i className="fas fa-list me-2"></i>All Skills
+                {pagination.total !== undefined && (
+                  <span className="badge bg-light text-dark ms-2">{pagination.total}</span>
+                )}
               </h5>
             </div>
             <div className="card-body">
+              <div className="row g-3 mb-4">
+                <div className="col-md-6">
+                  <input
+                    type="text"
+                    className="form-control"
+                    placeholder="Search skills, descriptions or users..."
+                    value={searchQuery}
+                    onChange={(e) => setSearchQuery(e.target.value)}
+                  />
+                </div>
+                <div className="col-md-3">
+                  <select
+                    className="form-select"
+                    value={statusFilter}
+                    onChange={(e) => setStatusFilter(e.target.value)}
+                  >
+                    <option value="">All Statuses</option>
+                    <option value="pending">Pending</option>
+                    <option value="approved">Approved</option>
+                    <option value="rejected">Rejected</option>
+                  </select>
+                </div>
+                <div className="col-md-3">
+                  <select
+                    className="form-select"
+                    value={typeFilter}
+                    onChange={(e) => setTypeFilter(e.target.value)}
+                  >
+                    <option value="">All Types</option>
+                    <option value="offered">Offered</option>
+                    <option value="wanted">Wanted</option>
+                  </select>
+                </div>
+              </div>
+
               {skills.length > 0 ? (
                 <div className="table-responsive">
                   <table className="table table-hover" style={{borderRadius: 'var(--radius-lg)', overflow: 'hidden'}}>
@@ -257,6 +315,49 @@ const AdminSkills = () => {
                   <p>No skills found</p>
                 </div>
               )}
+
+              {/* Pagination */}
+              {pagination.pages > 1 && (
+                <nav className="mt-4">
+                  <ul className="pagination justify-content-center">
+                    <li className={`page-item ${!pagination.has_prev ? 'disabled' : ''}`}>
+                      <button 
+                        className="page-link"
+                        onClick={() => fetchSkills(pagination.page - 1)}
+                        disabled={!pagination.has_prev}
+                      >
+                        Previous
+                      </button>
+                    </li>
+                    
+                    {Array.from({ length: Math.min(5, pagination.pages) }, (_, i) => {
+                      const pageNum = Math.max(1, pagination.page - 2) + i;
+                      if (pageNum > pagination.pages) return null;
+                      
+                      return (
+                        <li key={pageNum} className={`page-item ${pageNum === pagination.page ? 'active' : ''}`}>
+                          <button 
+                            className="page-link"
+                            onClick={() => fetchSkills(pageNum)}
+                          >
+                            {pageNum}
+                          </button>
+                        </li>
+                      );
+                    })}
+                    
+                    <li className={`page-item ${!pagination.has_next ? 'disabled' : ''}`}>
+                      <button 
+                        className="page-link"
+                        onClick={() => fetchSkills(pagination.page + 1)}
+                        disabled={!pagination.has_next}
+                      >
+                        Next
+                      </button>
+                    </li>
+                  </ul>
+                </nav>
+              )}
             </div>
           </div>
         </div>
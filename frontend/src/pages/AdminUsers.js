@@ -8,18 +8,31 @@ const AdminUsers = () => {
   const { showSuccess, showError } = useNotification();
   const [users, setUsers] = useState([]);
   const [loading, setLoading] = useState(true);
+  const [searchQuery, setSearchQuery] = useState('');
+  const [statusFilter, setStatusFilter] = useState('');
+  const [sortBy, setSortBy] = useState('created_at');
+  const [pagination, setPagination] = useState({});
 
   useEffect(() => {
     if (user && user.is_admin) {
       fetchUsers();
     }
-  }, [user]);
+  }, [user, searchQuery, statusFilter, sortBy]);
 
-  const fetchUsers = async () => {
+  const fetchUsers = async (page = 1) => {
     try {
-      setLoading(true);
-      const response = await axios.get('/api/admin/users');
+      const params = {
+        page,
+        per_page: 20,
+        sort: sortBy,
+        order: sortBy === 'created_at' ? 'desc' : 'asc',
+        ...(searchQuery && { q: searchQuery }),
+        ...(statusFilter && { status: statusFilter })
+      };
+
+      const response = await axios.get('/api/admin/users', { params });
       setUsers(response.data.users);
+      setPagination(response.data.pagination);
     } catch (error) {
       console.error('Error fetching users:', error);
       showError('Failed to load users');
@@ -56,7 +69,7 @@ const AdminUsers = () => {
 
       await axios.post(endpoint);
       showSuccess(successMessage);
-      fetchUsers(); // Refresh the list
+      fetchUsers(pagination.page); // Refresh the current page
     } catch (error) {
       console.error(`Error ${action} user:`, error);
       showError(`Failed to ${action} user`);
@@ -152,9 +165,47 @@ const AdminUsers = () => {
             <div className="card-header" style={{background: 'linear-gradient(135deg, var(--primary) 0%, var(--primary-light) 100%)', color: 'white', border: 'none'}}>
               <h5 className="mb-0">
                 <i className="fas fa-list me-2"></i>All Users
+                {pagination.total !== undefined && (
+                  <span className="badge bg-light text-dark ms-2">{pagination.total}</span>
+                )}
               </h5>
             </div>
             <div className="card-body">
+              <div className="row g-3 mb-4">
+                <div className="col-md-6">
+                  <input
+                    type="text"
+                    className="form-control"
+                    placeholder="Search by name or email..."
+                    value={searchQuery}
+                    onChange={(e) => setSearchQuery(e.target.value)}
+                  />
+                </div>
+                <div className="col-md-3">
+                  <select
+                    className="form-select"
+                    value={statusFilter}
+                    onChange={(e) => setStatusFilter(e.target.value)}
+                  >
+                    <option value="">All Users</option>
+                    <option value="active">Active</option>
+                    <option value="banned">Banned</option>
+                    <option value="supervised">Under Supervision</option>
+                  </select>
+                </div>
+                <div className="col-md-3">
+                  <select
+                    className="form-select"
+                    value={sortBy}
+                    onChange={(e) => setSortBy(e.target.value)}
+                  >
+                    <option value="created_at">Newest First</option>
+                    <option value="name">Name</option>
+                    <option value="email">Email</option>
+                  </select>
+                </div>
+              </div>
+
               {users.length > 0 ? (
                 <div className="table-responsive">
                   <table className="table table-hover" style={{borderRadius: 'var(--radius-lg)', overflow: 'hidden'}}>
@@ -266,6 +317,49 @@ const AdminUsers = () => {
                   <p>No users found</p>
                 </div>
               )}
+
+              {/* Pagination */}
+              {pagination.pages > 1 && (
+                <nav className="mt-4">
+                  <ul className="pagination justify-content-center">
+                    <li className={`page-item ${!pagination.has_prev ? 'disabled' : ''}`}>
+                      <button 
+                        className="page-link"
+                        onClick={() => fetchUsers(pagination.page - 1)}
+                        disabled={!pagination.has_prev}
+                      >
+                        Previous
+                      </button>
+                    </li>
+                    
+                    {Array.from({ length: Math.min(5, pagination.pages) }, (_, i) => {
+                      const pageNum = Math.max(1, pagination.page - 2) + i;
+                      if (pageNum > pagination.pages) return null;
+                      
+                      return (
+                        <li key={pageNum} className={`page-item ${pageNum === pagination.page ? 'active' : ''}`}>
+                          <button 
+                            className="page-link"
+                            onClick={() => fetchUsers(pageNum)}
+                          >
+                            {pageNum}
+                          </button>
+                        </li>
+                      );
+                    })}
+                    
+                    <li className={`page-item ${!pagination.has_next ? 'disabled' : ''}`}>
+                      <button 
+                        className="page-link"
+                        onClick={() => fetchUsers(pagination.page + 1)}
+                        disabled={!pagination.has_next}
+                      >
+                        Next
+                      </button>
+                    </li>
+                  </ul>
+                </nav>
+              )}
             </div>
           </div>
         </div>
@@ -2,7 +2,7 @@ import React, { useState, useEffect } from 'react';
 import { Link } from 'react-router-dom';
 import { useAuth } from '../contexts/AuthContext';
 import { useNotification } from '../contexts/NotificationContext';
-import { getProfilePhotoUrl, handleImageError, handleImageLoad } from '../utils/photoUtils';
+import { PHOTO_SIZES, getProfilePhotoUrl, handleImageError, handleImageLoad } from '../utils/photoUtils';
 import axios from 'axios';
 
 const Dashboard = () => {
@@ -126,7 +126,7 @@ const Dashboard = () => {
             <div className="col-md-4 text-center">
               <div className="hero-avatar">
                 <img
-                  src={getProfilePhotoUrl(user.profile_photo)}
+                  src={getProfilePhotoUrl(user.profile_photo, PHOTO_SIZES.large)}
                   alt="Profile"
                   className="avatar-img"
                   onError={handleImageError}
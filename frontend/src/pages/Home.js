@@ -1,7 +1,7 @@
 import React, { useState, useEffect } from 'react';
 import { Link } from 'react-router-dom';
 import { useAuth } from '../contexts/AuthContext';
-import { getProfilePhotoUrl, handleImageError, handleImageLoad } from '../utils/photoUtils';
+import { PHOTO_SIZES, getProfilePhotoUrl, handleImageError, handleImageLoad } from '../utils/photoUtils';
 import axios from 'axios';
 
 const Home = () => {
@@ -243,7 +243,7 @@ const UserProfileCard = ({ user }) => {
       <div className="card-body text-center">
         <div className="mb-3">
           <img
-            src={getProfilePhotoUrl(user.profile_photo)}
+            src={getProfilePhotoUrl(user.profile_photo, PHOTO_SIZES.medium)}
             alt={user.name}
             className="profile-avatar"
             onError={handleImageError}
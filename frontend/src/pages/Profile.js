@@ -1,7 +1,7 @@
 import React, { useState, useEffect, useRef } from 'react';
 import { useAuth } from '../contexts/AuthContext';
 import { useNotification } from '../contexts/NotificationContext';
-import { getProfilePhotoUrl, handleImageError, handleImageLoad } from '../utils/photoUtils';
+import { PHOTO_ACCEPT, PHOTO_MAX_BYTES, PHOTO_SIZES, getProfilePhotoUrl, handleImageError, handleImageLoad } from '../utils/photoUtils';
 import axios from 'axios';
 
 const Profile = () => {
@@ -111,6 +111,11 @@ const Profile = () => {
   const handlePhotoUpload = async (e) => {
     const file = e.target.files[0];
     if (!file) return;
+    if (file.size > PHOTO_MAX_BYTES) {
+      showError(`Photos can be at most ${PHOTO_MAX_BYTES / (1024 * 1024)} MB`);
+      e.target.value = '';
+      return;
+    }
 
     const formData = new FormData();
     formData.append('profile_photo', file);
@@ -191,7 +196,7 @@ const Profile = () => {
   };
 
   const getCurrentUserPhotoUrl = () => {
-    return getProfilePhotoUrl(user?.profile_photo);
+    return getProfilePhotoUrl(user?.profile_photo, PHOTO_SIZES.large);
   };
 
   const renderStars = (rating) => {
@@ -249,7 +254,7 @@ const Profile = () => {
                 type="file"
                 ref={fileInputRef}
                 onChange={handlePhotoUpload}
-                accept="image/*"
+                accept={PHOTO_ACCEPT}
                 style={{ display: 'none' }}
               />
             </div>
@@ -2,7 +2,7 @@ import React, { useState, useEffect } from 'react';
 import { useParams, useNavigate, Link } from 'react-router-dom';
 import { useAuth } from '../contexts/AuthContext';
 import { useNotification } from '../contexts/NotificationContext';
-import { getProfilePhotoUrl, handleImageError, handleImageLoad } from '../utils/photoUtils';
+import { PHOTO_SIZES, getProfilePhotoUrl, handleImageError, handleImageLoad } from '../utils/photoUtils';
 import axios from 'axios';
 
 const RequestSwap = () => {
@@ -142,7 +142,7 @@ const RequestSwap = () => {
                       <p className="text-muted">{skill.description || 'No description provided'}</p>
                       <div className="d-flex align-items-center mb-2">
                         <img
-                          src={getProfilePhotoUrl(skill.user_photo)}
+                          src={getProfilePhotoUrl(skill.user_photo, PHOTO_SIZES.small)}
                           alt={skill.user_name}
                           className="rounded-circle me-2"
                           style={{width: '30px', height: '30px', objectFit: 'cover'}}
@@ -170,7 +170,7 @@ const RequestSwap = () => {
                       </h5>
                       <div className="d-flex align-items-center mb-2">
                         <img
-                          src={getProfilePhotoUrl(user.profile_photo)}
+                          src={getProfilePhotoUrl(user.profile_photo, PHOTO_SIZES.small)}
                           alt={user.name}
                           className="rounded-circle me-2"
                           style={{width: '30px', height: '30px', objectFit: 'cover'}}
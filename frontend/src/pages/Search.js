@@ -2,7 +2,7 @@ import React, { useState, useEffect } from 'react';
 import { Link, useNavigate } from 'react-router-dom';
 import { useAuth } from '../contexts/AuthContext';
 import { useNotification } from '../contexts/NotificationContext';
-import { getProfilePhotoUrl, handleImageError } from '../utils/photoUtils';
+import { PHOTO_SIZES, getProfilePhotoUrl, handleImageError } from '../utils/photoUtils';
 import axios from 'axios';
 
 const Search = () => {
@@ -195,7 +195,7 @@ const SkillCard = ({ skill, onRequestSwap }) => {
         
         <div className="d-flex align-items-center mb-3">
           <img 
-            src={getProfilePhotoUrl(skill.profile_photo)} 
+            src={getProfilePhotoUrl(skill.profile_photo, PHOTO_SIZES.small)} 
             alt={skill.user_name}
             className="rounded-circle me-2" 
             style={{width: '30px', height: '30px', objectFit: 'cover'}}
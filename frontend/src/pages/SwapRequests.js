@@ -1,7 +1,7 @@
 import React, { useState, useEffect } from 'react';
 import { useAuth } from '../contexts/AuthContext';
 import { useNotification } from '../contexts/NotificationContext';
-import { getProfilePhotoUrl, handleImageError } from '../utils/photoUtils';
+import { PHOTO_SIZES, getProfilePhotoUrl, handleImageError } from '../utils/photoUtils';
 import axios from 'axios';
 
 const SwapRequests = () => {
@@ -103,7 +103,7 @@ const SwapRequests = () => {
         <div className="row align-items-center">
           <div className="col-md-2 text-center">
             <img 
-              src={getProfilePhotoUrl(request.profile_photo)} 
+              src={getProfilePhotoUrl(request.profile_photo, PHOTO_SIZES.medium)} 
               alt={type === 'sent' ? request.provider_name : request.requester_name}
               className="rounded-circle" 
               style={{width: '50px', height: '50px', objectFit: 'cover'}}
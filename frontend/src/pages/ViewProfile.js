@@ -2,7 +2,7 @@ import React, { useState, useEffect } from 'react';
 import { useParams, Link, useNavigate } from 'react-router-dom';
 import { useAuth } from '../contexts/AuthContext';
 import { useNotification } from '../contexts/NotificationContext';
-import { getProfilePhotoUrl, handleImageError, handleImageLoad } from '../utils/photoUtils';
+import { PHOTO_SIZES, getProfilePhotoUrl, handleImageError, handleImageLoad } from '../utils/photoUtils';
 import axios from 'axios';
 
 const ViewProfile = () => {
@@ -130,7 +130,7 @@ const ViewProfile = () => {
           <div className="col-lg-4 text-center">
             <div className="hero-avatar">
               <img
-                src={getProfilePhotoUrl(userProfile.profile_photo)}
+                src={getProfilePhotoUrl(userProfile.profile_photo, PHOTO_SIZES.large)}
                 alt={userProfile.name}
                 className="avatar-img"
                 style={{width: '120px', height: '120px', borderRadius: '50%', objectFit: 'cover'}}
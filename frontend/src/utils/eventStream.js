@@ -0,0 +1,25 @@
+/**
+ * Utility for receiving server-pushed events
+ */
+
+const BACKEND_URL = 'http://localhost:5000';
+
+/**
+ * Open the server-sent event stream for the logged-in user
+ * @param {Object} handlers - Map of event name to handler receiving the parsed payload
+ * @returns {Function} - Call to close the stream
+ */
+export const subscribeToEvents = (handlers) => {
+  const token = localStorage.getItem('token');
+  if (!token || typeof EventSource === 'undefined') {
+    return () => {};
+  }
+
+  // EventSource can't send an Authorization header, so pass the token in the query string
+  const source = new EventSource(`${BACKEND_URL}/api/events/stream?jwt=${encodeURIComponent(token)}`);
+  Object.entries(handlers).forEach(([event, handler]) => {
+    source.addEventListener(event, (e) => handler(JSON.parse(e.data)));
+  });
+
+  return () => source.close();
+};
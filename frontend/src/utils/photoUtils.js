@@ -4,14 +4,28 @@
 
 const BACKEND_URL = 'http://localhost:5000';
 
+/**
+ * Thumbnail sizes rendered by the backend for every profile photo
+ */
+export const PHOTO_SIZES = { small: 64, medium: 128, large: 256 };
+
+/**
+ * Largest photo the backend accepts (SKILLSWAP_PHOTO_MAX_BYTES) and the
+ * formats it recognises
+ */
+export const PHOTO_MAX_BYTES = 5 * 1024 * 1024;
+export const PHOTO_ACCEPT = 'image/jpeg,image/png,image/gif,image/webp';
+
 /**
  * Get the full URL for a profile photo
  * @param {string} profilePhoto - The profile photo filename
+ * @param {number} [size] - Square thumbnail size (one of PHOTO_SIZES); omit for the full photo
  * @returns {string} - The full URL to the profile photo or default avatar
  */
-export const getProfilePhotoUrl = (profilePhoto) => {
+export const getProfilePhotoUrl = (profilePhoto, size) => {
   if (profilePhoto) {
-    return `${BACKEND_URL}/api/uploads/${profilePhoto}`;
+    const query = size ? `?size=${size}` : '';
+    return `${BACKEND_URL}/api/uploads/${profilePhoto}${query}`;
   }
   return '/default-avatar.png';
 };